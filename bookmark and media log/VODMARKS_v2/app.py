@@ -1,15 +1,54 @@
 
+import base64
+import binascii
+import gzip
+import io
+import json
 import os
+import re
+import socket
 import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from flask import Flask, jsonify, request, render_template, send_file
-from werkzeug.utils import secure_filename
+from urllib.parse import urlsplit, parse_qs
+from flask import Flask, Request, Response, jsonify, redirect, request, render_template, send_file
 import yt_dlp
+from metaqueue import MetaQueue
+from dbpool import ConnectionPool
+import srt
+from thumbs import ThumbCache
+from srtstore import BlobStore
+from profiling import Profiler
+from migrations import Migrations
+from recheck import RecheckScheduler
+from metaproviders import HttpClient, OEmbedProvider, ProviderChain, YouTubePageProvider, YtDlpProvider
+from libraryio import LibraryFormatError, ndjson_chunks, ndjson_records, snapshot_db, tar_stream
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
 
 APP_DIR = os.path.abspath(os.path.dirname(__file__))
 DB_PATH = os.path.join(APP_DIR, "vodmarks.db")
 UPLOAD_FOLDER = os.path.join(APP_DIR, "srt_uploads")
 ALLOWED_EXTENSIONS = {'srt'}
+META_CACHE_TTL = 30 * 24 * 3600  # seconds before a cached yt-dlp result is stale
+META_CACHE_MAX_ENTRIES = 20000
+THUMB_CACHE_DIR = os.path.join(APP_DIR, "thumb_cache")
+THUMB_CACHE_MAX_BYTES = 200 * 1024 * 1024
+# Request/SQL instrumentation (Server-Timing headers, /metrics); off by default.
+PROFILING = os.environ.get("VODMARKS_PROFILING") == "1"
+# With a threshold set, PROFILE_SAMPLE_RATE of requests run under cProfile and
+# those slower than the threshold are dumped to PROFILE_DIR for snakeviz/pstats.
+PROFILE_DIR = os.path.join(APP_DIR, "profiles")
+PROFILE_SLOW_MS = float(os.environ.get("VODMARKS_PROFILE_SLOW_MS", "0"))
+PROFILE_SAMPLE_RATE = float(os.environ.get("VODMARKS_PROFILE_SAMPLE_RATE", "0.1"))
 
 app = Flask(__name__,
             template_folder=os.path.join(APP_DIR, "templates"),
@@ -20,26 +59,589 @@ app.config['MAX_CONTENT_LENGTH'] = 5 * 1024 * 1024  # 5MB max file size
 # Ensure upload folder exists
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+thumb_cache = ThumbCache(THUMB_CACHE_DIR, max_bytes=THUMB_CACHE_MAX_BYTES)
+srt_store = BlobStore(APP_DIR, "srt_store")
+profiler = Profiler(PROFILING, PROFILE_DIR, PROFILE_SLOW_MS, PROFILE_SAMPLE_RATE)
+profiler.install(app)
+
+def srt_abspath(relative_path):
+    """Absolute path for a stored srt_file_path (rows written on Windows use backslashes)."""
+    return os.path.join(APP_DIR, *re.split(r"[\\/]", relative_path))
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+_pools = {}
+_pools_lock = threading.Lock()
+
 def db():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Check out a pooled connection (WAL, tuned PRAGMAs); conn.close() returns it to the pool."""
+    pool = _pools.get(DB_PATH)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.setdefault(DB_PATH, ConnectionPool(DB_PATH))
+    return profiler.wrap(pool.connection())
 
-def init_db():
-    conn = db()
-    cur = conn.cursor()
-    cur.execute("""CREATE TABLE IF NOT EXISTS folders (
+# Secondary indexes, one per hot query shape in the routes below.
+# check_query_plans.py fails if a route query stops using them.
+INDEXES = (
+    # subtree listing: JOIN on folder_id, ORDER BY entry_type, upload_date
+    "CREATE INDEX IF NOT EXISTS idx_bookmarks_folder_order ON bookmarks(folder_id, entry_type, upload_date)",
+    # requeue_pending_meta on startup
+    "CREATE INDEX IF NOT EXISTS idx_bookmarks_meta_pending ON bookmarks(meta_status) WHERE meta_status='pending'",
+    "CREATE INDEX IF NOT EXISTS idx_folders_parent ON folders(parent_id, name)",
+    # merged view: GROUP BY name_key, and lookup of one group by key
+    "CREATE INDEX IF NOT EXISTS idx_folders_name_key ON folders(name_key, parent_id)",
+    "CREATE INDEX IF NOT EXISTS idx_media_categories_sort ON media_categories(sort_order)",
+    "CREATE INDEX IF NOT EXISTS idx_media_categories_name ON media_categories(name)",
+)
+
+# Full-text search: external-content FTS5 tables kept in sync by triggers, so
+# every route (and the metadata queue) that writes a row updates the index.
+SEARCH_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS srt_cues (
+        id INTEGER PRIMARY KEY,
+        bookmark_id INTEGER NOT NULL,
+        start_ms INTEGER NOT NULL,
+        end_ms INTEGER NOT NULL,
+        text TEXT NOT NULL
+    );""",
+    "CREATE INDEX IF NOT EXISTS idx_srt_cues_bookmark ON srt_cues(bookmark_id, start_ms)",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS bookmarks_fts USING fts5(
+        title, uploader, content='bookmarks', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3');""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS media_log_fts USING fts5(
+        title, progress, content='media_log', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3');""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS srt_cues_fts USING fts5(
+        text, content='srt_cues', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3');""",
+    """CREATE TRIGGER IF NOT EXISTS bookmarks_fts_ai AFTER INSERT ON bookmarks BEGIN
+        INSERT INTO bookmarks_fts(rowid, title, uploader) VALUES (new.id, new.title, new.uploader);
+    END;""",
+    """CREATE TRIGGER IF NOT EXISTS bookmarks_fts_ad AFTER DELETE ON bookmarks BEGIN
+        INSERT INTO bookmarks_fts(bookmarks_fts, rowid, title, uploader) VALUES ('delete', old.id, old.title, old.uploader);
+        DELETE FROM srt_cues WHERE bookmark_id = old.id;
+    END;""",
+    """CREATE TRIGGER IF NOT EXISTS bookmarks_fts_au AFTER UPDATE OF title, uploader ON bookmarks BEGIN
+        INSERT INTO bookmarks_fts(bookmarks_fts, rowid, title, uploader) VALUES ('delete', old.id, old.title, old.uploader);
+        INSERT INTO bookmarks_fts(rowid, title, uploader) VALUES (new.id, new.title, new.uploader);
+    END;""",
+    """CREATE TRIGGER IF NOT EXISTS media_log_fts_ai AFTER INSERT ON media_log BEGIN
+        INSERT INTO media_log_fts(rowid, title, progress) VALUES (new.id, new.title, new.progress);
+    END;""",
+    """CREATE TRIGGER IF NOT EXISTS media_log_fts_ad AFTER DELETE ON media_log BEGIN
+        INSERT INTO media_log_fts(media_log_fts, rowid, title, progress) VALUES ('delete', old.id, old.title, old.progress);
+    END;""",
+    """CREATE TRIGGER IF NOT EXISTS media_log_fts_au AFTER UPDATE OF title, progress ON media_log BEGIN
+        INSERT INTO media_log_fts(media_log_fts, rowid, title, progress) VALUES ('delete', old.id, old.title, old.progress);
+        INSERT INTO media_log_fts(rowid, title, progress) VALUES (new.id, new.title, new.progress);
+    END;""",
+    """CREATE TRIGGER IF NOT EXISTS srt_cues_fts_ai AFTER INSERT ON srt_cues BEGIN
+        INSERT INTO srt_cues_fts(rowid, text) VALUES (new.id, new.text);
+    END;""",
+    """CREATE TRIGGER IF NOT EXISTS srt_cues_fts_ad AFTER DELETE ON srt_cues BEGIN
+        INSERT INTO srt_cues_fts(srt_cues_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    END;""",
+)
+
+# Library version for the tree/merged response cache. Bumped by triggers so
+# every writer -- any route, the bulk import, another worker process -- moves it.
+DATA_VERSION_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS data_version (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL
+    );""",
+    "INSERT OR IGNORE INTO data_version (id, version) VALUES (1, 0)",
+) + tuple(
+    f"""CREATE TRIGGER IF NOT EXISTS data_version_{table}_{name} AFTER {event} ON {table} BEGIN
+        UPDATE data_version SET version = version + 1 WHERE id = 1;
+    END;"""
+    for table, name, event in (
+        ("folders", "ai", "INSERT"), ("folders", "ad", "DELETE"), ("folders", "au", "UPDATE OF name, parent_id"),
+        ("bookmarks", "ai", "INSERT"), ("bookmarks", "ad", "DELETE"), ("bookmarks", "au", "UPDATE OF folder_id"),
+    )
+)
+
+# Content-addressed subtitle blobs (see srtstore.py). refs counts the bookmarks
+# whose srt_file_path points at the blob and is kept current by triggers;
+# gc_srt_blobs() deletes blobs that drop to zero.
+SRT_STORE_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS srt_blobs (
+        digest TEXT PRIMARY KEY,
+        path TEXT NOT NULL UNIQUE,
+        size INTEGER NOT NULL,
+        stored_size INTEGER NOT NULL,
+        refs INTEGER NOT NULL DEFAULT 0,
+        created_at TEXT NOT NULL
+    );""",
+    "CREATE INDEX IF NOT EXISTS idx_srt_blobs_unreferenced ON srt_blobs(digest) WHERE refs <= 0",
+    """CREATE TRIGGER IF NOT EXISTS srt_blobs_ref_ai AFTER INSERT ON bookmarks
+        WHEN new.srt_file_path IS NOT NULL BEGIN
+        UPDATE srt_blobs SET refs = refs + 1 WHERE path = new.srt_file_path;
+    END;""",
+    """CREATE TRIGGER IF NOT EXISTS srt_blobs_ref_ad AFTER DELETE ON bookmarks
+        WHEN old.srt_file_path IS NOT NULL BEGIN
+        UPDATE srt_blobs SET refs = refs - 1 WHERE path = old.srt_file_path;
+    END;""",
+    """CREATE TRIGGER IF NOT EXISTS srt_blobs_ref_au AFTER UPDATE OF srt_file_path ON bookmarks
+        WHEN old.srt_file_path IS NOT new.srt_file_path BEGIN
+        UPDATE srt_blobs SET refs = refs - 1 WHERE path = old.srt_file_path;
+        UPDATE srt_blobs SET refs = refs + 1 WHERE path = new.srt_file_path;
+    END;""",
+)
+
+# Append-only change log behind /api/events. Written by triggers so deltas are
+# recorded no matter which route, background job or worker made the change.
+CHANGE_LOG_KEEP = 20000  # rows kept for Last-Event-ID resume
+CHANGE_LOG_PRUNE_EVERY = 1000  # inserts between trims back to CHANGE_LOG_KEEP
+
+def _json_row(prefix, cols):
+    return "json_object(%s)" % ", ".join(f"'{c}', {prefix}.{c}" for c in cols)
+
+_BOOKMARK_ROW = _json_row("new", ("id", "folder_id", "url", "title", "uploader", "upload_date",
+                                  "duration_seconds", "thumbnail_url", "srt_file_path", "entry_type",
+                                  "meta_status", "meta_error", "created_at"))
+
+def _change_log_trigger(name, event, when, kind, data):
+    return f"""CREATE TRIGGER IF NOT EXISTS change_log_{name} AFTER {event} {when} BEGIN
+        INSERT INTO change_log (kind, data) VALUES ({kind}, {data});
+    END;"""
+
+CHANGE_LOG_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS change_log (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        kind TEXT NOT NULL,
+        data TEXT NOT NULL,
+        created_at REAL NOT NULL DEFAULT ((julianday('now') - 2440587.5) * 86400.0)
+    );""",
+) + tuple(
+    _change_log_trigger(*t) for t in (
+        ("bookmark_ai", "INSERT ON bookmarks", "", "'bookmark.added'", _BOOKMARK_ROW),
+        ("bookmark_ad", "DELETE ON bookmarks", "", "'bookmark.deleted'",
+         "json_object('id', old.id, 'folder_id', old.folder_id)"),
+        ("bookmark_move", "UPDATE OF folder_id ON bookmarks", "WHEN old.folder_id IS NOT new.folder_id",
+         "'bookmark.moved'", f"json_set({_BOOKMARK_ROW}, '$.from_folder_id', old.folder_id)"),
+        ("bookmark_au", "UPDATE OF title, uploader, upload_date, duration_seconds, thumbnail_url, "
+                        "srt_file_path, meta_status, meta_error ON bookmarks", "",
+         # a pending -> ok/failed transition is the metadata queue finishing
+         "CASE WHEN old.meta_status = 'pending' AND new.meta_status IS NOT 'pending' "
+         "THEN 'bookmark.meta' ELSE 'bookmark.updated' END", _BOOKMARK_ROW),
+        ("folder_ai", "INSERT ON folders", "", "'folder.added'",
+         "json_object('id', new.id, 'name', new.name, 'parent_id', new.parent_id)"),
+        ("folder_au", "UPDATE OF name ON folders", "WHEN old.name IS NOT new.name", "'folder.renamed'",
+         "json_object('id', new.id, 'name', new.name, 'old_name', old.name)"),
+        ("folder_ad", "DELETE ON folders", "", "'folder.deleted'", "json_object('id', old.id)"),
+        ("category_ai", "INSERT ON media_categories", "", "'media_category.changed'", "json_object('id', new.id)"),
+        ("category_au", "UPDATE ON media_categories", "", "'media_category.changed'", "json_object('id', new.id)"),
+        ("category_ad", "DELETE ON media_categories", "", "'media_category.changed'", "json_object('id', old.id)"),
+    )
+)
+
+# Periodic metadata re-checks (see recheck.py). A bookmark with a URL is due
+# once meta_next_check_at passes: max_age_seconds after a complete check, or
+# sooner -- META_RECHECK_RETRY_SECONDS, doubling with meta_failures -- after a
+# failed one or one that left fields empty (live VODs get their duration once
+# they end). meta_recheck holds the admin settings, running totals and the
+# lease that picks which server process does the scanning.
+META_RECHECK = os.environ.get("VODMARKS_META_RECHECK", "1") != "0"
+META_RECHECK_DEFAULTS = {"enabled": 1, "interval_seconds": 600, "batch_size": 50,
+                         "rate_per_second": 0.5, "max_age_seconds": META_CACHE_TTL}
+META_RECHECK_RETRY_SECONDS = 3600
+META_RECHECK_POLL_SECONDS = 30
+META_RECHECK_WORKERS = 2
+META_COMPLETE_FIELDS = ("title", "duration_seconds", "thumbnail_url")
+META_INCOMPLETE_SQL = " OR ".join(f"{k} IS NULL" for k in META_COMPLETE_FIELDS)
+
+META_RECHECK_SCHEMA = (
+    "CREATE INDEX IF NOT EXISTS idx_bookmarks_meta_due ON bookmarks(meta_next_check_at) WHERE url IS NOT NULL",
+    "CREATE INDEX IF NOT EXISTS idx_bookmarks_meta_failing ON bookmarks(meta_failures) WHERE meta_failures > 0",
+    f"""CREATE TABLE IF NOT EXISTS meta_recheck (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        enabled INTEGER NOT NULL DEFAULT {META_RECHECK_DEFAULTS["enabled"]},
+        interval_seconds REAL NOT NULL DEFAULT {META_RECHECK_DEFAULTS["interval_seconds"]},
+        batch_size INTEGER NOT NULL DEFAULT {META_RECHECK_DEFAULTS["batch_size"]},
+        rate_per_second REAL NOT NULL DEFAULT {META_RECHECK_DEFAULTS["rate_per_second"]},
+        max_age_seconds REAL NOT NULL DEFAULT {META_RECHECK_DEFAULTS["max_age_seconds"]},
+        run_requested INTEGER NOT NULL DEFAULT 0,
+        owner TEXT,
+        lease_until REAL NOT NULL DEFAULT 0,
+        last_scan_at REAL,
+        last_scan_due INTEGER,
+        checked INTEGER NOT NULL DEFAULT 0,
+        updated INTEGER NOT NULL DEFAULT 0,
+        failed INTEGER NOT NULL DEFAULT 0
+    );""",
+    "INSERT OR IGNORE INTO meta_recheck (id) VALUES (1)",
+)
+
+# Summary tables behind /api/stats, kept current by triggers so the endpoint
+# reads a handful of rows instead of aggregating bookmarks and media_log.
+# folder_stats holds subtree totals: a bookmark counts towards its folder and
+# every ancestor (found through folder_closure, which op_folder_create fills in
+# before anything can be added to a new folder). media_stats is keyed on the
+# category id and lives in MEDIA_CATEGORY_SCHEMA.
+_FOLDER_ANCESTORS = "SELECT ancestor FROM folder_closure WHERE descendant = {}.folder_id"
+
+def _stats_bookmark_sql(row, sign):
+    """Trigger statements adding (sign '+') or removing (sign '-') one bookmark row's totals."""
+    dur = f"coalesce({row}.duration_seconds, 0)"
+    folder = f"""UPDATE folder_stats SET bookmarks = bookmarks {sign} 1,
+            with_duration = with_duration {sign} ({row}.duration_seconds IS NOT NULL),
+            duration_seconds = duration_seconds {sign} {dur}
+            WHERE folder_id IN ({_FOLDER_ANCESTORS.format(row)});"""
+    if sign == "+":
+        uploader = f"""INSERT INTO uploader_stats (uploader, bookmarks, duration_seconds)
+            SELECT {row}.uploader, 1, {dur} WHERE {row}.uploader IS NOT NULL
+            ON CONFLICT(uploader) DO UPDATE SET bookmarks = bookmarks + 1,
+            duration_seconds = duration_seconds + excluded.duration_seconds;"""
+    else:
+        uploader = f"""UPDATE uploader_stats SET bookmarks = bookmarks - 1, duration_seconds = duration_seconds - {dur}
+            WHERE uploader = {row}.uploader;
+        DELETE FROM uploader_stats WHERE uploader = {row}.uploader AND bookmarks <= 0;"""
+    return folder + "\n        " + uploader
+
+def _stats_media_sql(row, sign):
+    status = f"coalesce({row}.status, '')"
+    if sign == "+":
+        return f"""INSERT INTO media_stats (category_id, status, entries) VALUES ({row}.category_id, {status}, 1)
+            ON CONFLICT(category_id, status) DO UPDATE SET entries = entries + 1;"""
+    return f"""UPDATE media_stats SET entries = entries - 1 WHERE category_id = {row}.category_id AND status = {status};
+        DELETE FROM media_stats WHERE category_id = {row}.category_id AND status = {status} AND entries <= 0;"""
+
+def _stats_trigger(name, event, when, body):
+    return f"""CREATE TRIGGER IF NOT EXISTS stats_{name} AFTER {event} {when} BEGIN
+        {body}
+    END;"""
+
+STATS_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS folder_stats (
+        folder_id INTEGER PRIMARY KEY,
+        bookmarks INTEGER NOT NULL DEFAULT 0,
+        with_duration INTEGER NOT NULL DEFAULT 0,
+        duration_seconds INTEGER NOT NULL DEFAULT 0
+    );""",
+    """CREATE TABLE IF NOT EXISTS uploader_stats (
+        uploader TEXT PRIMARY KEY,
+        bookmarks INTEGER NOT NULL,
+        duration_seconds INTEGER NOT NULL
+    );""",
+    # top uploaders: ORDER BY bookmarks DESC, uploader
+    "CREATE INDEX IF NOT EXISTS idx_uploader_stats_count ON uploader_stats(bookmarks DESC, uploader)",
+) + tuple(
+    _stats_trigger(*t) for t in (
+        ("folder_ai", "INSERT ON folders", "", "INSERT OR IGNORE INTO folder_stats (folder_id) VALUES (new.id);"),
+        ("folder_ad", "DELETE ON folders", "", "DELETE FROM folder_stats WHERE folder_id = old.id;"),
+        ("bookmark_ai", "INSERT ON bookmarks", "", _stats_bookmark_sql("new", "+")),
+        ("bookmark_ad", "DELETE ON bookmarks", "", _stats_bookmark_sql("old", "-")),
+        ("bookmark_au", "UPDATE OF folder_id, duration_seconds, uploader ON bookmarks",
+         "WHEN old.folder_id IS NOT new.folder_id OR old.duration_seconds IS NOT new.duration_seconds "
+         "OR old.uploader IS NOT new.uploader",
+         _stats_bookmark_sql("old", "-") + "\n        " + _stats_bookmark_sql("new", "+")),
+    )
+)
+
+# Media log listing: GET /api/media_log pages through one group (a status, or
+# a category in the "Currently" view) at a time, so each page is a range scan
+# of one of these indexes (or MEDIA_CATEGORY_SCHEMA's) in title order,
+# whichever way it is sorted; they replace the binary-collated ones migration
+# 3 used to create.
+# media_log_trigram answers substring searches; words shorter than a trigram
+# go to media_log_fts as prefixes instead.
+MEDIA_LOG_QUERY_SCHEMA = (
+    "DROP INDEX IF EXISTS idx_media_log_category_status",
+    "DROP INDEX IF EXISTS idx_media_log_status",
+    "DROP INDEX IF EXISTS idx_media_log_title",
+    # "All media" view, grouped by status
+    "CREATE INDEX IF NOT EXISTS idx_media_log_status_title ON media_log(status, title COLLATE NOCASE)",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS media_log_trigram USING fts5(
+        title, progress, content='media_log', content_rowid='id', tokenize='trigram');""",
+    """CREATE TRIGGER IF NOT EXISTS media_log_trigram_ai AFTER INSERT ON media_log BEGIN
+        INSERT INTO media_log_trigram(rowid, title, progress) VALUES (new.id, new.title, new.progress);
+    END;""",
+    """CREATE TRIGGER IF NOT EXISTS media_log_trigram_ad AFTER DELETE ON media_log BEGIN
+        INSERT INTO media_log_trigram(media_log_trigram, rowid, title, progress) VALUES ('delete', old.id, old.title, old.progress);
+    END;""",
+    """CREATE TRIGGER IF NOT EXISTS media_log_trigram_au AFTER UPDATE OF title, progress ON media_log BEGIN
+        INSERT INTO media_log_trigram(media_log_trigram, rowid, title, progress) VALUES ('delete', old.id, old.title, old.progress);
+        INSERT INTO media_log_trigram(rowid, title, progress) VALUES (new.id, new.title, new.progress);
+    END;""",
+)
+
+# Folders reference their parent and bookmarks their folder with ON DELETE
+# CASCADE (migration 10), so deleting a folder is a single statement; this
+# trigger drops each deleted folder's closure rows. SQLite runs a row's
+# cascades before its AFTER triggers, so the stats triggers of the bookmarks
+# going with a folder still find its ancestors.
+FOLDER_CLOSURE_SCHEMA = (
+    """CREATE TRIGGER IF NOT EXISTS folder_closure_ad AFTER DELETE ON folders BEGIN
+        DELETE FROM folder_closure WHERE descendant = old.id;
+    END;""",
+)
+
+# media_log rows reference their category by id (migration 10): renaming a
+# category rewrites one media_categories row and deleting it cascades. What is
+# keyed on the category is created by that step: the per-category listing
+# indexes, media_stats, and the media_log change-log triggers, which look the
+# name up so events still carry "category".
+_MEDIA_ROW = "json_set(%s, '$.category', (SELECT name FROM media_categories WHERE id = new.category_id))" % (
+    _json_row("new", ("id", "category_id", "title", "progress", "status", "created_at")))
+
+MEDIA_CATEGORY_SCHEMA = (
+    # per-category view, grouped by status; also how ON DELETE CASCADE finds the rows
+    "CREATE INDEX IF NOT EXISTS idx_media_log_category ON media_log(category_id, status, title COLLATE NOCASE)",
+    # "Currently" view, grouped by category
+    "CREATE INDEX IF NOT EXISTS idx_media_log_status_category ON media_log(status, category_id, title COLLATE NOCASE)",
+    """CREATE TABLE IF NOT EXISTS media_stats (
+        category_id INTEGER NOT NULL,
+        status TEXT NOT NULL,
+        entries INTEGER NOT NULL,
+        PRIMARY KEY (category_id, status)
+    ) WITHOUT ROWID;""",
+) + tuple(
+    _change_log_trigger(*t) for t in (
+        ("media_ai", "INSERT ON media_log", "", "'media_log.added'", _MEDIA_ROW),
+        ("media_au", "UPDATE ON media_log", "", "'media_log.updated'", _MEDIA_ROW),
+        ("media_ad", "DELETE ON media_log", "", "'media_log.deleted'",
+         "json_object('id', old.id, 'category_id', old.category_id)"),
+    )
+) + tuple(
+    _stats_trigger(*t) for t in (
+        ("media_ai", "INSERT ON media_log", "", _stats_media_sql("new", "+")),
+        ("media_ad", "DELETE ON media_log", "", _stats_media_sql("old", "-")),
+        ("media_au", "UPDATE OF category_id, status ON media_log",
+         "WHEN old.category_id IS NOT new.category_id OR old.status IS NOT new.status",
+         _stats_media_sql("old", "-") + "\n        " + _stats_media_sql("new", "+")),
+    )
+)
+
+# Library search (/api/search) matches words the way the media log search
+# does: three or more characters anywhere in the text through a trigram index,
+# shorter ones as word prefixes. That is what finds a word inside a Chinese,
+# Japanese or Korean title, which unicode61 keeps as one long token.
+LIBRARY_SEARCH_SCHEMA = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS bookmarks_trigram USING fts5(
+        title, uploader, content='bookmarks', content_rowid='id', tokenize='trigram');""",
+    """CREATE TRIGGER IF NOT EXISTS bookmarks_trigram_ai AFTER INSERT ON bookmarks BEGIN
+        INSERT INTO bookmarks_trigram(rowid, title, uploader) VALUES (new.id, new.title, new.uploader);
+    END;""",
+    """CREATE TRIGGER IF NOT EXISTS bookmarks_trigram_ad AFTER DELETE ON bookmarks BEGIN
+        INSERT INTO bookmarks_trigram(bookmarks_trigram, rowid, title, uploader) VALUES ('delete', old.id, old.title, old.uploader);
+    END;""",
+    """CREATE TRIGGER IF NOT EXISTS bookmarks_trigram_au AFTER UPDATE OF title, uploader ON bookmarks BEGIN
+        INSERT INTO bookmarks_trigram(bookmarks_trigram, rowid, title, uploader) VALUES ('delete', old.id, old.title, old.uploader);
+        INSERT INTO bookmarks_trigram(rowid, title, uploader) VALUES (new.id, new.title, new.uploader);
+    END;""",
+)
+
+# Keeps change_log at CHANGE_LOG_KEEP rows while the server runs (migration
+# 12): every CHANGE_LOG_PRUNE_EVERY-th row trims the oldest ones in the same
+# transaction, whichever process wrote it. Ids only grow, so the newest rows
+# are the highest ids.
+CHANGE_LOG_PRUNE_SCHEMA = (
+    f"""CREATE TRIGGER IF NOT EXISTS change_log_prune AFTER INSERT ON change_log
+        WHEN new.id % {CHANGE_LOG_PRUNE_EVERY} = 0 BEGIN
+        DELETE FROM change_log WHERE id <= new.id - {CHANGE_LOG_KEEP};
+    END;""",
+)
+
+## ── Schema migrations ──
+# Databases from before versioning sit at user_version 0 in whatever shape an
+# older init_db() left them, so steps 1-6 tolerate any of those states. Later
+# steps can rely on the schema the earlier ones produce. The schema constants
+# above describe the current tables: objects that migration 10 moved onto
+# media_log.category_id are no longer created by the earlier steps that used
+# to build them on the category name.
+
+schema = Migrations()
+
+BOOKMARKS_TABLE = """CREATE TABLE IF NOT EXISTS {name} (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    folder_id INTEGER NOT NULL,
+    url TEXT,
+    title TEXT,
+    uploader TEXT,
+    upload_date TEXT,
+    duration_seconds INTEGER,
+    thumbnail_url TEXT,
+    srt_file_path TEXT,
+    entry_type TEXT DEFAULT 'youtube',
+    created_at TEXT NOT NULL,
+    meta_status TEXT DEFAULT 'ok',
+    meta_error TEXT
+);"""
+BOOKMARK_COLUMNS = ("id", "folder_id", "url", "title", "uploader", "upload_date", "duration_seconds",
+                    "thumbnail_url", "srt_file_path", "entry_type", "created_at", "meta_status", "meta_error")
+
+def _table_columns(conn, table):
+    return {row[1]: row for row in conn.execute(f"PRAGMA table_info({table})").fetchall()}
+
+@schema.step(1, "core tables")
+def _migrate_core_tables(conn, after):
+    conn.execute("""CREATE TABLE IF NOT EXISTS folders (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         name TEXT NOT NULL,
         parent_id INTEGER,
+        created_at TEXT NOT NULL,
+        path TEXT,
+        name_key TEXT
+    );""")
+    conn.execute(BOOKMARKS_TABLE.format(name="bookmarks"))
+    columns = _table_columns(conn, "bookmarks")
+    # The first release had no entry_type and a NOT NULL url (notnull is field 3),
+    # which SQLite can't relax in place
+    if 'entry_type' not in columns or columns['url'][3] == 1:
+        schema.rebuild_table(conn, "bookmarks", BOOKMARKS_TABLE.format(name="bookmarks_new"),
+                             [c for c in BOOKMARK_COLUMNS if c in columns])
+    else:
+        if 'meta_status' not in columns:
+            conn.execute("ALTER TABLE bookmarks ADD COLUMN meta_status TEXT DEFAULT 'ok'")
+        if 'meta_error' not in columns:
+            conn.execute("ALTER TABLE bookmarks ADD COLUMN meta_error TEXT")
+
+    conn.execute("""CREATE TABLE IF NOT EXISTS media_log (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        category TEXT NOT NULL,
+        title TEXT NOT NULL,
+        progress TEXT DEFAULT '',
+        status TEXT DEFAULT 'plan_to_watch',
         created_at TEXT NOT NULL
     );""")
-    cur.execute("""CREATE TABLE IF NOT EXISTS bookmarks (
+    conn.execute("UPDATE media_log SET status='plan_to_watch' WHERE status='plan_to_start'")
+
+    conn.execute("""CREATE TABLE IF NOT EXISTS media_categories (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        sort_order INTEGER NOT NULL DEFAULT 0
+    );""")
+    if conn.execute("SELECT COUNT(*) AS c FROM media_categories").fetchone()["c"] == 0:
+        defaults = ["Anime", "Movies", "TV", "Manga", "Books", "Games"]
+        conn.executemany("INSERT INTO media_categories (name, sort_order) VALUES (?, ?)",
+                         [(name, i) for i, name in enumerate(defaults)])
+        # Older media_log rows used lower-case category names
+        conn.executemany("UPDATE media_log SET category=? WHERE category=?",
+                         [(name, name.lower()) for name in defaults])
+
+    # yt-dlp metadata cache, keyed by canonical YouTube video ID
+    conn.execute("""CREATE TABLE IF NOT EXISTS meta_cache (
+        video_id TEXT PRIMARY KEY,
+        title TEXT,
+        uploader TEXT,
+        upload_date TEXT,
+        duration_seconds INTEGER,
+        thumbnail_url TEXT,
+        fetched_at REAL NOT NULL,
+        last_used_at REAL NOT NULL
+    );""")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_meta_cache_last_used ON meta_cache(last_used_at)")
+
+    if not conn.execute("SELECT id FROM folders WHERE parent_id IS NULL AND name='Root'").fetchone():
+        conn.execute("INSERT INTO folders (name, parent_id, created_at) VALUES ('Root',NULL,?)",
+                     (datetime.now(timezone.utc).isoformat(),))
+
+@schema.step(2, "folder closure table, breadcrumb paths and merged-view keys")
+def _migrate_folder_closure(conn, after):
+    columns = _table_columns(conn, "folders")
+    if 'path' not in columns:
+        conn.execute("ALTER TABLE folders ADD COLUMN path TEXT")
+    if 'name_key' not in columns:
+        conn.execute("ALTER TABLE folders ADD COLUMN name_key TEXT")
+    missing = conn.execute("SELECT id, name FROM folders WHERE name_key IS NULL").fetchall()
+    conn.executemany("UPDATE folders SET name_key=? WHERE id=?",
+                     [(folder_name_key(r["name"]), r["id"]) for r in missing])
+    conn.execute("""CREATE TABLE IF NOT EXISTS folder_closure (
+        ancestor INTEGER NOT NULL,
+        descendant INTEGER NOT NULL,
+        depth INTEGER NOT NULL,
+        PRIMARY KEY (ancestor, descendant)
+    ) WITHOUT ROWID;""")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_folder_closure_descendant ON folder_closure(descendant, depth)")
+    rebuild_folder_closure(conn)
+
+@schema.step(3, "secondary indexes")
+def _migrate_indexes(conn, after):
+    for stmt in INDEXES:
+        conn.execute(stmt)
+
+@schema.step(4, "data version and change log triggers")
+def _migrate_change_tracking(conn, after):
+    for stmt in DATA_VERSION_SCHEMA + CHANGE_LOG_SCHEMA:
+        conn.execute(stmt)
+
+@schema.step(5, "full-text search")
+def _migrate_search(conn, after):
+    fts_existed = conn.execute("SELECT 1 FROM sqlite_master WHERE name='bookmarks_fts'").fetchone()
+    for stmt in SEARCH_SCHEMA:
+        conn.execute(stmt)
+    if not fts_existed:
+        conn.execute("INSERT INTO bookmarks_fts(bookmarks_fts) VALUES ('rebuild')")
+        conn.execute("INSERT INTO media_log_fts(media_log_fts) VALUES ('rebuild')")
+        for r in conn.execute("SELECT id, srt_file_path FROM bookmarks WHERE srt_file_path IS NOT NULL").fetchall():
+            index_srt_cues(conn, r["id"], srt_abspath(r["srt_file_path"]))
+
+@schema.step(6, "content-addressed subtitle store")
+def _migrate_srt_store(conn, after):
+    for stmt in SRT_STORE_SCHEMA:
+        conn.execute(stmt)
+    last = conn.execute("SELECT COALESCE(MAX(id), 0) FROM change_log").fetchone()[0]
+    converted = migrate_srt_files(conn)
+    # Repointing srt_file_path isn't an edit anyone made; don't replay it to clients
+    conn.execute("DELETE FROM change_log WHERE id > ?", (last,))
+    # Only drop the old uploads once the rows pointing at the blobs are committed
+    after.extend(lambda p=p: os.remove(p) for p in converted)
+
+@schema.step(7, "metadata re-check schedule")
+def _migrate_meta_recheck(conn, after):
+    conn.execute("ALTER TABLE bookmarks ADD COLUMN meta_checked_at REAL")
+    conn.execute("ALTER TABLE bookmarks ADD COLUMN meta_next_check_at REAL NOT NULL DEFAULT 0")
+    conn.execute("ALTER TABLE bookmarks ADD COLUMN meta_failures INTEGER NOT NULL DEFAULT 0")
+    # Incomplete rows are due at once; complete ones are spread over one max age
+    # so an upgraded library doesn't re-check everything on the same day
+    conn.execute(f"""UPDATE bookmarks SET meta_next_check_at = ? + abs(random()) % ?
+        WHERE url IS NOT NULL AND NOT ({META_INCOMPLETE_SQL})""",
+                 (time.time(), META_RECHECK_DEFAULTS["max_age_seconds"]))
+    for stmt in META_RECHECK_SCHEMA:
+        conn.execute(stmt)
+
+@schema.step(8, "summary tables for /api/stats")
+def _migrate_stats(conn, after):
+    for stmt in STATS_SCHEMA:
+        conn.execute(stmt)
+    rebuild_stats(conn, media=False)  # media_stats comes with migration 10
+
+@schema.step(9, "media log listing indexes and substring search")
+def _migrate_media_log_query(conn, after):
+    for stmt in MEDIA_LOG_QUERY_SCHEMA:
+        conn.execute(stmt)
+    conn.execute("INSERT INTO media_log_trigram(media_log_trigram) VALUES ('rebuild')")
+
+@schema.step(10, "foreign keys with cascading deletes; media_log references categories by id")
+def _migrate_foreign_keys(conn, after):
+    # Rows pointing at something that no longer exists would fail the foreign
+    # key check: stray folders and bookmarks move under Root, and category
+    # names with no category get one
+    root = conn.execute("SELECT id FROM folders WHERE parent_id IS NULL ORDER BY id").fetchone()["id"]
+    if conn.execute("UPDATE folders SET parent_id=? WHERE parent_id NOT IN (SELECT id FROM folders)",
+                    (root,)).rowcount:
+        rebuild_folder_closure(conn)
+    conn.execute("UPDATE bookmarks SET folder_id=? WHERE folder_id NOT IN (SELECT id FROM folders)", (root,))
+    missing = [r["category"] for r in conn.execute("""SELECT DISTINCT category FROM media_log
+        WHERE category NOT IN (SELECT name FROM media_categories) ORDER BY category""")]
+    top = conn.execute("SELECT COALESCE(MAX(sort_order), 0) AS m FROM media_categories").fetchone()["m"]
+    conn.executemany("INSERT INTO media_categories (name, sort_order) VALUES (?, ?)",
+                     [(name, top + i) for i, name in enumerate(missing, 1)])
+
+    schema.rebuild_table(conn, "folders", """CREATE TABLE folders_new (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
-        folder_id INTEGER NOT NULL,
+        name TEXT NOT NULL,
+        parent_id INTEGER REFERENCES folders(id) ON DELETE CASCADE,
+        created_at TEXT NOT NULL,
+        path TEXT,
+        name_key TEXT
+    );""", ("id", "name", "parent_id", "created_at", "path", "name_key"))
+    schema.rebuild_table(conn, "bookmarks", """CREATE TABLE bookmarks_new (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        folder_id INTEGER NOT NULL REFERENCES folders(id) ON DELETE CASCADE,
         url TEXT,
         title TEXT,
         uploader TEXT,
@@ -48,119 +650,311 @@ def init_db():
         thumbnail_url TEXT,
         srt_file_path TEXT,
         entry_type TEXT DEFAULT 'youtube',
-        created_at TEXT NOT NULL
-    );""")
-    
-    # Auto-migrate: Check if we need to fix the schema
-    cur.execute("PRAGMA table_info(bookmarks)")
-    columns = {row[1]: row for row in cur.fetchall()}
-    
-    needs_migration = False
-    
-    # Check if entry_type column exists
-    if 'entry_type' not in columns:
-        needs_migration = True
-    
-    # Check if url column has NOT NULL constraint (notnull is index 3 in pragma result)
-    if 'url' in columns and columns['url'][3] == 1:  # 1 means NOT NULL
-        needs_migration = True
-    
-    if needs_migration:
-        print("Migrating database schema...")
-        # SQLite doesn't support ALTER COLUMN, so we need to recreate the table
-        cur.execute("""CREATE TABLE IF NOT EXISTS bookmarks_new (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            folder_id INTEGER NOT NULL,
-            url TEXT,
-            title TEXT,
-            uploader TEXT,
-            upload_date TEXT,
-            duration_seconds INTEGER,
-            thumbnail_url TEXT,
-            srt_file_path TEXT,
-            entry_type TEXT DEFAULT 'youtube',
-            created_at TEXT NOT NULL
-        );""")
-        
-        # Get existing columns to copy
-        cur.execute("PRAGMA table_info(bookmarks)")
-        old_columns = [row[1] for row in cur.fetchall()]
-        
-        # Build the column list for copying (only columns that exist in both)
-        new_cols = ['id', 'folder_id', 'url', 'title', 'uploader', 'upload_date', 
-                    'duration_seconds', 'thumbnail_url', 'srt_file_path', 'entry_type', 'created_at']
-        copy_cols = [c for c in new_cols if c in old_columns]
-        
-        # Copy data
-        cols_str = ', '.join(copy_cols)
-        cur.execute(f"INSERT INTO bookmarks_new ({cols_str}) SELECT {cols_str} FROM bookmarks")
-        
-        # Swap tables
-        cur.execute("DROP TABLE bookmarks")
-        cur.execute("ALTER TABLE bookmarks_new RENAME TO bookmarks")
-        print("Migration complete!")
-    
-    # Media Log table
-    cur.execute("""CREATE TABLE IF NOT EXISTS media_log (
+        created_at TEXT NOT NULL,
+        meta_status TEXT DEFAULT 'ok',
+        meta_error TEXT,
+        meta_checked_at REAL,
+        meta_next_check_at REAL NOT NULL DEFAULT 0,
+        meta_failures INTEGER NOT NULL DEFAULT 0
+    );""", BOOKMARK_COLUMNS + ("meta_checked_at", "meta_next_check_at", "meta_failures"))
+    schema.rebuild_table(conn, "media_log", """CREATE TABLE media_log_new (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
-        category TEXT NOT NULL,
+        category_id INTEGER NOT NULL REFERENCES media_categories(id) ON DELETE CASCADE,
         title TEXT NOT NULL,
         progress TEXT DEFAULT '',
-        status TEXT DEFAULT 'plan_to_start',
+        status TEXT DEFAULT 'plan_to_watch',
         created_at TEXT NOT NULL
-    );""")
+    );""", ("id", ("category_id", "(SELECT MIN(c.id) FROM media_categories c WHERE c.name = media_log.category)"),
+            "title", "progress", "status", "created_at"))
+    conn.execute("DROP TABLE IF EXISTS media_stats")
 
-    # Media categories table
-    cur.execute("""CREATE TABLE IF NOT EXISTS media_categories (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT NOT NULL,
-        sort_order INTEGER NOT NULL DEFAULT 0
-    );""")
+    # Dropping the old tables took their indexes and triggers along; the FTS
+    # tables keep working since the rows kept their ids
+    for stmt in (INDEXES + SEARCH_SCHEMA + DATA_VERSION_SCHEMA + CHANGE_LOG_SCHEMA + SRT_STORE_SCHEMA
+                 + META_RECHECK_SCHEMA + STATS_SCHEMA + MEDIA_LOG_QUERY_SCHEMA + FOLDER_CLOSURE_SCHEMA
+                 + MEDIA_CATEGORY_SCHEMA):
+        conn.execute(stmt)
+    rebuild_stats(conn)
 
-    # Seed default categories if table is empty
-    cur.execute("SELECT COUNT(*) as c FROM media_categories")
-    if cur.fetchone()["c"] == 0:
-        defaults = ["Anime", "Movies", "TV", "Manga", "Books", "Games"]
-        for i, name in enumerate(defaults):
-            cur.execute("INSERT INTO media_categories (name, sort_order) VALUES (?, ?)", (name, i))
-        # Migrate existing media_log category names to proper case
-        name_map = {"anime": "Anime", "movies": "Movies", "tv": "TV",
-                     "manga": "Manga", "books": "Books", "games": "Games"}
-        for old, new in name_map.items():
-            cur.execute("UPDATE media_log SET category=? WHERE category=?", (new, old))
-
-    # Migrate plan_to_start → plan_to_watch
-    cur.execute("UPDATE media_log SET status='plan_to_watch' WHERE status='plan_to_start'")
-
-    cur.execute("SELECT id FROM folders WHERE parent_id IS NULL AND name='Root'")
-    if not cur.fetchone():
-        cur.execute("INSERT INTO folders VALUES (NULL,'Root',NULL,?)",
-                    (datetime.now(timezone.utc).isoformat(),))
-    conn.commit()
+@schema.step(11, "substring search for bookmarks")
+def _migrate_library_search(conn, after):
+    for stmt in LIBRARY_SEARCH_SCHEMA:
+        conn.execute(stmt)
+    conn.execute("INSERT INTO bookmarks_trigram(bookmarks_trigram) VALUES ('rebuild')")
+
+@schema.step(12, "keep the change log trimmed while the server runs")
+def _migrate_change_log_prune(conn, after):
+    for stmt in CHANGE_LOG_PRUNE_SCHEMA:
+        conn.execute(stmt)
+
+def init_db():
+    """Bring the database up to the latest schema version; read-only when it already is."""
+    conn = db()
+    applied = schema.run(conn)
+    if applied:
+        # Refresh planner statistics for tables whose shape changed enough to matter
+        conn.execute("PRAGMA optimize")
+    prune_change_log(conn)
     conn.close()
+    return applied
+
+def prune_change_log(conn):
+    """Keep the newest CHANGE_LOG_KEEP change_log rows; writes only when there are more.
+
+    The change_log_prune trigger does this as rows arrive; this catches up a
+    log that grew before the trigger existed.
+    """
+    lo, hi = conn.execute("SELECT (SELECT MIN(id) FROM change_log), (SELECT MAX(id) FROM change_log)").fetchone()
+    if hi is not None and hi - lo >= CHANGE_LOG_KEEP:
+        conn.execute("DELETE FROM change_log WHERE id <= ?", (hi - CHANGE_LOG_KEEP,))
+        conn.commit()
+
+@contextmanager
+def file_lock(path):
+    """Exclusive lock shared between processes, held for the duration of the block."""
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK gives up after ~10s; keep waiting
+                    pass
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+def prepare_db():
+    """init_db() serialized across processes, so parallel launches don't migrate at the same time.
+
+    serve.py calls this once in the server's master process before any worker
+    forks; workers themselves never run schema setup. Scripts that open the
+    live database (migrate.py, srt_gc.py, backup.py) go through it too.
+    """
+    with file_lock(DB_PATH + ".lock"):
+        applied = init_db()
+    close_pools()
+    return applied
+
+def close_pools():
+    for pool in list(_pools.values()):
+        pool.close_all()
+
+def rebuild_folder_closure(conn):
+    """Recompute folder_closure and folders.path from parent_id (migration / repair path)."""
+    rows = conn.execute("SELECT id, name, parent_id FROM folders").fetchall()
+    folders = {r["id"]: r for r in rows}
+    closure = []
+    paths = []
+    for fid in folders:
+        names = []
+        cur, depth = fid, 0
+        while cur in folders and depth <= len(folders):
+            closure.append((cur, fid, depth))
+            names.append(folders[cur]["name"])
+            cur = folders[cur]["parent_id"]
+            depth += 1
+        paths.append((" > ".join(reversed(names)), fid))
+    conn.execute("DELETE FROM folder_closure")
+    conn.executemany("INSERT INTO folder_closure (ancestor, descendant, depth) VALUES (?,?,?)", closure)
+    conn.executemany("UPDATE folders SET path=? WHERE id=?", paths)
+
+def rebuild_stats(conn, media=True):
+    """Recompute the /api/stats summary tables from scratch (migration / repair path)."""
+    conn.execute("DELETE FROM folder_stats")
+    conn.execute("""INSERT INTO folder_stats (folder_id, bookmarks, with_duration, duration_seconds)
+        SELECT c.ancestor, COUNT(b.id), COUNT(b.duration_seconds), COALESCE(SUM(b.duration_seconds), 0)
+        FROM folder_closure c LEFT JOIN bookmarks b ON b.folder_id = c.descendant GROUP BY c.ancestor""")
+    conn.execute("DELETE FROM uploader_stats")
+    conn.execute("""INSERT INTO uploader_stats (uploader, bookmarks, duration_seconds)
+        SELECT uploader, COUNT(*), COALESCE(SUM(duration_seconds), 0) FROM bookmarks
+        WHERE uploader IS NOT NULL GROUP BY uploader""")
+    if media:
+        conn.execute("DELETE FROM media_stats")
+        conn.execute("""INSERT INTO media_stats (category_id, status, entries)
+            SELECT category_id, coalesce(status, ''), COUNT(*) FROM media_log GROUP BY 1, 2""")
+
+def store_srt(conn, fileobj):
+    """Put a subtitle stream in the blob store and register it; returns its relative path."""
+    return register_srt(conn, srt_store.stage(fileobj))
+
+def register_srt(conn, staged):
+    """Move a blob from srt_store.stage() into the store and register it; returns its relative path.
+
+    Call it in the write transaction that points a bookmark at the blob: a
+    sweep can then no longer delete an identical, unreferenced blob between
+    the existence check and the new reference.
+    """
+    digest, size, tmp = staged
+    stored_size, rel = srt_store.place(digest, tmp)
+    conn.execute("""INSERT INTO srt_blobs (digest, path, size, stored_size, created_at) VALUES (?,?,?,?,?)
+        ON CONFLICT(digest) DO NOTHING""",
+                 (digest, rel, size, stored_size, datetime.now(timezone.utc).isoformat()))
+    return rel
+
+def migrate_srt_files(conn):
+    """Move legacy srt_uploads/ files into the blob store. Returns the files to delete after commit."""
+    rows = conn.execute("SELECT id, srt_file_path FROM bookmarks "
+                        "WHERE srt_file_path IS NOT NULL AND srt_file_path NOT LIKE ?",
+                        (srt_store.subdir + "/%",)).fetchall()
+    converted = set()
+    for r in rows:
+        path = srt_abspath(r["srt_file_path"])
+        if not os.path.exists(path):
+            continue
+        with open(path, "rb") as f:
+            rel = store_srt(conn, f)
+        conn.execute("UPDATE bookmarks SET srt_file_path=? WHERE id=?", (rel, r["id"]))
+        converted.add(path)
+    if converted:
+        print(f"Moved {len(converted)} subtitle files into {srt_store.subdir}/")
+    return sorted(converted)
+
+SRT_ORPHAN_GRACE_SECONDS = 3600
+SRT_TMP_GRACE_SECONDS = 600   # far longer than staging an upload and waiting for the write lock
+
+def gc_srt_blobs(conn, paths=None, dry_run=False, orphan_files=True):
+    """Delete subtitle blobs no bookmark references; returns (count, bytes freed).
+
+    `paths` limits the sweep to specific blobs (used right after a bookmark drops
+    its subtitle); otherwise every unreferenced blob goes, plus -- unless
+    orphan_files is false -- blob files with no row at all that are older than
+    SRT_ORPHAN_GRACE_SECONDS. A full sweep also deletes staged .tmp files
+    older than SRT_TMP_GRACE_SECONDS. Run it inside a write transaction (BEGIN
+    IMMEDIATE) so an upload of the same content can't re-reference a blob
+    between the check and the delete.
+    """
+    sql = "SELECT digest, stored_size FROM srt_blobs WHERE refs <= 0"
+    params = []
+    if paths is not None:
+        paths = [p for p in paths if p]
+        if not paths:
+            return 0, 0
+        sql += " AND path IN (%s)" % ",".join("?" * len(paths))
+        params = paths
+    doomed = [(r["digest"], r["stored_size"]) for r in conn.execute(sql, params).fetchall()]
+    stale = []
+    if paths is None:
+        stale = list(srt_store.stale_temp_files(time.time() - SRT_TMP_GRACE_SECONDS))
+    if paths is None and orphan_files:
+        known = {r["digest"] for r in conn.execute("SELECT digest FROM srt_blobs").fetchall()}
+        cutoff = time.time() - SRT_ORPHAN_GRACE_SECONDS
+        for digest, mtime in srt_store.digests_on_disk():
+            if digest not in known and mtime < cutoff:
+                doomed.append((digest, os.path.getsize(srt_store.abspath(digest))))
+    freed = sum(size for _, size in doomed) + sum(size for _, size in stale)
+    if dry_run:
+        return len(doomed) + len(stale), freed
+    for digest, _ in doomed:
+        conn.execute("DELETE FROM srt_blobs WHERE digest=?", (digest,))
+        srt_store.remove(digest)
+    for tmp, _ in stale:
+        srt_store.discard(tmp)
+    return len(doomed) + len(stale), freed
+
+# Deleting bookmarks (one by one, or a folder's worth by cascade) only drops
+# the refs of their subtitle blobs; the blobs are swept afterwards on a
+# background thread, off the request path.
+_srt_gc_lock = threading.Lock()
+_srt_gc_queued = False
+_srt_gc_pool = None
+
+def _sweep_srt_blobs():
+    global _srt_gc_queued
+    with _srt_gc_lock:
+        _srt_gc_queued = False
+    conn = db()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        gc_srt_blobs(conn, orphan_files=False)
+        conn.commit()
+    except Exception:
+        pass  # left for the next sweep or srt_gc.py
+    finally:
+        conn.close()
+
+def schedule_srt_gc():
+    """Sweep unreferenced subtitle blobs in the background; a sweep already queued covers this call."""
+    global _srt_gc_pool, _srt_gc_queued
+    with _srt_gc_lock:
+        if _srt_gc_queued:
+            return False
+        _srt_gc_queued = True
+        if _srt_gc_pool is None:
+            _srt_gc_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="srt-gc")
+        _srt_gc_pool.submit(_sweep_srt_blobs)
+    return True
+
+def queue_srt_gc(conn, after):
+    """After a delete: schedule a sweep once the op commits, if it left blobs unreferenced."""
+    if conn.execute("SELECT 1 FROM srt_blobs WHERE refs <= 0 LIMIT 1").fetchone():
+        after.append(schedule_srt_gc)
+
+# Stay well under SQLITE_MAX_VARIABLE_NUMBER (999 on older builds) however
+# many ids a bulk request sends.
+IN_CHUNK = 500
+
+def execute_in(conn, sql, params, ids):
+    """Run `sql` (with one {} placeholder for an IN list) over `ids` in chunks.
+
+    Call inside a transaction so the chunks apply atomically. Returns the total
+    rowcount.
+    """
+    total = 0
+    for i in range(0, len(ids), IN_CHUNK):
+        chunk = ids[i:i + IN_CHUNK]
+        cur = conn.execute(sql.format(",".join("?" * len(chunk))), list(params) + chunk)
+        total += cur.rowcount
+    return total
+
+def srt_cue_rows(fileobj):
+    """(start_ms, end_ms, text) search rows for the cues of a binary SRT stream."""
+    return ((c.start_ms, c.end_ms, srt.clean_text(c.text)) for c in srt.iter_cues(fileobj) if c.text)
+
+def _insert_srt_cues(conn, bid, rows):
+    cur = conn.executemany("INSERT INTO srt_cues (bookmark_id, start_ms, end_ms, text) VALUES (?,?,?,?)",
+                           ((bid, *r) for r in rows))
+    return cur.rowcount
+
+def index_srt_cues(conn, bid, filepath, rows=None):
+    """(Re)build the searchable cue rows for one bookmark's subtitle file (or from already parsed `rows`)."""
+    conn.execute("DELETE FROM srt_cues WHERE bookmark_id=?", (bid,))
+    if rows is not None:
+        return _insert_srt_cues(conn, bid, rows)
+    if not os.path.exists(filepath):
+        return 0
+    with srt.open_srt(filepath) as f:
+        return _insert_srt_cues(conn, bid, srt_cue_rows(f))
 
 def get_tree():
     conn = db()
-    folders = conn.execute("SELECT id, name, parent_id FROM folders").fetchall()
-    direct_counts = conn.execute("SELECT folder_id, COUNT(*) AS c FROM bookmarks GROUP BY folder_id").fetchall()
+    # folder_stats already holds subtree bookmark counts; no need to count bookmarks here
+    folders = conn.execute("""SELECT f.id, f.name, f.parent_id, COALESCE(s.bookmarks, 0) AS count
+        FROM folders f LEFT JOIN folder_stats s ON s.folder_id = f.id""").fetchall()
     conn.close()
 
-    direct = {row["folder_id"]: row["c"] for row in direct_counts}
-    by_parent = {}
-    for f in folders:
-        d = dict(f)
-        d["children"] = []
-        d["count"] = 0
-        by_parent.setdefault(d["parent_id"], []).append(d)
+    with profiler.span("tree"):
+        by_parent = {}
+        for f in folders:
+            d = dict(f)
+            d["children"] = []
+            by_parent.setdefault(d["parent_id"], []).append(d)
 
-    def build(pid):
-        kids = by_parent.get(pid, [])
-        for k in kids:
-            k["children"] = build(k["id"])
-            k["count"] = int(direct.get(k["id"], 0)) + sum(ch.get("count", 0) for ch in k["children"])
-        return kids
+        def build(pid):
+            kids = by_parent.get(pid, [])
+            for k in kids:
+                k["children"] = build(k["id"])
+            return kids
 
-    return build(None)
+        return build(None)
 
 def get_root():
     conn = db()
@@ -169,6 +963,11 @@ def get_root():
     return r["id"]
 
 def yt_meta(url):
+    """Title, uploader, thumbnail, duration and upload date; cheap providers first, yt-dlp last."""
+    with profiler.span("yt_meta"):
+        return meta_providers.fetch(url)
+
+def ytdlp_meta(url):
     ydl_opts = {"quiet": True, "skip_download": True}
     with yt_dlp.YoutubeDL(ydl_opts) as ydl:
         info = ydl.extract_info(url, download=False)
@@ -185,275 +984,1004 @@ def yt_meta(url):
         "upload_date": d,
     }
 
-def get_all_descendant_folder_ids(folder_id):
+## ── yt-dlp metadata cache ──
+
+_YT_ID_RE = re.compile(r"^[A-Za-z0-9_-]{11}$")
+_YT_HOSTS = {"youtube.com", "www.youtube.com", "m.youtube.com", "music.youtube.com",
+             "youtube-nocookie.com", "www.youtube-nocookie.com"}
+META_FIELDS = ("title", "uploader", "upload_date", "duration_seconds", "thumbnail_url")
+
+def youtube_video_id(url):
+    """Canonical video ID for watch/youtu.be/shorts/live/embed URLs (ignoring &t= etc.), or None."""
+    try:
+        parts = urlsplit((url or "").strip())
+    except ValueError:
+        return None
+    host = (parts.hostname or "").lower()
+    path = [p for p in parts.path.split("/") if p]
+    vid = None
+    if host in ("youtu.be", "www.youtu.be"):
+        vid = path[0] if path else None
+    elif host in _YT_HOSTS:
+        if parts.path == "/watch":
+            vid = (parse_qs(parts.query).get("v") or [None])[0]
+        elif len(path) >= 2 and path[0] in ("shorts", "live", "embed", "v"):
+            vid = path[1]
+    if vid and _YT_ID_RE.match(vid):
+        return vid
+    return None
+
+meta_http = HttpClient()
+# Lambdas look yt_meta's dependencies up at call time so tests can swap in stubs
+meta_providers = ProviderChain([
+    YouTubePageProvider(youtube_video_id, lambda url, headers: meta_http.get(url, headers)),
+    OEmbedProvider(youtube_video_id, lambda url, headers: meta_http.get(url, headers)),
+    YtDlpProvider(lambda url: ytdlp_meta(url)),
+], span=profiler.span)
+
+_meta_refresh_lock = threading.Lock()
+_meta_refreshing = set()
+_meta_refresh_pool = None
+
+def meta_cache_get(video_id):
+    """Return (meta, is_stale) for a cached video, or (None, False). Touches the LRU timestamp."""
     conn = db()
-    rows = conn.execute("SELECT id,parent_id FROM folders").fetchall()
+    row = conn.execute("SELECT * FROM meta_cache WHERE video_id=?", (video_id,)).fetchone()
+    if row:
+        conn.execute("UPDATE meta_cache SET last_used_at=? WHERE video_id=?", (time.time(), video_id))
+        conn.commit()
     conn.close()
-    children = {}
-    for r in rows:
-        children.setdefault(r["parent_id"], []).append(r["id"])
+    if not row:
+        return None, False
+    return {k: row[k] for k in META_FIELDS}, time.time() - row["fetched_at"] > META_CACHE_TTL
+
+def meta_cache_put(video_id, meta):
+    now = time.time()
+    conn = db()
+    conn.execute("""INSERT OR REPLACE INTO meta_cache
+        (video_id, title, uploader, upload_date, duration_seconds, thumbnail_url, fetched_at, last_used_at)
+        VALUES (?,?,?,?,?,?,?,?)""", (video_id,) + tuple(meta.get(k) for k in META_FIELDS) + (now, now))
+    # LRU eviction: drop the least recently used rows beyond the cap
+    conn.execute("""DELETE FROM meta_cache WHERE video_id IN (
+        SELECT video_id FROM meta_cache ORDER BY last_used_at DESC LIMIT -1 OFFSET ?)""",
+                 (META_CACHE_MAX_ENTRIES,))
+    conn.commit()
+    conn.close()
+
+def _refresh_meta_cache(video_id, url):
+    try:
+        meta_cache_put(video_id, yt_meta(url))
+    except Exception:
+        pass  # keep serving the stale entry; next lookup will try again
+    finally:
+        with _meta_refresh_lock:
+            _meta_refreshing.discard(video_id)
+
+def schedule_meta_refresh(video_id, url):
+    """Re-validate a stale cache entry in the background (once per video at a time)."""
+    global _meta_refresh_pool
+    with _meta_refresh_lock:
+        if video_id in _meta_refreshing:
+            return False
+        _meta_refreshing.add(video_id)
+        if _meta_refresh_pool is None:
+            _meta_refresh_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="meta-refresh")
+        _meta_refresh_pool.submit(_refresh_meta_cache, video_id, url)
+    return True
+
+def cached_yt_meta(url, refresh_stale=True):
+    """yt_meta with the meta_cache in front. Stale hits are returned as-is and refreshed in the background."""
+    video_id = youtube_video_id(url)
+    if video_id is None:
+        return yt_meta(url)
+    meta, stale = meta_cache_get(video_id)
+    if meta is not None:
+        if stale and refresh_stale:
+            schedule_meta_refresh(video_id, url)
+        return meta
+    meta = yt_meta(url)
+    meta_cache_put(video_id, meta)
+    return meta
+
+def yt_playlist_urls(url):
+    """Expand a playlist/channel URL into its video URLs without extracting each video."""
+    ydl_opts = {"quiet": True, "skip_download": True, "extract_flat": "in_playlist"}
+    with profiler.span("yt_playlist"), yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        info = ydl.extract_info(url, download=False)
     out = []
-    stack = [folder_id]
-    while stack:
-        fid = stack.pop()
-        out.append(fid)
-        stack.extend(children.get(fid, []))
+    for e in info.get("entries") or []:
+        if not e:
+            continue
+        u = e.get("url") or e.get("webpage_url")
+        if u and not u.startswith("http") and e.get("id"):
+            u = f"https://www.youtube.com/watch?v={e['id']}"
+        if u:
+            out.append(u)
     return out
 
+def _meta_fetched(ids, meta):
+    if not ids:
+        return
+    conn = db()
+    try:
+        execute_in(conn, "UPDATE bookmarks SET title=?, uploader=?, upload_date=?, duration_seconds=?, "
+                         "thumbnail_url=?, meta_status='ok', meta_error=NULL WHERE id IN ({})",
+                   [meta.get("title"), meta.get("uploader"), meta.get("upload_date"),
+                    meta.get("duration_seconds"), meta.get("thumbnail_url")], ids)
+        record_meta_check(conn, ids, True)
+        conn.commit()
+    finally:
+        conn.close()
+    thumb_cache.prefetch(meta.get("thumbnail_url"))
+
+def _meta_failed(ids, error):
+    if not ids:
+        return
+    conn = db()
+    try:
+        execute_in(conn, "UPDATE bookmarks SET meta_status='failed', meta_error=? WHERE id IN ({})", [error], ids)
+        record_meta_check(conn, ids, False)
+        conn.commit()
+    finally:
+        conn.close()
+
+# Looked up at call time so tests can swap in a stub for yt_meta / cached_yt_meta
+meta_queue = MetaQueue(lambda url: cached_yt_meta(url), _meta_fetched, _meta_failed)
+
+def requeue_pending_meta():
+    """Resubmit bookmarks left 'pending' by a previous run that exited mid-fetch."""
+    conn = db()
+    rows = conn.execute("SELECT id, url FROM bookmarks WHERE meta_status='pending' AND url IS NOT NULL").fetchall()
+    conn.close()
+    for r in rows:
+        meta_queue.submit(r["url"], r["id"])
+    return len(rows)
+
+## ── Metadata re-checks ──
+
+def meta_max_age(conn):
+    return conn.execute("SELECT max_age_seconds FROM meta_recheck WHERE id=1").fetchone()[0]
+
+def next_check_at(now, failures, max_age):
+    """When a bookmark is next due: max_age after a clean check, backing off from the retry delay otherwise."""
+    if not failures:
+        return now + max_age
+    return now + min(max_age, META_RECHECK_RETRY_SECONDS * 2 ** min(failures - 1, 16))
+
+def record_meta_check(conn, ids, ok):
+    """Stamp meta_checked_at on `ids` after a fetch and schedule their next check.
+
+    A fetch that failed, or succeeded but left fields empty, counts towards
+    meta_failures. Only bookkeeping columns change, so no triggers fire.
+    """
+    now = time.time()
+    max_age = meta_max_age(conn)
+    updates = []
+    for i in range(0, len(ids), IN_CHUNK):
+        chunk = ids[i:i + IN_CHUNK]
+        for r in conn.execute(f"SELECT id, meta_failures, ({META_INCOMPLETE_SQL}) AS incomplete FROM bookmarks "
+                              f"WHERE id IN ({','.join('?' * len(chunk))})", chunk).fetchall():
+            failures = 0 if ok and not r["incomplete"] else r["meta_failures"] + 1
+            updates.append((now, next_check_at(now, failures, max_age), failures, r["id"]))
+    conn.executemany("UPDATE bookmarks SET meta_checked_at=?, meta_next_check_at=?, meta_failures=? WHERE id=?",
+                     updates)
+
+def _recheck_owner():
+    # Computed per call: gunicorn workers fork after import
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def _recheck_scan():
+    """RecheckScheduler's scan: claim the lease and the next due batch; returns (jobs, rate, more)."""
+    now = time.time()
+    owner = _recheck_owner()
+    conn = db()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        cfg = conn.execute("SELECT * FROM meta_recheck WHERE id=1").fetchone()
+        if not cfg["enabled"] or (cfg["owner"] not in (None, owner) and cfg["lease_until"] > now):
+            conn.rollback()
+            return [], 0, False
+        # Held past the longest batch, so a slow batch isn't taken over halfway
+        lease = now + META_RECHECK_POLL_SECONDS * 4 + cfg["batch_size"] / cfg["rate_per_second"]
+        conn.execute("UPDATE meta_recheck SET owner=?, lease_until=? WHERE id=1", (owner, lease))
+        if not cfg["run_requested"] and now < (cfg["last_scan_at"] or 0) + cfg["interval_seconds"]:
+            conn.commit()
+            return [], 0, False
+        rows = conn.execute("""SELECT id, url FROM bookmarks WHERE url IS NOT NULL AND meta_next_check_at <= ?
+            AND meta_status IS NOT 'pending' ORDER BY meta_next_check_at LIMIT ?""",
+                            (now, cfg["batch_size"])).fetchall()
+        # Push the batch out to the end of the lease so it isn't picked again while it runs
+        # (or, if this process dies, comes back once the lease has lapsed)
+        execute_in(conn, "UPDATE bookmarks SET meta_next_check_at=? WHERE id IN ({})", [lease],
+                   [r["id"] for r in rows])
+        more = len(rows) >= cfg["batch_size"]
+        conn.execute("UPDATE meta_recheck SET last_scan_at=?, last_scan_due=?, run_requested=? WHERE id=1",
+                     (now, len(rows), int(more)))
+        conn.commit()
+    finally:
+        conn.close()
+    by_url = {}
+    for r in rows:
+        by_url.setdefault(r["url"], []).append(r["id"])
+    return list(by_url.items()), cfg["rate_per_second"], more
+
+def recheck_meta(job):
+    """Re-fetch one URL's metadata for the bookmarks in `job` (url, ids); returns whether the fetch worked.
+
+    Fields the source no longer reports keep their old value, and rows whose
+    values come back unchanged aren't written, so a routine re-check doesn't
+    show up as an edit in /api/events.
+    """
+    url, ids = job
+    try:
+        meta = yt_meta(url)
+    except Exception as e:
+        error = str(e) or e.__class__.__name__
+        conn = db()
+        conn.execute("BEGIN IMMEDIATE")
+        # Bookmarks that have metadata keep it; ones that never got any show the latest error
+        execute_in(conn, "UPDATE bookmarks SET meta_error=? WHERE meta_status='failed' AND meta_error IS NOT ? "
+                         "AND id IN ({})", [error, error], ids)
+        record_meta_check(conn, ids, False)
+        conn.execute("UPDATE meta_recheck SET checked=checked+1, failed=failed+1 WHERE id=1")
+        conn.commit()
+        conn.close()
+        return False
+    video_id = youtube_video_id(url)
+    if video_id is not None:
+        meta_cache_put(video_id, meta)
+    fields = [meta.get(k) for k in META_FIELDS]
+    assign = ", ".join(f"{k}=COALESCE(?, {k})" for k in META_FIELDS)
+    changed = " OR ".join(f"{k} IS NOT COALESCE(?, {k})" for k in META_FIELDS)
+    conn = db()
+    conn.execute("BEGIN IMMEDIATE")
+    updated = execute_in(conn, f"UPDATE bookmarks SET {assign}, meta_status='ok', meta_error=NULL "
+                               f"WHERE ({changed} OR meta_status IS NOT 'ok' OR meta_error IS NOT NULL) "
+                               "AND id IN ({})", fields + fields, ids)
+    record_meta_check(conn, ids, True)
+    conn.execute("UPDATE meta_recheck SET checked=checked+1, updated=updated+? WHERE id=1", (updated,))
+    conn.commit()
+    conn.close()
+    if updated:
+        thumb_cache.prefetch(meta.get("thumbnail_url"))
+    return True
+
+def request_meta_recheck(conn, ids):
+    """Make `ids` due now unless they were checked within the retry delay; returns how many."""
+    return execute_in(conn, "UPDATE bookmarks SET meta_next_check_at=0 WHERE url IS NOT NULL "
+                            "AND (meta_checked_at IS NULL OR meta_checked_at < ?) AND id IN ({})",
+                      [time.time() - META_RECHECK_RETRY_SECONDS], ids)
+
+# Looked up at call time so tests can swap in stubs
+meta_rechecker = RecheckScheduler(lambda: _recheck_scan(), lambda job: recheck_meta(job),
+                                  workers=META_RECHECK_WORKERS, poll=META_RECHECK_POLL_SECONDS)
+
+def start_meta_recheck():
+    """Start re-checking in this process. Every server worker can: the lease keeps one scanning."""
+    if META_RECHECK:
+        meta_rechecker.start()
+
+def stop_meta_recheck():
+    if not meta_rechecker.running:
+        return
+    meta_rechecker.stop()
+    # Hand the lease on now rather than making the other workers wait it out
+    conn = db()
+    conn.execute("UPDATE meta_recheck SET lease_until=0 WHERE id=1 AND owner=?", (_recheck_owner(),))
+    conn.commit()
+    conn.close()
+
+def get_all_descendant_folder_ids(folder_id):
+    conn = db()
+    rows = conn.execute("SELECT descendant FROM folder_closure WHERE ancestor=? ORDER BY depth",
+                        (folder_id,)).fetchall()
+    conn.close()
+    return [r["descendant"] for r in rows]
+
 def get_folder_breadcrumb(folder_id):
     """Get breadcrumb path for a folder like 'Root > Gaming > Clips'"""
     conn = db()
-    folders = {r["id"]: r for r in conn.execute("SELECT id, name, parent_id FROM folders").fetchall()}
+    row = conn.execute("SELECT path FROM folders WHERE id=?", (folder_id,)).fetchone()
     conn.close()
-    parts = []
-    fid = folder_id
-    while fid and fid in folders:
-        parts.append(folders[fid]["name"])
-        fid = folders[fid]["parent_id"]
-    parts.reverse()
-    return " > ".join(parts)
+    return row["path"] if row else ""
+
+def folder_name_key(name):
+    """Key for grouping same-named folders: trimmed and case-folded."""
+    return (name or "").strip().lower()
 
 # PROPER merged: only duplicates, one row per name
 def merged_groups(min_dupes=2):
     conn = db()
-    rows = conn.execute("SELECT id, name FROM folders WHERE parent_id IS NOT NULL").fetchall()
-    buckets = {}
-    for r in rows:
-        key = r["name"].strip().lower()
-        buckets.setdefault(key, []).append(r["id"])
-    out = []
-    for key, ids in buckets.items():
-        if len(ids) < min_dupes:
-            continue
-        q = "SELECT COUNT(*) as c FROM bookmarks WHERE folder_id IN (%s)" % ",".join(["?"]*len(ids))
-        c = conn.execute(q, ids).fetchone()["c"]
-        out.append({"key": key, "name": key, "ids": ids, "total": int(c)})
+    rows = conn.execute("""SELECT f.name_key AS key, group_concat(DISTINCT f.id) AS ids, COUNT(b.id) AS total
+        FROM folders f LEFT JOIN bookmarks b ON b.folder_id = f.id
+        WHERE f.parent_id IS NOT NULL
+        GROUP BY f.name_key HAVING COUNT(DISTINCT f.id) >= ?
+        ORDER BY MIN(f.id)""", (min_dupes,)).fetchall()
     conn.close()
-    return out
+    return [{"key": r["key"], "name": r["key"], "ids": sorted(int(i) for i in r["ids"].split(",")),
+             "total": r["total"]} for r in rows]
+
+def merged_group_folder_ids(key, min_dupes=2):
+    """Folder ids in one merged group, or [] if the name isn't duplicated."""
+    conn = db()
+    rows = conn.execute("SELECT id FROM folders WHERE name_key=? AND parent_id IS NOT NULL ORDER BY id",
+                        (key,)).fetchall()
+    conn.close()
+    ids = [r["id"] for r in rows]
+    return ids if len(ids) >= min_dupes else []
 
 @app.get("/")
 def home():
     return render_template("index.html")
 
+## ── Cached tree / merged payloads (ETag + in-process cache) ──
+
+_payload_cache = {}  # name -> (version, body)
+_payload_lock = threading.Lock()
+cache_stats = {"hits": 0, "misses": 0, "not_modified": 0}
+
+def get_data_version():
+    conn = db()
+    row = conn.execute("SELECT version FROM data_version WHERE id=1").fetchone()
+    conn.close()
+    return row["version"] if row else 0
+
+def cached_json_response(name, build):
+    """Serve build()'s JSON, reusing it until data_version moves, with ETag/304 support."""
+    version = get_data_version()
+    etag = f"{name}-{version}"
+    if request.if_none_match.contains(etag):
+        with _payload_lock:
+            cache_stats["not_modified"] += 1
+        resp = app.response_class(status=304)
+    else:
+        cached = _payload_cache.get(name)
+        if cached and cached[0] == version:
+            body = cached[1]
+            with _payload_lock:
+                cache_stats["hits"] += 1
+        else:
+            payload = build()
+            with profiler.span("json"):
+                body = json.dumps(payload, separators=(",", ":"))
+            with _payload_lock:
+                _payload_cache[name] = (version, body)
+                cache_stats["misses"] += 1
+        resp = app.response_class(body, mimetype="application/json")
+    resp.set_etag(etag)
+    # Let the browser keep the body but revalidate every time
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
+
 @app.get("/api/tree")
 def tree():
-    return jsonify({"tree": get_tree(), "root": get_root(), "merged": merged_groups()})
+    return cached_json_response("tree", lambda: {"tree": get_tree(), "root": get_root()})
 
 @app.get("/api/merged")
 def api_merged():
-    groups = merged_groups()
-    return jsonify({"groups": [
-        {"key": g["key"], "name": g["name"].title(), "total_bookmarks": g["total"]}
-        for g in groups
+    return cached_json_response("merged", lambda: {"groups": [
+        {"key": g["key"], "name": g["name"].title(), "total_bookmarks": g["total"], "folder_ids": g["ids"]}
+        for g in merged_groups()
     ]})
 
-@app.get("/api/merged_bookmarks")
-def api_merged_bookmarks():
-    key = (request.args.get("key") or "").strip().lower()
-    groups = merged_groups()
-    match = next((g for g in groups if g["key"] == key), None)
-    if not match:
-        return jsonify([])
-    ids = match["ids"]
+## ── Change feed (Server-Sent Events) ──
+
+EVENTS_POLL_SECONDS = 0.5
+EVENTS_HEARTBEAT_SECONDS = 15
+EVENTS_BATCH = 500
+
+def _change_log_bounds():
     conn = db()
-    q = ("SELECT b.*, f.name AS folder_name FROM bookmarks b "
-         "LEFT JOIN folders f ON b.folder_id = f.id "
-         "WHERE b.folder_id IN (%s) ORDER BY b.upload_date ASC") % ",".join(["?"]*len(ids))
-    rows = conn.execute(q, ids).fetchall()
+    # Separate subqueries: SQLite only answers a lone MIN or MAX from the index end
+    row = conn.execute("SELECT (SELECT MIN(id) FROM change_log) AS lo, "
+                       "(SELECT MAX(id) FROM change_log) AS hi").fetchone()
     conn.close()
-    results = []
-    for r in rows:
-        d = dict(r)
-        # Build breadcrumb for this bookmark's folder
-        d["folder_breadcrumb"] = get_folder_breadcrumb(d["folder_id"])
-        results.append(d)
-    return jsonify(results)
+    return row["lo"], row["hi"] or 0
 
-@app.get("/api/bookmarks")
-def bookmarks():
-    fid = int(request.args.get("folder_id"))
-    all_ids = get_all_descendant_folder_ids(fid)
+def _changes_after(last_id):
     conn = db()
-    q = "SELECT * FROM bookmarks WHERE folder_id IN (%s) ORDER BY entry_type, upload_date ASC" % ",".join(["?"]*len(all_ids))
-    rows = conn.execute(q, all_ids).fetchall()
+    rows = conn.execute("SELECT id, kind, data FROM change_log WHERE id > ? ORDER BY id LIMIT ?",
+                        (last_id, EVENTS_BATCH)).fetchall()
     conn.close()
-    return jsonify([dict(r) for r in rows])
+    return rows
 
-@app.post("/api/folder")
-def add_folder():
-    data = request.json
-    name = data.get("name")
-    parent = data.get("parent_id")
+@app.get("/api/events")
+def api_events():
+    """Stream change_log rows as SSE. Resumes after Last-Event-ID (or ?since=)."""
+    resume = request.headers.get("Last-Event-ID") or request.args.get("since")
+    lo, hi = _change_log_bounds()
+    try:
+        last_id = int(resume) if resume is not None else hi
+    except ValueError:
+        last_id = hi
+    # Asked to resume from before the oldest row we still have: deltas are lost
+    reset = resume is not None and lo is not None and last_id < lo - 1
+
+    def stream():
+        nonlocal last_id
+        yield "retry: 3000\n\n"
+        if reset:
+            yield f"id: {hi}\nevent: reset\ndata: {{}}\n\n"
+            last_id = hi
+        idle = 0.0
+        # Ends on shutdown; the browser reconnects with Last-Event-ID to another worker
+        while not _draining.is_set():
+            rows = _changes_after(last_id)
+            for r in rows:
+                last_id = r["id"]
+                yield f"id: {r['id']}\nevent: {r['kind']}\ndata: {r['data']}\n\n"
+            if rows:
+                idle = 0.0
+                if len(rows) == EVENTS_BATCH:
+                    continue
+            elif idle >= EVENTS_HEARTBEAT_SECONDS:
+                yield ": keepalive\n\n"
+                idle = 0.0
+            _draining.wait(EVENTS_POLL_SECONDS)
+            idle += EVENTS_POLL_SECONDS
+
+    return Response(stream(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/api/cache_stats")
+def api_cache_stats():
+    return jsonify(version=get_data_version(), **cache_stats,
+                   thumbs=dict(thumb_cache.stats, bytes=thumb_cache.size()))
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus text format; only served when VODMARKS_PROFILING=1."""
+    if not profiler.enabled:
+        return jsonify(error="Profiling is disabled; set VODMARKS_PROFILING=1."), 404
+    pool = _pools.get(DB_PATH)
+    gauges = [(f"vodmarks_payload_cache_{k}", f"Tree/merged payload cache {k.replace('_', ' ')}.", v)
+              for k, v in cache_stats.items()]
+    if pool is not None:
+        gauges += [(f"vodmarks_db_pool_{k}", f"Pooled SQLite connections {k}.", v) for k, v in pool.stats.items()]
+    gauges += [("vodmarks_meta_queue_pending", "URLs waiting on yt-dlp.", len(meta_queue.pending())),
+               ("vodmarks_thumb_cache_bytes", "Bytes in the thumbnail cache.", thumb_cache.size())]
+    return Response(profiler.render(gauges), mimetype="text/plain; version=0.0.4")
+
+## ── Health / lifecycle ──
+
+_draining = threading.Event()
+
+@app.get("/healthz")
+def healthz():
+    """Liveness: the process is up and serving requests."""
+    return jsonify(ok=True, pid=os.getpid())
+
+@app.get("/readyz")
+def readyz():
+    """Readiness: the schema is in place and this worker isn't shutting down."""
+    if _draining.is_set():
+        return jsonify(ready=False, error="Shutting down."), 503
+    try:
+        version = get_data_version()
+    except sqlite3.Error as e:
+        return jsonify(ready=False, error=str(e)), 503
+    return jsonify(ready=True, pid=os.getpid(), version=version, meta_pending=len(meta_queue.pending()))
+
+def begin_shutdown():
+    """Report not-ready and end open event streams so in-flight requests can drain."""
+    _draining.set()
+
+def shutdown():
+    """Stop background work and close pooled connections once requests have drained.
+
+    Queued metadata fetches are dropped rather than waited for: their bookmarks
+    stay 'pending' and requeue_pending_meta() picks them up on the next start.
+    """
+    _draining.set()
+    stop_meta_recheck()
+    meta_queue.shutdown(wait=True, cancel_pending=True)
+    thumb_cache.shutdown()
+    if _meta_refresh_pool is not None:
+        _meta_refresh_pool.shutdown(wait=False, cancel_futures=True)
+    if _srt_gc_pool is not None:
+        _srt_gc_pool.shutdown(wait=True, cancel_futures=True)
+    close_pools()
+
+## ── Thumbnail proxy ──
+
+THUMB_MAX_AGE = 7 * 24 * 3600
+
+@app.get("/thumb/<int:bid>")
+def thumb(bid):
+    """Bookmark thumbnail from the local cache, resized to ?w= (snapped to thumbs.WIDTHS)."""
     conn = db()
-    conn.execute("INSERT INTO folders VALUES (NULL,?,?,?)", (name, parent, datetime.now(timezone.utc).isoformat()))
-    conn.commit()
+    row = conn.execute("SELECT thumbnail_url FROM bookmarks WHERE id=?", (bid,)).fetchone()
     conn.close()
-    return jsonify(ok=True)
+    if not row or not row["thumbnail_url"]:
+        return jsonify(error="No thumbnail."), 404
+    try:
+        width = int(request.args.get("w") or 0)
+    except ValueError:
+        return jsonify(error="w must be an integer."), 400
+    webp = "image/webp" in request.headers.get("Accept", "")
+    try:
+        path, mimetype, etag = thumb_cache.get(row["thumbnail_url"], width, webp=webp)
+    except Exception as e:
+        if getattr(e, "code", None) in (404, 410):
+            # Gone upstream (videos get new thumbnails); have the bookmark re-checked
+            conn = db()
+            request_meta_recheck(conn, [bid])
+            conn.commit()
+            conn.close()
+        # Upstream unreachable or not an image: let the browser try it directly
+        return redirect(row["thumbnail_url"])
+    resp = send_file(path, mimetype=mimetype, etag=etag, max_age=THUMB_MAX_AGE, conditional=True)
+    resp.vary.add("Accept")
+    return resp
 
-@app.post("/api/bookmark")
-def add_bookmark():
-    data = request.json
-    fid = data.get("folder_id")
-    url = data.get("url")
-    
-    # Check if it's a simple media entry (no URL)
-    entry_type = data.get("entry_type", "youtube")
-    
-    if entry_type == "media":
-        # Simple media entry - just title and date
-        title = data.get("title")
-        date = data.get("date")
+## ── Bookmark listing (keyset pagination) ──
+
+BOOKMARK_PAGE_MAX = 500
+
+# sort option (matches #sortSelect in the UI) -> (ORDER BY expressions, direction)
+BOOKMARK_SORTS = {
+    "title_asc": (["COALESCE(b.title,'') COLLATE NOCASE"], "ASC"),
+    "title_desc": (["COALESCE(b.title,'') COLLATE NOCASE"], "DESC"),
+    "date_asc": (["COALESCE(b.upload_date,'')"], "ASC"),
+    "date_desc": (["COALESCE(b.upload_date,'')"], "DESC"),
+    "duration_asc": (["COALESCE(b.duration_seconds,0)"], "ASC"),
+    "duration_desc": (["COALESCE(b.duration_seconds,0)"], "DESC"),
+}
+
+def encode_cursor(values):
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+    return values if isinstance(values, list) else None
+
+def bookmark_page(base_sql, params, default_order):
+    """Run a bookmark listing query with ?sort=, ?q=, ?limit= and ?cursor= applied.
+
+    base_sql must select from bookmarks aliased as b and end in a WHERE clause.
+    Without ?limit the full list is returned as a plain array (the old response shape).
+    """
+    sort = request.args.get("sort") or "default"
+    exprs, direction = BOOKMARK_SORTS.get(sort, (default_order, "ASC"))
+    order_cols = exprs + ["b.id"]
+    sql, args = base_sql, list(params)
+
+    q = (request.args.get("q") or "").strip()
+    if q:
+        like = "%" + q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        sql += (" AND (b.title LIKE ? ESCAPE '\\' OR b.uploader LIKE ? ESCAPE '\\'"
+                " OR b.url LIKE ? ESCAPE '\\')")
+        args += [like, like, like]
+
+    order_by = " ORDER BY " + ", ".join(f"{c} {direction}" for c in order_cols)
+    limit = request.args.get("limit", type=int)
+    if not limit:
         conn = db()
-        conn.execute("""INSERT INTO bookmarks 
-            (folder_id, url, title, uploader, upload_date, duration_seconds, thumbnail_url, srt_file_path, entry_type, created_at) 
-            VALUES (?,?,?,?,?,?,?,?,?,?)""", (
-            fid, None, title, None, date, None, None, None, "media", datetime.now(timezone.utc).isoformat()
-        ))
-        conn.commit()
+        rows = conn.execute(sql + order_by, args).fetchall()
         conn.close()
-        return jsonify(ok=True)
+        return jsonify([dict(r) for r in rows])
+    limit = max(1, min(limit, BOOKMARK_PAGE_MAX))
+
+    conn = db()
+    total = None
+    cursor = request.args.get("cursor")
+    if cursor:
+        values = decode_cursor(cursor)
+        if values is None or len(values) != len(order_cols):
+            conn.close()
+            return jsonify(error="Invalid cursor."), 400
+        op = "<" if direction == "DESC" else ">"
+        sql += " AND (%s) %s (%s)" % (", ".join(order_cols), op, ",".join(["?"] * len(values)))
+        args += values
     else:
-        # YouTube entry
-        meta = yt_meta(url)
-        conn = db()
-        conn.execute("""INSERT INTO bookmarks 
+        total = conn.execute("SELECT COUNT(*) AS c FROM (%s)" % sql, args).fetchone()["c"]
+
+    key_select = ", ".join(f"{e} AS _k{i}" for i, e in enumerate(exprs))
+    sql = sql.replace("SELECT ", f"SELECT {key_select}, ", 1)
+    sql += order_by + " LIMIT ?"
+    rows = conn.execute(sql, args + [limit + 1]).fetchall()
+    conn.close()
+
+    items = []
+    for r in rows[:limit]:
+        d = dict(r)
+        for i in range(len(exprs)):
+            d.pop(f"_k{i}")
+        items.append(d)
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor([last[f"_k{i}"] for i in range(len(exprs))] + [last["id"]])
+    return jsonify(items=items, next_cursor=next_cursor, total=total)
+
+@app.get("/api/merged_bookmarks")
+def api_merged_bookmarks():
+    key = folder_name_key(request.args.get("key"))
+    ids = merged_group_folder_ids(key)
+    if not ids:
+        if request.args.get("limit"):
+            return jsonify(items=[], next_cursor=None, total=0)
+        return jsonify([])
+    base = ("SELECT b.*, f.name AS folder_name, f.path AS folder_breadcrumb FROM bookmarks b "
+            "LEFT JOIN folders f ON b.folder_id = f.id "
+            "WHERE b.folder_id IN (SELECT id FROM folders WHERE name_key=? AND parent_id IS NOT NULL)")
+    return bookmark_page(base, [key], ["COALESCE(b.upload_date,'')"])
+
+@app.get("/api/bookmarks")
+def bookmarks():
+    fid = int(request.args.get("folder_id"))
+    base = ("SELECT b.* FROM folder_closure c JOIN bookmarks b ON b.folder_id = c.descendant "
+            "WHERE c.ancestor=?")
+    return bookmark_page(base, [fid], ["COALESCE(b.entry_type,'')", "COALESCE(b.upload_date,'')"])
+
+## ── Mutations ──
+#
+# Each op_* function does one mutation on a caller-supplied connection and
+# leaves committing to the caller, so the single-purpose routes and /api/batch
+# share the same code. Bad input raises OpError. Work that must only happen
+# once the transaction is committed (queueing metadata fetches) is appended to
+# `after`.
+
+class OpError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+def run_op(op, args):
+    """Run one op in its own transaction and turn it into a route response."""
+    after = []
+    conn = db()
+    try:
+        result = op(conn, args, after)
+        conn.commit()
+    except OpError as e:
+        return jsonify(error=e.message), e.status
+    finally:
+        conn.close()
+    for fn in after:
+        fn()
+    return jsonify(ok=True, **result)
+
+def _require_folder(conn, folder_id):
+    if not conn.execute("SELECT id FROM folders WHERE id=?", (folder_id,)).fetchone():
+        raise OpError("Target folder not found.", 404)
+
+def _id_list(args):
+    ids = args.get("ids")
+    if ids is None and args.get("id") is not None:
+        ids = [args["id"]]
+    try:
+        return [int(i) for i in ids or []]
+    except (TypeError, ValueError):
+        raise OpError("ids must be integers.")
+
+def op_folder_create(conn, args, after):
+    name = args.get("name")
+    name = name.strip() if isinstance(name, str) else ""
+    if not name:
+        raise OpError("Folder name is required.")
+    parent = args.get("parent_id")
+    parent_row = conn.execute("SELECT path FROM folders WHERE id=?", (parent,)).fetchone()
+    if parent is not None and not parent_row:
+        raise OpError("Parent folder not found.", 404)
+    path = f"{parent_row['path']} > {name}" if parent_row else name
+    cur = conn.execute("INSERT INTO folders (name, parent_id, created_at, path, name_key) VALUES (?,?,?,?,?)",
+                       (name, parent, datetime.now(timezone.utc).isoformat(), path, folder_name_key(name)))
+    new_id = cur.lastrowid
+    conn.execute("""INSERT INTO folder_closure (ancestor, descendant, depth)
+        SELECT ancestor, ?, depth + 1 FROM folder_closure WHERE descendant=?
+        UNION ALL SELECT ?, ?, 0""", (new_id, parent, new_id, new_id))
+    return {"id": new_id}
+
+def op_folder_rename(conn, args, after):
+    fid = args.get("id")
+    name = (args.get("name") or "").strip()
+    if not name:
+        raise OpError("Name is required.")
+    row = conn.execute("SELECT f.parent_id, f.path, p.path AS parent_path FROM folders f "
+                       "LEFT JOIN folders p ON p.id = f.parent_id WHERE f.id=?", (fid,)).fetchone()
+    if not row:
+        raise OpError("Folder not found.", 404)
+    if row["parent_id"] is None:
+        raise OpError("Can't rename Root.")
+    old_path = row["path"]
+    new_path = f"{row['parent_path']} > {name}" if row["parent_path"] else name
+    conn.execute("UPDATE folders SET name=?, name_key=? WHERE id=?", (name, folder_name_key(name), fid))
+    # Rewrite the breadcrumb prefix of the folder and everything below it
+    conn.execute("UPDATE folders SET path = ? || substr(path, ?) "
+                 "WHERE id IN (SELECT descendant FROM folder_closure WHERE ancestor=?)",
+                 (new_path, len(old_path) + 1, fid))
+    return {}
+
+# Each level of a cascading delete is a level of trigger nesting: SQLite caps
+# it at 1000 (SQLITE_MAX_TRIGGER_DEPTH), and every write inside costs more the
+# deeper it is nested, so deep subtrees are deleted a few levels at a time
+FOLDER_CASCADE_DEPTH = 16
+
+def op_folder_delete(conn, args, after):
+    fid = args.get("id")
+    row = conn.execute("SELECT parent_id FROM folders WHERE id=?", (fid,)).fetchone()
+    if not row:
+        raise OpError("Folder not found.", 404)
+    if row["parent_id"] is None:
+        raise OpError("Can't delete Root.")
+
+    # Subfolders, bookmarks and closure rows go with the folder (ON DELETE
+    # CASCADE and FOLDER_CLOSURE_SCHEMA); a deeper subtree is cut from the
+    # bottom up first, FOLDER_CASCADE_DEPTH levels per statement
+    deleted, depth = conn.execute("SELECT COUNT(*), MAX(depth) FROM folder_closure WHERE ancestor=?",
+                                  (fid,)).fetchone()
+    for cut in range((depth or 0) - FOLDER_CASCADE_DEPTH, 0, -FOLDER_CASCADE_DEPTH):
+        conn.execute("DELETE FROM folders WHERE id IN "
+                     "(SELECT descendant FROM folder_closure WHERE ancestor=? AND depth=?)", (fid, cut))
+    conn.execute("DELETE FROM folders WHERE id=?", (fid,))
+    queue_srt_gc(conn, after)
+    return {"deleted_folders": deleted}
+
+def op_bookmark_create(conn, args, after):
+    fid = args.get("folder_id")
+    url = args.get("url")
+    now = datetime.now(timezone.utc).isoformat()
+    _require_folder(conn, fid)
+
+    # Check if it's a simple media entry (no URL)
+    if args.get("entry_type", "youtube") == "media":
+        # Simple media entry - just title and date
+        cur = conn.execute("""INSERT INTO bookmarks 
             (folder_id, url, title, uploader, upload_date, duration_seconds, thumbnail_url, srt_file_path, entry_type, created_at) 
             VALUES (?,?,?,?,?,?,?,?,?,?)""", (
-            fid, url,
-            meta.get("title"),
-            meta.get("uploader"),
-            meta.get("upload_date"),
-            meta.get("duration_seconds"),
-            meta.get("thumbnail_url"),
-            None,  # srt_file_path
-            "youtube",
-            datetime.now(timezone.utc).isoformat()
+            fid, None, args.get("title"), None, args.get("date"), None, None, None, "media", now
         ))
-        conn.commit()
-        conn.close()
-        return jsonify(ok=True)
+        return {"id": cur.lastrowid}
 
+    # YouTube entry: insert now, metadata is filled in by the background queue
+    cur = conn.execute("""INSERT INTO bookmarks 
+        (folder_id, url, title, uploader, upload_date, duration_seconds, thumbnail_url, srt_file_path, entry_type, created_at, meta_status) 
+        VALUES (?,?,?,?,?,?,?,?,?,?,?)""", (
+        fid, url,
+        None, None, None, None, None,
+        None,  # srt_file_path
+        "youtube",
+        now,
+        "pending"
+    ))
+    bid = cur.lastrowid
+    after.append(lambda: meta_queue.submit(url, bid))
+    return {"id": bid, "meta_status": "pending"}
 
-@app.patch("/api/folder/<int:fid>")
-def rename_folder(fid):
-    data = request.json or {}
-    name = (data.get("name") or "").strip()
-    if not name:
-        return jsonify(error="Name is required."), 400
-    if fid == get_root():
-        return jsonify(error="Can't rename Root."), 400
-    conn = db()
-    cur = conn.execute("UPDATE folders SET name=? WHERE id=?", (name, fid))
-    conn.commit()
-    conn.close()
-    if cur.rowcount == 0:
-        return jsonify(error="Folder not found."), 404
-    return jsonify(ok=True)
+def op_bookmark_move(conn, args, after):
+    ids = _id_list(args)
+    folder_id = args.get("folder_id")
+    if not ids or not folder_id:
+        raise OpError("IDs and folder_id required.")
+    _require_folder(conn, folder_id)
+    moved = execute_in(conn, "UPDATE bookmarks SET folder_id=? WHERE id IN ({})", [folder_id], ids)
+    if "id" in args and not moved:
+        raise OpError("Bookmark not found.", 404)
+    return {"moved": moved}
 
-@app.delete("/api/folder/<int:fid>")
-def delete_folder(fid):
-    root_id = get_root()
-    if fid == root_id:
-        return jsonify(error="Can't delete Root."), 400
+def op_bookmark_delete(conn, args, after):
+    ids = _id_list(args)
+    if not ids:
+        raise OpError("No bookmark IDs provided.")
+    deleted = execute_in(conn, "DELETE FROM bookmarks WHERE id IN ({})", [], ids)
+    if "id" in args and not deleted:
+        raise OpError("Bookmark not found.", 404)
+    queue_srt_gc(conn, after)
+    return {"deleted": deleted}
+
+@app.post("/api/folder")
+def add_folder():
+    return run_op(op_folder_create, request.json or {})
+
+@app.post("/api/bookmark")
+def add_bookmark():
+    return run_op(op_bookmark_create, request.json or {})
 
-    # Ensure folder exists
+@app.get("/api/bookmark/<int:bid>/meta_status")
+def bookmark_meta_status(bid):
     conn = db()
-    exists = conn.execute("SELECT id FROM folders WHERE id=?", (fid,)).fetchone()
-    if not exists:
-        conn.close()
-        return jsonify(error="Folder not found."), 404
+    row = conn.execute("SELECT id, meta_status, meta_error, title FROM bookmarks WHERE id=?", (bid,)).fetchone()
+    conn.close()
+    if not row:
+        return jsonify(error="Bookmark not found."), 404
+    return jsonify(dict(row))
 
-    ids = get_all_descendant_folder_ids(fid)
+@app.get("/api/meta_queue")
+def meta_queue_status():
+    return jsonify(pending=meta_queue.pending(), stats=dict(meta_queue.stats),
+                   providers=meta_providers.stats())
 
-    # Delete bookmarks in this subtree
-    q1 = "DELETE FROM bookmarks WHERE folder_id IN (%s)" % ",".join(["?"] * len(ids))
-    conn.execute(q1, ids)
+@app.get("/api/meta_recheck")
+def meta_recheck_status():
+    """Re-check settings, totals and backlog (shared by all workers) plus this process's scheduler."""
+    now = time.time()
+    conn = db()
+    cfg = conn.execute("SELECT * FROM meta_recheck WHERE id=1").fetchone()
+    due = conn.execute("SELECT COUNT(*) FROM bookmarks WHERE url IS NOT NULL AND meta_next_check_at <= ?",
+                       (now,)).fetchone()[0]
+    failing = conn.execute("SELECT COUNT(*) FROM bookmarks WHERE meta_failures > 0").fetchone()[0]
+    conn.close()
+    settings = {k: cfg[k] for k in META_RECHECK_DEFAULTS}
+    settings["enabled"] = bool(settings["enabled"])
+    return jsonify(
+        settings=settings,
+        scanner={"owner": cfg["owner"], "lease_until": cfg["lease_until"], "active": cfg["lease_until"] > now},
+        last_scan_at=cfg["last_scan_at"], last_scan_due=cfg["last_scan_due"],
+        run_requested=bool(cfg["run_requested"]),
+        totals={k: cfg[k] for k in ("checked", "updated", "failed")},
+        backlog={"due": due, "failing": failing},
+        process={"owner": _recheck_owner(), "running": meta_rechecker.running, **meta_rechecker.stats},
+    )
 
-    # Delete folders in this subtree (children included)
-    q2 = "DELETE FROM folders WHERE id IN (%s)" % ",".join(["?"] * len(ids))
-    conn.execute(q2, ids)
+@app.patch("/api/meta_recheck")
+def update_meta_recheck():
+    """Change settings: enabled, interval_seconds, batch_size, rate_per_second, max_age_seconds."""
+    data = request.json or {}
+    updates = {}
+    for key in META_RECHECK_DEFAULTS:
+        if key not in data:
+            continue
+        value = data[key]
+        if key == "enabled":
+            if not isinstance(value, bool):
+                return jsonify(error="enabled must be true or false."), 400
+            updates[key] = int(value)
+            continue
+        try:
+            value = int(value) if key == "batch_size" else float(value)
+        except (TypeError, ValueError):
+            return jsonify(error=f"{key} must be a number."), 400
+        if value <= 0:
+            return jsonify(error=f"{key} must be positive."), 400
+        updates[key] = value
+    if not updates:
+        return jsonify(error="Nothing to update."), 400
+    conn = db()
+    conn.execute("UPDATE meta_recheck SET %s WHERE id=1" % ", ".join(f"{k}=?" for k in updates),
+                 list(updates.values()))
+    conn.commit()
+    conn.close()
+    meta_rechecker.wake()
+    return meta_recheck_status()
 
+@app.post("/api/meta_recheck/run")
+def run_meta_recheck():
+    """Scan now instead of waiting for the interval; {"ids": [...]} also makes those bookmarks due."""
+    data = request.get_json(silent=True) or {}
+    try:
+        ids = _id_list(data)
+    except OpError as e:
+        return jsonify(error=e.message), e.status
+    conn = db()
+    conn.execute("BEGIN IMMEDIATE")
+    queued = execute_in(conn, "UPDATE bookmarks SET meta_next_check_at=0 WHERE url IS NOT NULL AND id IN ({})",
+                        [], ids)
+    conn.execute("UPDATE meta_recheck SET run_requested=1 WHERE id=1")
     conn.commit()
     conn.close()
-    return jsonify(ok=True, deleted_folders=len(ids))
+    meta_rechecker.wake()
+    return jsonify(ok=True, queued=queued)
+
+
+@app.patch("/api/folder/<int:fid>")
+def rename_folder(fid):
+    return run_op(op_folder_rename, {**(request.json or {}), "id": fid})
+
+@app.delete("/api/folder/<int:fid>")
+def delete_folder(fid):
+    return run_op(op_folder_delete, {"id": fid})
 
 @app.patch("/api/bookmark/<int:bid>")
 def update_bookmark(bid):
     data = request.json or {}
-    conn = db()
-    bookmark = conn.execute("SELECT id FROM bookmarks WHERE id=?", (bid,)).fetchone()
-    if not bookmark:
+    if data.get("folder_id") is None:
+        conn = db()
+        found = conn.execute("SELECT id FROM bookmarks WHERE id=?", (bid,)).fetchone()
         conn.close()
-        return jsonify(error="Bookmark not found."), 404
-    folder_id = data.get("folder_id")
-    if folder_id is not None:
-        folder = conn.execute("SELECT id FROM folders WHERE id=?", (folder_id,)).fetchone()
-        if not folder:
-            conn.close()
-            return jsonify(error="Target folder not found."), 404
-        conn.execute("UPDATE bookmarks SET folder_id=? WHERE id=?", (folder_id, bid))
-    conn.commit()
-    conn.close()
-    return jsonify(ok=True)
+        return jsonify(ok=True) if found else (jsonify(error="Bookmark not found."), 404)
+    return run_op(op_bookmark_move, {"id": bid, "folder_id": data["folder_id"]})
 
 @app.post("/api/bookmarks/bulk_delete")
 def bulk_delete_bookmarks():
     data = request.json or {}
-    ids = data.get("ids", [])
-    if not ids:
-        return jsonify(error="No bookmark IDs provided."), 400
-    conn = db()
-    q = "DELETE FROM bookmarks WHERE id IN (%s)" % ",".join(["?"] * len(ids))
-    cur = conn.execute(q, ids)
-    conn.commit()
-    conn.close()
-    return jsonify(ok=True, deleted=cur.rowcount)
+    return run_op(op_bookmark_delete, {"ids": data.get("ids", [])})
 
-@app.post("/api/bookmarks/bulk_move")
-def bulk_move_bookmarks():
+BULK_IMPORT_MAX_PARALLELISM = 16
+
+@app.post("/api/bookmarks/bulk_import")
+def bulk_import_bookmarks():
     data = request.json or {}
-    ids = data.get("ids", [])
-    folder_id = data.get("folder_id")
-    if not ids or not folder_id:
-        return jsonify(error="IDs and folder_id required."), 400
+    fid = data.get("folder_id")
+    urls = [u.strip() for u in (data.get("urls") or []) if isinstance(u, str) and u.strip()]
+    playlist_url = (data.get("playlist_url") or "").strip()
+    try:
+        parallelism = int(data.get("parallelism") or 4)
+    except (TypeError, ValueError):
+        return jsonify(error="parallelism must be an integer."), 400
+    parallelism = max(1, min(parallelism, BULK_IMPORT_MAX_PARALLELISM))
+    if not fid:
+        return jsonify(error="folder_id required."), 400
     conn = db()
-    folder = conn.execute("SELECT id FROM folders WHERE id=?", (folder_id,)).fetchone()
+    folder = conn.execute("SELECT id FROM folders WHERE id=?", (fid,)).fetchone()
+    conn.close()
     if not folder:
-        conn.close()
         return jsonify(error="Target folder not found."), 404
-    q = "UPDATE bookmarks SET folder_id=? WHERE id IN (%s)" % ",".join(["?"] * len(ids))
-    conn.execute(q, [folder_id] + ids)
-    conn.commit()
+
+    started = time.perf_counter()
+    if playlist_url:
+        try:
+            urls.extend(yt_playlist_urls(playlist_url))
+        except Exception as e:
+            return jsonify(error=f"Couldn't expand playlist: {e}"), 400
+    # Keep the first occurrence of each URL, in order
+    urls = list(dict.fromkeys(urls))
+    if not urls:
+        return jsonify(error="No URLs provided."), 400
+
+    def fetch(url):
+        try:
+            return url, cached_yt_meta(url), None
+        except Exception as e:
+            return url, None, str(e) or e.__class__.__name__
+
+    with ThreadPoolExecutor(max_workers=min(parallelism, len(urls))) as pool:
+        fetched = list(pool.map(fetch, urls))
+    extract_secs = time.perf_counter() - started
+
+    now = datetime.now(timezone.utc).isoformat()
+    checked_at = time.time()
+    conn = db()
+    max_age = meta_max_age(conn)
+    rows = [(fid, url, meta.get("title"), meta.get("uploader"), meta.get("upload_date"),
+             meta.get("duration_seconds"), meta.get("thumbnail_url"), None, "youtube", now, checked_at,
+             next_check_at(checked_at, int(any(meta.get(k) is None for k in META_COMPLETE_FIELDS)), max_age))
+            for url, meta, err in fetched if meta is not None]
+    with conn:
+        conn.executemany("""INSERT INTO bookmarks 
+            (folder_id, url, title, uploader, upload_date, duration_seconds, thumbnail_url, srt_file_path, entry_type, created_at,
+             meta_checked_at, meta_next_check_at) 
+            VALUES (?,?,?,?,?,?,?,?,?,?,?,?)""", rows)
     conn.close()
-    return jsonify(ok=True)
+    total_secs = time.perf_counter() - started
+
+    results = [{"url": url, "ok": err is None, "title": meta.get("title") if meta else None, "error": err}
+               for url, meta, err in fetched]
+    return jsonify(
+        ok=True,
+        imported=len(rows),
+        failed=len(urls) - len(rows),
+        results=results,
+        stats={
+            "parallelism": parallelism,
+            "extract_seconds": round(extract_secs, 3),
+            "total_seconds": round(total_secs, 3),
+            "urls_per_second": round(len(urls) / total_secs, 2) if total_secs else None,
+        },
+    )
+
+@app.post("/api/bookmarks/bulk_move")
+def bulk_move_bookmarks():
+    data = request.json or {}
+    return run_op(op_bookmark_move, {"ids": data.get("ids", []), "folder_id": data.get("folder_id")})
 
 @app.get("/api/folders_flat")
 def folders_flat():
     """Return flat list of all folders with breadcrumbs for move-to picker."""
     conn = db()
-    rows = conn.execute("SELECT id, name, parent_id FROM folders").fetchall()
+    rows = conn.execute("SELECT id, name, path FROM folders").fetchall()
     conn.close()
-    folders_map = {r["id"]: dict(r) for r in rows}
-    result = []
-    for fid, f in folders_map.items():
-        parts = []
-        cur = fid
-        while cur and cur in folders_map:
-            parts.append(folders_map[cur]["name"])
-            cur = folders_map[cur]["parent_id"]
-        parts.reverse()
-        result.append({"id": fid, "name": f["name"], "breadcrumb": " > ".join(parts)})
-    return jsonify(result)
+    return jsonify([{"id": r["id"], "name": r["name"], "breadcrumb": r["path"]} for r in rows])
 
 @app.delete("/api/bookmark/<int:bid>")
 def delete_bookmark(bid):
-    conn = db()
-    cur = conn.execute("DELETE FROM bookmarks WHERE id=?", (bid,))
-    conn.commit()
-    conn.close()
-    if cur.rowcount == 0:
-        return jsonify(error="Bookmark not found."), 404
-    return jsonify(ok=True)
+    return run_op(op_bookmark_delete, {"id": bid})
 
 @app.post("/api/bookmark/<int:bid>/upload_srt")
 def upload_srt(bid):
@@ -481,43 +2009,51 @@ def upload_srt(bid):
         conn.close()
         return jsonify(error="Only .srt files are allowed."), 400
     
-    # Save the file with a unique name
-    filename = secure_filename(file.filename)
-    unique_filename = f"bookmark_{bid}_{filename}"
-    filepath = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-    
-    # Delete old SRT if exists
-    old_srt = conn.execute("SELECT srt_file_path FROM bookmarks WHERE id=?", (bid,)).fetchone()
-    if old_srt and old_srt['srt_file_path']:
-        old_path = os.path.join(APP_DIR, old_srt['srt_file_path'])
-        if os.path.exists(old_path):
-            os.remove(old_path)
-    
-    file.save(filepath)
-    
-    # Update database with relative path
-    relative_path = os.path.join("srt_uploads", unique_filename)
-    conn.execute("UPDATE bookmarks SET srt_file_path=? WHERE id=?", (relative_path, bid))
-    conn.commit()
-    conn.close()
-    
+    # Store the content once (deduplicated, compressed) and point the bookmark
+    # at it. Compressing, hashing and parsing the cues happen before the write
+    # lock is taken; the transaction only registers the blob and repoints.
+    staged = srt_store.stage(file.stream)
+    try:
+        file.stream.seek(0)
+        cues = list(srt_cue_rows(file.stream))
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute("SELECT srt_file_path FROM bookmarks WHERE id=?", (bid,)).fetchone()
+        if not row:
+            conn.rollback()
+            return jsonify(error="Bookmark not found."), 404
+        relative_path = register_srt(conn, staged)
+        conn.execute("UPDATE bookmarks SET srt_file_path=? WHERE id=?", (relative_path, bid))
+        index_srt_cues(conn, bid, srt_abspath(relative_path), cues)
+        release_srt(conn, row["srt_file_path"])
+        conn.commit()
+    finally:
+        srt_store.discard(staged[2])  # already moved into place unless something failed
+        conn.close()
+
     return jsonify(ok=True, srt_file_path=relative_path)
 
+def release_srt(conn, old_path):
+    """Clean up after a bookmark stops pointing at `old_path` (blob GC or legacy file)."""
+    if not old_path:
+        return
+    if srt_store.is_blob(old_path):
+        gc_srt_blobs(conn, [old_path])
+    elif os.path.exists(srt_abspath(old_path)):
+        os.remove(srt_abspath(old_path))
+
 @app.delete("/api/bookmark/<int:bid>/srt")
 def delete_srt(bid):
     conn = db()
+    conn.execute("BEGIN IMMEDIATE")
     bookmark = conn.execute("SELECT srt_file_path FROM bookmarks WHERE id=?", (bid,)).fetchone()
     
     if not bookmark:
         conn.close()
         return jsonify(error="Bookmark not found."), 404
     
-    if bookmark['srt_file_path']:
-        filepath = os.path.join(APP_DIR, bookmark['srt_file_path'])
-        if os.path.exists(filepath):
-            os.remove(filepath)
-    
     conn.execute("UPDATE bookmarks SET srt_file_path=NULL WHERE id=?", (bid,))
+    conn.execute("DELETE FROM srt_cues WHERE bookmark_id=?", (bid,))
+    release_srt(conn, bookmark['srt_file_path'])
     conn.commit()
     conn.close()
     
@@ -535,7 +2071,7 @@ def get_srt(bid):
     if not bookmark['srt_file_path']:
         return jsonify(error="No SRT file uploaded."), 404
     
-    filepath = os.path.join(APP_DIR, bookmark['srt_file_path'])
+    filepath = srt_abspath(bookmark['srt_file_path'])
     
     if not os.path.exists(filepath):
         return jsonify(error="SRT file not found."), 404
@@ -546,82 +2082,311 @@ def get_srt(bid):
     safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).strip()
     download_name = f"{safe_title}.srt"
     
-    return send_file(filepath, as_attachment=True, download_name=download_name)
+    if not srt_store.is_blob(bookmark['srt_file_path']):
+        return send_file(filepath, as_attachment=True, download_name=download_name)
+
+    # Blob names are content hashes, so they make stable ETags
+    etag = os.path.basename(filepath).split(".")[0]
+    if "gzip" in request.accept_encodings:
+        # Hand the stored gzip stream over as-is and let the client inflate it
+        resp = send_file(filepath, mimetype="application/x-subrip", as_attachment=True,
+                         download_name=download_name, etag=etag)
+        resp.headers["Content-Encoding"] = "gzip"
+    else:
+        resp = send_file(srt.open_srt(filepath), mimetype="application/x-subrip", as_attachment=True,
+                         download_name=download_name, etag=etag)
+    resp.vary.add("Accept-Encoding")
+    return resp
+
+SRT_CUES_MAX = 1000
+
+@app.get("/api/bookmark/<int:bid>/srt/cues")
+def get_srt_cues(bid):
+    conn = db()
+    bookmark = conn.execute("SELECT srt_file_path FROM bookmarks WHERE id=?", (bid,)).fetchone()
+    conn.close()
+
+    if not bookmark:
+        return jsonify(error="Bookmark not found."), 404
+    if not bookmark['srt_file_path']:
+        return jsonify(error="No SRT file uploaded."), 404
+    filepath = srt_abspath(bookmark['srt_file_path'])
+    if not os.path.exists(filepath):
+        return jsonify(error="SRT file not found."), 404
+
+    try:
+        from_ms = srt.parse_time_arg(request.args.get("from")) or 0
+        to_ms = srt.parse_time_arg(request.args.get("to"))
+    except (ValueError, OverflowError):
+        return jsonify(error="from/to must be seconds or HH:MM:SS."), 400
+    limit = max(1, min(request.args.get("limit", SRT_CUES_MAX, type=int), SRT_CUES_MAX))
+
+    index = srt.cue_index(filepath)
+    cues = [{"index": i, "start_ms": c.start_ms, "end_ms": c.end_ms,
+             "start": srt.format_timestamp(c.start_ms), "text": c.text}
+            for i, c in index.read(from_ms, to_ms if to_ms is not None else 2 ** 62, limit)]
+    return jsonify(bookmark_id=bid, from_ms=from_ms, to_ms=to_ms, total_cues=len(index), cues=cues)
+
+## ── Library search ──
+
+SEARCH_MAX_RESULTS = 100
+# Snippet highlight markers; the UI escapes the snippet and swaps these for <mark>
+SNIPPET_OPEN, SNIPPET_CLOSE = "\x02", "\x03"
+
+def fts_match_query(text):
+    """Turn free text into an FTS5 query: every word must match, as a prefix."""
+    terms = re.findall(r"\w+", text or "")
+    return " ".join(f'"{t}"*' for t in terms)
+
+def substring_match_queries(text):
+    """(trigram query, word-prefix query) for text; either is '' when it has no such words.
+
+    Words of three or more characters go to the trigram query and match
+    anywhere; shorter ones, which a trigram index can't look up, match as
+    word prefixes.
+    """
+    words = re.findall(r"\w+", text or "")
+    long_words = [w for w in words if len(w) >= 3]
+    short_words = [w for w in words if len(w) < 3]
+    return " ".join(f'"{w}"' for w in long_words), fts_match_query(" ".join(short_words))
+
+def ranked_match(fts, trigram, text):
+    """(table, condition, args) for ranking search hits of text in an FTS table pair.
+
+    The table is the one snippet() and bm25() should read: the trigram table
+    when there are long words, with short words as an extra rowid filter.
+    """
+    substring, prefix = substring_match_queries(text)
+    if not substring:
+        return fts, f"{fts} MATCH ?", [prefix]
+    if not prefix:
+        return trigram, f"{trigram} MATCH ?", [substring]
+    return (trigram, f"{trigram} MATCH ? AND {trigram}.rowid IN (SELECT rowid FROM {fts} WHERE {fts} MATCH ?)",
+            [substring, prefix])
+
+def jump_url(url, ms):
+    if not url:
+        return None
+    return f"{url}{'&' if '?' in url else '?'}t={int(ms) // 1000}s"
+
+@app.get("/api/search")
+def api_search():
+    match = fts_match_query(request.args.get("q"))
+    if not match:
+        return jsonify(query="", hits=[])
+    limit = max(1, min(request.args.get("limit", 30, type=int), SEARCH_MAX_RESULTS))
+    kinds = set((request.args.get("kinds") or "bookmark,media,cue").split(","))
+    mark = (SNIPPET_OPEN, SNIPPET_CLOSE)
+    hits = []
+    conn = db()
+    if "bookmark" in kinds:
+        t, cond, args = ranked_match("bookmarks_fts", "bookmarks_trigram", request.args.get("q"))
+        rows = conn.execute(f"""SELECT b.id, b.title, b.uploader, b.url, b.folder_id, f.path AS folder_breadcrumb,
+                snippet({t}, -1, ?, ?, '…', 12) AS snippet, bm25({t}, 10.0, 2.0) AS rank
+            FROM {t} JOIN bookmarks b ON b.id = {t}.rowid
+            LEFT JOIN folders f ON f.id = b.folder_id
+            WHERE {cond} ORDER BY rank LIMIT ?""", [*mark, *args, limit]).fetchall()
+        hits += [dict(r, kind="bookmark") for r in rows]
+    if "media" in kinds:
+        t, cond, args = ranked_match("media_log_fts", "media_log_trigram", request.args.get("q"))
+        rows = conn.execute(f"""SELECT m.id, m.title, c.name AS category, m.status, m.progress,
+                snippet({t}, -1, ?, ?, '…', 12) AS snippet, bm25({t}, 10.0, 2.0) AS rank
+            FROM {t} JOIN media_log m ON m.id = {t}.rowid
+            JOIN media_categories c ON c.id = m.category_id
+            WHERE {cond} ORDER BY rank LIMIT ?""", [*mark, *args, limit]).fetchall()
+        hits += [dict(r, kind="media") for r in rows]
+    if "cue" in kinds:
+        rows = conn.execute("""SELECT c.bookmark_id, c.start_ms, c.end_ms, b.title, b.url, b.folder_id,
+                snippet(srt_cues_fts, 0, ?, ?, '…', 16) AS snippet, bm25(srt_cues_fts) AS rank
+            FROM srt_cues_fts JOIN srt_cues c ON c.id = srt_cues_fts.rowid
+            JOIN bookmarks b ON b.id = c.bookmark_id
+            WHERE srt_cues_fts MATCH ? ORDER BY rank LIMIT ?""", mark + (match, limit)).fetchall()
+        for r in rows:
+            d = dict(r, kind="cue")
+            d["timestamp"] = srt.format_timestamp(r["start_ms"])
+            d["jump_url"] = jump_url(r["url"], r["start_ms"])
+            hits.append(d)
+    conn.close()
+    hits.sort(key=lambda h: h["rank"])
+    return jsonify(query=match, hits=hits[:limit])
 
 ## ── Media Log API ──
 
 MEDIA_LOG_STATUSES = {"currently", "completed", "plan_to_watch"}
 
+# Group order of the status-grouped views, as the UI's group headers show it
+MEDIA_LOG_STATUS_ORDER = ("currently", "completed", "plan_to_watch")
+MEDIA_LOG_PAGE_MAX = 500
+# sort option (matches #mlSortSelect in the UI) -> title direction within each group
+MEDIA_LOG_SORTS = {"default": "ASC", "title_asc": "ASC", "title_desc": "DESC"}
+
+def media_log_search_sql(text):
+    """SQL condition on media_log m matching every word of text in the title or progress.
+
+    Words of three or more characters match anywhere (trigram index), shorter
+    ones as word prefixes. Returns (sql, args), or None when there are no words.
+    """
+    substring, prefix = substring_match_queries(text)
+    if not (substring or prefix):
+        return None
+    sql, args = [], []
+    if substring:
+        sql.append("m.id IN (SELECT rowid FROM media_log_trigram WHERE media_log_trigram MATCH ?)")
+        args.append(substring)
+    if prefix:
+        sql.append("m.id IN (SELECT rowid FROM media_log_fts WHERE media_log_fts MATCH ?)")
+        args.append(prefix)
+    return " AND ".join(sql), args
+
 @app.get("/api/media_log")
 def get_media_log():
-    category = (request.args.get("category") or "").strip()
-    conn = db()
-    if category == "__all__":
-        rows = conn.execute("SELECT * FROM media_log ORDER BY title ASC").fetchall()
-    elif category == "__currently__":
-        rows = conn.execute("SELECT * FROM media_log WHERE status='currently' ORDER BY category, title ASC").fetchall()
-    elif category:
-        rows = conn.execute(
-            "SELECT * FROM media_log WHERE category=? ORDER BY CASE WHEN status='currently' THEN 0 ELSE 1 END, status, title ASC",
-            (category,)
-        ).fetchall()
+    """One media log view with ?status=, ?q= and ?sort= applied.
+
+    ?category= is a category name, __all__ or __currently__. Entries come
+    grouped by status (by category id in __currently__) and in title order
+    within each group. With ?limit= the response is a keyset page {items,
+    next_cursor, total}; without it, the whole list as a plain array.
+    """
+    category = (request.args.get("category") or "").strip() or "__all__"
+    direction = MEDIA_LOG_SORTS.get(request.args.get("sort") or "default", "ASC")
+    wanted = set((request.args.get("status") or ",".join(MEDIA_LOG_STATUS_ORDER)).split(","))
+    statuses = [s for s in MEDIA_LOG_STATUS_ORDER if s in wanted]
+    where, args = [], []
+    by_name = "(SELECT MIN(id) FROM media_categories WHERE name=?)"
+    if category == "__currently__":
+        group_col, statuses = "category_id", [s for s in statuses if s == "currently"]
+        where.append("m.status='currently'")
     else:
-        rows = conn.execute("SELECT * FROM media_log ORDER BY category, status, title ASC").fetchall()
+        group_col = "status"
+        if category != "__all__":
+            where.append(f"m.category_id={by_name}")
+            args.append(category)
+    search = media_log_search_sql(request.args.get("q"))
+    if search:
+        where.append(search[0])
+        args += search[1]
+
+    limit = request.args.get("limit", type=int)
+    if limit:
+        limit = max(1, min(limit, MEDIA_LOG_PAGE_MAX))
+    after = None
+    cursor = request.args.get("cursor")
+    if cursor:
+        after = decode_cursor(cursor)
+        if (after is None or len(after) != 3 or not isinstance(after[1], str) or not isinstance(after[2], int)
+                or not (after[0] in statuses if group_col == "status" else isinstance(after[0], int))):
+            return jsonify(error="Invalid cursor."), 400
+
+    conn = db()
+
+    def next_group(group):
+        if group_col == "status":
+            i = statuses.index(group) + 1 if group is not None else 0
+            return statuses[i] if i < len(statuses) else None
+        if not statuses:
+            return None
+        row = conn.execute("SELECT MIN(category_id) AS c FROM media_log WHERE status='currently' AND category_id > ?",
+                           (0 if group is None else group,)).fetchone()
+        return row["c"]
+
+    # Walk the groups in order, each one a range scan in title order, until
+    # the page (plus one row, to know whether there is more) is full
+    op = "<" if direction == "DESC" else ">"
+    base = ("SELECT m.*, (SELECT name FROM media_categories c WHERE c.id = m.category_id) AS category "
+            "FROM media_log m WHERE " + " AND ".join(where + [f"m.{group_col}=?"]))
+    order_by = f" ORDER BY m.title COLLATE NOCASE {direction}, m.id {direction}"
+    rows = []
+    group = after[0] if after else next_group(None)
+    while group is not None and (not limit or len(rows) <= limit):
+        sql, group_args = base, args + [group]
+        if after:
+            # The plain title bound is what lets SQLite seek to the cursor; a
+            # row value that includes the rowid only filters
+            sql += f" AND m.title COLLATE NOCASE {op}= ? AND (m.title COLLATE NOCASE, m.id) {op} (?, ?)"
+            group_args += [after[1]] + after[1:]
+            after = None
+        sql += order_by
+        if limit:
+            sql += " LIMIT ?"
+            group_args.append(limit + 1 - len(rows))
+        rows += conn.execute(sql, group_args).fetchall()
+        group = next_group(group)
+
+    if not limit:
+        conn.close()
+        return jsonify([dict(r) for r in rows])
+
+    total = None
+    if not cursor:
+        marks = ",".join("?" * len(statuses)) or "NULL"
+        if search:
+            total = conn.execute("SELECT COUNT(*) AS c FROM media_log m WHERE "
+                                 + " AND ".join(where + [f"m.status IN ({marks})"]),
+                                 args + statuses).fetchone()["c"]
+        else:
+            # Without a search the trigger-maintained media_stats has the count
+            sql = f"SELECT COALESCE(SUM(entries), 0) AS c FROM media_stats m WHERE m.status IN ({marks})"
+            stats_args = list(statuses)
+            if category not in ("__all__", "__currently__"):
+                sql += f" AND m.category_id={by_name}"
+                stats_args.append(category)
+            total = conn.execute(sql, stats_args).fetchone()["c"]
     conn.close()
-    return jsonify([dict(r) for r in rows])
 
-@app.post("/api/media_log")
-def add_media_log():
-    data = request.json or {}
-    category = (data.get("category") or "").strip()
-    title = (data.get("title") or "").strip()
-    progress = (data.get("progress") or "").strip()
-    status = (data.get("status") or "plan_to_watch").strip()
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor([last[group_col], last["title"], last["id"]])
+    return jsonify(items=[dict(r) for r in rows[:limit]], next_cursor=next_cursor, total=total)
+
+def op_media_log_create(conn, args, after):
+    category = (args.get("category") or "").strip()
+    title = (args.get("title") or "").strip()
+    progress = (args.get("progress") or "").strip()
+    status = (args.get("status") or "plan_to_watch").strip()
     if not title:
-        return jsonify(error="Title is required."), 400
+        raise OpError("Title is required.")
     if status not in MEDIA_LOG_STATUSES:
-        return jsonify(error="Invalid status."), 400
+        raise OpError("Invalid status.")
     # Validate category against DB
-    conn = db()
-    cat_exists = conn.execute("SELECT id FROM media_categories WHERE name=?", (category,)).fetchone()
-    if not cat_exists:
-        conn.close()
-        return jsonify(error="Invalid category."), 400
-    conn.execute("INSERT INTO media_log (category, title, progress, status, created_at) VALUES (?,?,?,?,?)",
-                 (category, title, progress, status, datetime.now(timezone.utc).isoformat()))
-    conn.commit()
-    conn.close()
-    return jsonify(ok=True)
+    cat = conn.execute("SELECT MIN(id) AS id FROM media_categories WHERE name=?", (category,)).fetchone()
+    if cat["id"] is None:
+        raise OpError("Invalid category.")
+    cur = conn.execute("INSERT INTO media_log (category_id, title, progress, status, created_at) VALUES (?,?,?,?,?)",
+                       (cat["id"], title, progress, status, datetime.now(timezone.utc).isoformat()))
+    return {"id": cur.lastrowid}
 
-@app.patch("/api/media_log/<int:mid>")
-def update_media_log(mid):
-    data = request.json or {}
-    conn = db()
+def op_media_log_update(conn, args, after):
+    mid = args.get("id")
     row = conn.execute("SELECT * FROM media_log WHERE id=?", (mid,)).fetchone()
     if not row:
-        conn.close()
-        return jsonify(error="Entry not found."), 404
-    title = (data.get("title") or "").strip() or row["title"]
-    progress = data.get("progress") if "progress" in data else row["progress"]
-    status = (data.get("status") or "").strip() or row["status"]
+        raise OpError("Entry not found.", 404)
+    title = (args.get("title") or "").strip() or row["title"]
+    progress = args.get("progress") if "progress" in args else row["progress"]
+    status = (args.get("status") or "").strip() or row["status"]
     if status not in MEDIA_LOG_STATUSES:
-        conn.close()
-        return jsonify(error="Invalid status."), 400
+        raise OpError("Invalid status.")
     conn.execute("UPDATE media_log SET title=?, progress=?, status=? WHERE id=?",
                  (title, progress, status, mid))
-    conn.commit()
-    conn.close()
-    return jsonify(ok=True)
+    return {}
+
+def op_media_log_delete(conn, args, after):
+    cur = conn.execute("DELETE FROM media_log WHERE id=?", (args.get("id"),))
+    if cur.rowcount == 0:
+        raise OpError("Entry not found.", 404)
+    return {}
+
+@app.post("/api/media_log")
+def add_media_log():
+    return run_op(op_media_log_create, request.json or {})
+
+@app.patch("/api/media_log/<int:mid>")
+def update_media_log(mid):
+    return run_op(op_media_log_update, {**(request.json or {}), "id": mid})
 
 @app.delete("/api/media_log/<int:mid>")
 def delete_media_log(mid):
-    conn = db()
-    cur = conn.execute("DELETE FROM media_log WHERE id=?", (mid,))
-    conn.commit()
-    conn.close()
-    if cur.rowcount == 0:
-        return jsonify(error="Entry not found."), 404
-    return jsonify(ok=True)
+    return run_op(op_media_log_delete, {"id": mid})
 
 ## ── Media Categories API ──
 
@@ -632,71 +2397,422 @@ def get_media_categories():
     conn.close()
     return jsonify([dict(r) for r in rows])
 
-@app.post("/api/media_categories")
-def add_media_category():
-    data = request.json or {}
-    name = (data.get("name") or "").strip()
+def _require_category(conn, cid):
+    cat = conn.execute("SELECT * FROM media_categories WHERE id=?", (cid,)).fetchone()
+    if not cat:
+        raise OpError("Category not found.", 404)
+    return cat
+
+def op_category_create(conn, args, after):
+    name = (args.get("name") or "").strip()
     if not name:
-        return jsonify(error="Name is required."), 400
-    conn = db()
+        raise OpError("Name is required.")
     row = conn.execute("SELECT MAX(sort_order) as m FROM media_categories").fetchone()
     max_order = (row["m"] or 0) + 1
-    conn.execute("INSERT INTO media_categories (name, sort_order) VALUES (?, ?)", (name, max_order))
-    conn.commit()
-    conn.close()
-    return jsonify(ok=True)
+    cur = conn.execute("INSERT INTO media_categories (name, sort_order) VALUES (?, ?)", (name, max_order))
+    return {"id": cur.lastrowid}
 
-@app.patch("/api/media_categories/<int:cid>")
-def update_media_category(cid):
-    data = request.json or {}
-    conn = db()
-    cat = conn.execute("SELECT * FROM media_categories WHERE id=?", (cid,)).fetchone()
-    if not cat:
-        conn.close()
-        return jsonify(error="Category not found."), 404
-    name = (data.get("name") or "").strip()
+def op_category_rename(conn, args, after):
+    cat = _require_category(conn, args.get("id"))
+    name = (args.get("name") or "").strip()
     if name and name != cat["name"]:
-        conn.execute("UPDATE media_log SET category=? WHERE category=?", (name, cat["name"]))
-        conn.execute("UPDATE media_categories SET name=? WHERE id=?", (name, cid))
-        conn.commit()
-    conn.close()
-    return jsonify(ok=True)
+        conn.execute("UPDATE media_categories SET name=? WHERE id=?", (name, cat["id"]))
+    return {}
 
-@app.delete("/api/media_categories/<int:cid>")
-def delete_media_category(cid):
-    conn = db()
-    cat = conn.execute("SELECT name FROM media_categories WHERE id=?", (cid,)).fetchone()
-    if not cat:
-        conn.close()
-        return jsonify(error="Category not found."), 404
-    conn.execute("DELETE FROM media_log WHERE category=?", (cat["name"],))
-    conn.execute("DELETE FROM media_categories WHERE id=?", (cid,))
-    conn.commit()
-    conn.close()
-    return jsonify(ok=True)
+def op_category_delete(conn, args, after):
+    cat = _require_category(conn, args.get("id"))
+    # its media_log entries go too (ON DELETE CASCADE)
+    conn.execute("DELETE FROM media_categories WHERE id=?", (cat["id"],))
+    return {}
 
-@app.post("/api/media_categories/<int:cid>/reorder")
-def reorder_media_category(cid):
-    data = request.json or {}
-    direction = data.get("direction")
+def op_category_reorder(conn, args, after):
+    cid = args.get("id")
+    direction = args.get("direction")
     if direction not in ("up", "down"):
-        return jsonify(error="Invalid direction."), 400
-    conn = db()
+        raise OpError("Invalid direction.")
     cats = [dict(c) for c in conn.execute("SELECT * FROM media_categories ORDER BY sort_order ASC").fetchall()]
     idx = next((i for i, c in enumerate(cats) if c["id"] == cid), None)
     if idx is None:
-        conn.close()
-        return jsonify(error="Category not found."), 404
+        raise OpError("Category not found.", 404)
     swap_idx = idx - 1 if direction == "up" else idx + 1
     if swap_idx < 0 or swap_idx >= len(cats):
-        conn.close()
-        return jsonify(ok=True)
+        return {}
     conn.execute("UPDATE media_categories SET sort_order=? WHERE id=?", (cats[swap_idx]["sort_order"], cid))
     conn.execute("UPDATE media_categories SET sort_order=? WHERE id=?", (cats[idx]["sort_order"], cats[swap_idx]["id"]))
-    conn.commit()
+    return {}
+
+@app.post("/api/media_categories")
+def add_media_category():
+    return run_op(op_category_create, request.json or {})
+
+@app.patch("/api/media_categories/<int:cid>")
+def update_media_category(cid):
+    return run_op(op_category_rename, {**(request.json or {}), "id": cid})
+
+@app.delete("/api/media_categories/<int:cid>")
+def delete_media_category(cid):
+    return run_op(op_category_delete, {"id": cid})
+
+@app.post("/api/media_categories/<int:cid>/reorder")
+def reorder_media_category(cid):
+    return run_op(op_category_reorder, {**(request.json or {}), "id": cid})
+
+## ── Batch mutations ──
+
+BATCH_OPS = {
+    "folder.create": op_folder_create,
+    "folder.rename": op_folder_rename,
+    "folder.delete": op_folder_delete,
+    "bookmark.create": op_bookmark_create,
+    "bookmark.move": op_bookmark_move,
+    "bookmark.delete": op_bookmark_delete,
+    "media_log.create": op_media_log_create,
+    "media_log.update": op_media_log_update,
+    "media_log.delete": op_media_log_delete,
+    "category.create": op_category_create,
+    "category.rename": op_category_rename,
+    "category.delete": op_category_delete,
+    "category.reorder": op_category_reorder,
+}
+BATCH_MAX_OPS = 1000
+_BATCH_REF_RE = re.compile(r"^\$(\d+)\.(\w+)$")
+
+def _resolve_refs(value, results):
+    """Replace "$<index>.<field>" strings with a field of an earlier op's result."""
+    if isinstance(value, list):
+        return [_resolve_refs(v, results) for v in value]
+    m = _BATCH_REF_RE.match(value) if isinstance(value, str) else None
+    if not m:
+        return value
+    i, field = int(m.group(1)), m.group(2)
+    if i >= len(results) or field not in results[i]:
+        raise OpError(f"Unresolved reference {value}.")
+    return results[i][field]
+
+@app.post("/api/batch")
+def api_batch():
+    """Run an ordered list of ops in one transaction: all apply or none do.
+
+    Body: {"ops": [{"op": "folder.create", "name": "Clips", "parent_id": 1},
+                   {"op": "bookmark.move", "ids": [4, 5], "folder_id": "$0.id"}]}
+    Later ops can refer to earlier results with "$<index>.<field>". On failure
+    nothing is returned but the error and the failing op's index: ids handed
+    out before the rollback no longer exist and SQLite will reuse them.
+    """
+    ops = (request.json or {}).get("ops")
+    if not isinstance(ops, list) or not ops:
+        return jsonify(error="ops must be a non-empty list."), 400
+    if len(ops) > BATCH_MAX_OPS:
+        return jsonify(error=f"At most {BATCH_MAX_OPS} ops per batch."), 400
+
+    results = []
+    after = []
+    conn = db()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        for spec in ops:
+            if not isinstance(spec, dict) or spec.get("op") not in BATCH_OPS:
+                raise OpError(f"Unknown op {spec.get('op') if isinstance(spec, dict) else spec!r}.")
+            args = {k: _resolve_refs(v, results) for k, v in spec.items() if k != "op"}
+            results.append({"op": spec["op"], **BATCH_OPS[spec["op"]](conn, args, after)})
+        conn.commit()
+    except OpError as e:
+        conn.rollback()
+        return jsonify(ok=False, error=e.message, failed_index=len(results)), e.status
+    finally:
+        conn.close()
+    for fn in after:
+        fn()
+    return jsonify(ok=True, results=results)
+
+## ── Stats ──
+
+STATS_UPLOADERS_DEFAULT = 20
+STATS_UPLOADERS_MAX = 500
+
+@app.get("/api/stats")
+def api_stats():
+    """Counts and watch time from the trigger-maintained summary tables (see STATS_SCHEMA).
+
+    ?folder_id= (default Root) picks the folder whose subtree totals and
+    per-child breakdown are returned; ?uploaders= caps the uploader list.
+    """
+    try:
+        folder_id = int(request.args.get("folder_id") or get_root())
+        limit = max(0, min(int(request.args.get("uploaders") or STATS_UPLOADERS_DEFAULT), STATS_UPLOADERS_MAX))
+    except ValueError:
+        return jsonify(error="folder_id and uploaders must be integers."), 400
+    totals = "s.bookmarks, s.with_duration, s.duration_seconds"
+    conn = db()
+    folder = conn.execute(f"""SELECT f.id, f.name, f.path, {totals} FROM folders f
+        JOIN folder_stats s ON s.folder_id = f.id WHERE f.id=?""", (folder_id,)).fetchone()
+    if not folder:
+        conn.close()
+        return jsonify(error="Folder not found."), 404
+    children = conn.execute(f"""SELECT f.id, f.name, {totals} FROM folders f
+        JOIN folder_stats s ON s.folder_id = f.id WHERE f.parent_id=? ORDER BY f.name""", (folder_id,)).fetchall()
+    uploaders = conn.execute("SELECT uploader, bookmarks, duration_seconds FROM uploader_stats "
+                             "ORDER BY bookmarks DESC, uploader LIMIT ?", (limit,)).fetchall()
+    uploaders_total = conn.execute("SELECT COUNT(*) FROM uploader_stats").fetchone()[0]
+    media_rows = conn.execute("""SELECT c.name AS category, m.status, m.entries FROM media_stats m
+        JOIN media_categories c ON c.id = m.category_id ORDER BY c.sort_order, c.id, m.status""").fetchall()
     conn.close()
-    return jsonify(ok=True)
+
+    media = {}
+    for r in media_rows:
+        cat = media.setdefault(r["category"], {"category": r["category"], "entries": 0, "by_status": {}})
+        cat["entries"] += r["entries"]
+        cat["by_status"][r["status"]] = r["entries"]
+    return jsonify(
+        folder=dict(folder),
+        children=[dict(r) for r in children],
+        uploaders=[dict(r) for r in uploaders],
+        uploaders_total=uploaders_total,
+        media=list(media.values()),
+        media_total=sum(c["entries"] for c in media.values()),
+    )
+
+## ── Export / import ──
+# /api/export streams the library as NDJSON, one record per line: a header,
+# then categories, folders (parents before children), subtitle blobs (stored
+# gzip bytes, base64), bookmarks (pointing at their subtitle by digest) and
+# media log entries, and an "end" trailer with the counts. It is generated row
+# by row inside one read transaction, so it is consistent and uses constant
+# memory without blocking writers. /api/import reads the same stream back.
+#
+# /api/export?format=snapshot is a full backup instead: a tar of a backup-API
+# copy of vodmarks.db plus every subtitle blob it references, to be unpacked
+# over the app directory while the server is stopped.
+
+EXPORT_FORMAT = "vodmarks-export"
+EXPORT_VERSION = 1
+IMPORT_BATCH_ROWS = 2000    # records per import transaction
+IMPORT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+class VODMarksRequest(Request):
+    # MAX_CONTENT_LENGTH guards ordinary uploads; an import is read as a stream
+    @property
+    def max_content_length(self):
+        if self.endpoint == "import_library":
+            return IMPORT_MAX_BYTES
+        return super().max_content_length
+
+app.request_class = VODMarksRequest
+
+def export_records(conn):
+    """Yield the library as export records; run inside a read transaction for a consistent copy."""
+    yield {"type": "header", "format": EXPORT_FORMAT, "version": EXPORT_VERSION,
+           "schema_version": schema.version(conn), "exported_at": datetime.now(timezone.utc).isoformat()}
+    counts = {"category": 0, "folder": 0, "srt": 0, "bookmark": 0, "media_log": 0}
+    for r in conn.execute("SELECT name, sort_order FROM media_categories ORDER BY sort_order, id"):
+        counts["category"] += 1
+        yield {"type": "category", "name": r["name"], "sort_order": r["sort_order"]}
+    # Ancestor count orders every folder after its parent
+    for r in conn.execute("""SELECT f.id, f.name, f.parent_id, f.created_at FROM folders f
+            JOIN folder_closure c ON c.descendant = f.id GROUP BY f.id ORDER BY COUNT(*), f.id"""):
+        counts["folder"] += 1
+        yield {"type": "folder", **dict(r)}
+    for r in conn.execute("SELECT digest, size FROM srt_blobs WHERE refs > 0 ORDER BY digest"):
+        try:
+            with open(srt_store.abspath(r["digest"]), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            continue
+        counts["srt"] += 1
+        yield {"type": "srt", "digest": r["digest"], "size": r["size"],
+               "gzip_base64": base64.b64encode(data).decode("ascii")}
+    for r in conn.execute("""SELECT b.id, b.folder_id, b.url, b.title, b.uploader, b.upload_date,
+            b.duration_seconds, b.thumbnail_url, b.entry_type, b.created_at, b.meta_status, b.meta_error,
+            s.digest AS srt FROM bookmarks b LEFT JOIN srt_blobs s ON s.path = b.srt_file_path ORDER BY b.id"""):
+        counts["bookmark"] += 1
+        yield {"type": "bookmark", **dict(r)}
+    for r in conn.execute("""SELECT c.name AS category, m.title, m.progress, m.status, m.created_at
+            FROM media_log m JOIN media_categories c ON c.id = m.category_id ORDER BY m.id"""):
+        counts["media_log"] += 1
+        yield {"type": "media_log", **dict(r)}
+    yield {"type": "end", "counts": counts}
+
+def export_ndjson():
+    """NDJSON export chunks; holds one pooled connection (and read snapshot) until exhausted or closed."""
+    conn = db()
+    try:
+        conn.execute("BEGIN")
+        yield from ndjson_chunks(export_records(conn))
+    finally:
+        conn.rollback()
+        conn.close()
+
+def export_snapshot():
+    """Tar chunks of a backup-API copy of the database plus the subtitle blobs it references."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(DB_PATH), prefix=".snapshot-", suffix=".db")
+    os.close(fd)
+    try:
+        snapshot_db(DB_PATH, tmp)
+        # Blobs are listed from the copy, so they match its rows exactly
+        snap = sqlite3.connect(tmp)
+        paths = [r[0] for r in snap.execute("SELECT path FROM srt_blobs WHERE refs > 0 ORDER BY path")]
+        snap.close()
+        members = [(os.path.basename(DB_PATH), tmp)] + [(p, srt_abspath(p)) for p in paths]
+        yield from tar_stream(members)
+    finally:
+        os.remove(tmp)
+
+def load_library(stream, folder_id):
+    """Load an NDJSON export under `folder_id`; returns counts of what was added.
+
+    Everything is added alongside the existing library: the export's Root
+    folder maps onto `folder_id`, folders and bookmarks get new ids, and
+    categories are matched by name. Records are written IMPORT_BATCH_ROWS at
+    a time, each batch in its own transaction so writers aren't locked out
+    for the whole load. On malformed input raises LibraryFormatError, whose
+    `imported` holds the counts of the batches already committed.
+    """
+    counts = {"category": 0, "folder": 0, "srt": 0, "bookmark": 0, "media_log": 0}
+    committed = dict(counts)
+    folders = {}        # exported folder id -> local id
+    srt_paths = {}      # digest -> stored relative path
+    categories = None
+    pending_meta = []
+    seen_header = seen_end = False
+    in_batch = 0
+    conn = db()
+
+    def commit():
+        nonlocal in_batch
+        if in_batch:
+            conn.commit()
+            in_batch = 0
+            committed.update(counts)
+        for url, bid in pending_meta:
+            meta_queue.submit(url, bid)
+        pending_meta.clear()
+
+    try:
+        if not conn.execute("SELECT id FROM folders WHERE id=?", (folder_id,)).fetchone():
+            raise OpError("Target folder not found.", 404)
+        categories = {r["name"]: r["id"] for r in conn.execute("SELECT id, name FROM media_categories ORDER BY id DESC")}
+        for n, rec in ndjson_records(stream):
+            kind = rec["type"]
+            if not seen_header:
+                if kind != "header" or rec.get("format") != EXPORT_FORMAT:
+                    raise LibraryFormatError(n, "not a VODMarks export")
+                if not isinstance(rec.get("version"), int) or rec["version"] > EXPORT_VERSION:
+                    raise LibraryFormatError(n, f"unsupported export version {rec.get('version')!r}")
+                seen_header = True
+                continue
+            if seen_end:
+                raise LibraryFormatError(n, "data after the end record")
+            if kind == "end":
+                seen_end = True
+                continue
+            if not in_batch:
+                conn.execute("BEGIN IMMEDIATE")
+            try:
+                added = _import_record(conn, kind, rec, folders, srt_paths, categories, pending_meta, folder_id)
+            except (KeyError, TypeError, ValueError, binascii.Error) as e:
+                raise LibraryFormatError(n, f"bad {kind} record ({e.__class__.__name__}: {e})")
+            except LibraryFormatError as e:
+                raise LibraryFormatError(n, e.message)
+            counts[kind] += added
+            in_batch += 1
+            if in_batch >= IMPORT_BATCH_ROWS:
+                commit()
+        commit()
+        if not seen_header:
+            raise LibraryFormatError(1, "empty import")
+        if not seen_end:
+            raise LibraryFormatError(n, "export is truncated (no end record)")
+    except LibraryFormatError as e:
+        e.imported = committed
+        raise
+    finally:
+        conn.close()
+    return counts
+
+def _import_record(conn, kind, rec, folders, srt_paths, categories, pending_meta, folder_id):
+    """Write one record; returns whether it added a row (existing categories and Root don't)."""
+    if kind == "category":
+        name = rec["name"].strip()
+        if not name or name in categories:
+            return False
+        categories[name] = op_category_create(conn, {"name": name}, [])["id"]
+    elif kind == "folder":
+        if rec["parent_id"] is None:
+            folders[rec["id"]] = folder_id
+            return False
+        if rec["parent_id"] not in folders:
+            raise LibraryFormatError(0, f"folder {rec['id']} comes before its parent")
+        # Older versions let folders be created without a name
+        name = (rec["name"] or "").strip() or "Untitled"
+        created = op_folder_create(conn, {"name": name, "parent_id": folders[rec["parent_id"]]}, [])
+        conn.execute("UPDATE folders SET created_at=? WHERE id=?", (rec["created_at"], created["id"]))
+        folders[rec["id"]] = created["id"]
+    elif kind == "srt":
+        raw = base64.b64decode(rec["gzip_base64"], validate=True)
+        with gzip.GzipFile(fileobj=io.BytesIO(raw)) as f:
+            srt_paths[rec["digest"]] = store_srt(conn, f)
+    elif kind == "bookmark":
+        if rec["folder_id"] not in folders:
+            raise LibraryFormatError(0, f"bookmark {rec['id']} is in unknown folder {rec['folder_id']}")
+        srt_path = srt_paths.get(rec.get("srt"))
+        cur = conn.execute("""INSERT INTO bookmarks (folder_id, url, title, uploader, upload_date,
+            duration_seconds, thumbnail_url, srt_file_path, entry_type, created_at, meta_status, meta_error)
+            VALUES (?,?,?,?,?,?,?,?,?,?,?,?)""",
+            (folders[rec["folder_id"]], rec.get("url"), rec.get("title"), rec.get("uploader"),
+             rec.get("upload_date"), rec.get("duration_seconds"), rec.get("thumbnail_url"), srt_path,
+             rec.get("entry_type") or "youtube", rec["created_at"], rec.get("meta_status") or "ok",
+             rec.get("meta_error")))
+        if srt_path:
+            index_srt_cues(conn, cur.lastrowid, srt_abspath(srt_path))
+        if rec.get("meta_status") == "pending" and rec.get("url"):
+            pending_meta.append((rec["url"], cur.lastrowid))
+    elif kind == "media_log":
+        category = rec["category"]
+        if category not in categories:
+            categories[category] = op_category_create(conn, {"name": category}, [])["id"]
+        status = rec.get("status") if rec.get("status") in MEDIA_LOG_STATUSES else "plan_to_watch"
+        conn.execute("INSERT INTO media_log (category_id, title, progress, status, created_at) VALUES (?,?,?,?,?)",
+                     (categories[category], rec["title"], rec.get("progress") or "", status, rec["created_at"]))
+    else:
+        raise LibraryFormatError(0, f"unknown record type {kind!r}")
+    return True
+
+@app.get("/api/export")
+def export_library():
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+    if request.args.get("format", "ndjson") == "snapshot":
+        return Response(export_snapshot(), mimetype="application/x-tar",
+                        headers={"Content-Disposition": f'attachment; filename="vodmarks-{stamp}.tar"'})
+    return Response(export_ndjson(), mimetype="application/x-ndjson",
+                    headers={"Content-Disposition": f'attachment; filename="vodmarks-{stamp}.ndjson"'})
+
+@app.post("/api/import")
+def import_library():
+    try:
+        folder_id = int(request.args.get("folder_id") or get_root())
+    except ValueError:
+        return jsonify(error="folder_id must be an integer."), 400
+    stream = request.stream
+    if request.content_encoding == "gzip":
+        stream = gzip.GzipFile(fileobj=stream)
+    started = time.perf_counter()
+    try:
+        counts = load_library(stream, folder_id)
+    except OpError as e:
+        return jsonify(error=e.message), e.status
+    except LibraryFormatError as e:
+        return jsonify(error=str(e), imported=e.imported), 400
+    except (OSError, EOFError) as e:  # e.g. a corrupt gzip body
+        return jsonify(error=str(e)), 400
+    return jsonify(ok=True, imported=counts, seconds=round(time.perf_counter() - started, 3))
 
 if __name__ == "__main__":
-    init_db()
+    # Development server. For real load use serve.py (gunicorn/waitress).
+    # The reloader re-runs this block in a child process that does the serving:
+    # set up the schema in the parent, fetch metadata in the child.
+    if os.environ.get("WERKZEUG_RUN_MAIN") != "true":
+        prepare_db()
+    else:
+        requeue_pending_meta()
+        start_meta_recheck()
     app.run(port=5177, debug=True)
@@ -0,0 +1,64 @@
+import argparse
+import gzip
+import sys
+
+import app as vodmarks
+
+# Library export, import and backup from the command line; the same streams
+# as /api/export and /api/import, without going through the server.
+#
+#   python backup.py export library.ndjson      # portable NDJSON (.gz to compress)
+#   python backup.py import library.ndjson      # add it under Root (--folder ID)
+#   python backup.py snapshot backup.tar        # database + subtitle blobs (.tar.gz works too)
+#
+# A snapshot is restored by stopping the app and unpacking the tar over the
+# app directory (delete vodmarks.db-wal / -shm first). Exports and snapshots
+# can be taken while the app is running.
+
+
+def open_out(path):
+    if path == "-":
+        return sys.stdout.buffer
+    return gzip.open(path, "wb") if path.endswith(".gz") else open(path, "wb")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Export, import or snapshot the VODMarks library.")
+    sub = ap.add_subparsers(dest="command", required=True)
+    sub.add_parser("export", help="write the library as NDJSON").add_argument("path")
+    imp = sub.add_parser("import", help="load an NDJSON export")
+    imp.add_argument("path")
+    imp.add_argument("--folder", type=int, help="folder to import into (default: Root)")
+    sub.add_parser("snapshot", help="write a tar of the database and subtitles").add_argument("path")
+    args = ap.parse_args()
+
+    vodmarks.prepare_db()
+    if args.command == "import":
+        opener = gzip.open if args.path.endswith(".gz") else open
+        with opener(args.path, "rb") as f:
+            try:
+                counts = vodmarks.load_library(f, args.folder or vodmarks.get_root())
+            except vodmarks.LibraryFormatError as e:
+                sys.exit(f"{args.path}: {e} (already imported: {e.imported})")
+            except vodmarks.OpError as e:
+                sys.exit(e.message)
+        # Bookmarks that were still waiting for metadata were queued; let them finish
+        vodmarks.meta_queue.shutdown(wait=True)
+        print("imported " + ", ".join(f"{n} {kind}" for kind, n in counts.items()))
+        return
+
+    chunks = vodmarks.export_snapshot() if args.command == "snapshot" else vodmarks.export_ndjson()
+    out = open_out(args.path)
+    written = 0
+    try:
+        for chunk in chunks:
+            out.write(chunk)
+            written += len(chunk)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+    print(f"wrote {written / 1024 / 1024:.1f} MiB to {args.path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import argparse
+import sqlite3
+import threading
+import time
+
+import app as vodmarks
+import benchdata
+
+# Compare request throughput with the pooled/WAL connection layer against the
+# old connect-per-call db(). Runs against a throwaway database, never vodmarks.db.
+#
+#   python bench_db.py --folders 200 --bookmarks 5000 --requests 2000 --threads 8
+
+
+def legacy_db():
+    conn = sqlite3.connect(vodmarks.DB_PATH)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def run(n_requests, n_threads, root):
+    paths = ["/api/tree", "/api/merged", f"/api/bookmarks?folder_id={root}",
+             "/api/folders_flat", "/api/media_log?category=__all__", "/api/media_categories"]
+    counter = iter(range(n_requests))
+    lock = threading.Lock()
+
+    def worker():
+        client = vodmarks.app.test_client()
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            client.get(paths[i % len(paths)])
+
+    threads = [threading.Thread(target=worker) for _ in range(n_threads)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - started
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compare request throughput before/after connection pooling.")
+    ap.add_argument("--folders", type=int, default=200)
+    ap.add_argument("--bookmarks", type=int, default=5000)
+    ap.add_argument("--requests", type=int, default=2000)
+    ap.add_argument("--threads", type=int, default=8)
+    args = ap.parse_args()
+
+    benchdata.sandbox("vodmarks-bench-")
+    vodmarks.init_db()
+    root, _ = benchdata.seed_library(args.folders, args.bookmarks)
+
+    pooled_db = vodmarks.db
+    results = {}
+    for label, fn in (("before (connect per call)", legacy_db), ("after (pooled + WAL)", pooled_db)):
+        if fn is legacy_db:
+            # journal_mode is persistent, so put the file back on the default rollback journal
+            for pool in vodmarks._pools.values():
+                pool.close_all()
+            conn = legacy_db()
+            conn.execute("PRAGMA journal_mode=DELETE")
+            conn.close()
+        vodmarks.db = fn
+        secs = run(args.requests, args.threads, root)
+        results[label] = args.requests / secs
+        print(f"{label:28s} {secs:7.2f}s  {results[label]:8.1f} req/s")
+    vodmarks.db = pooled_db
+
+    before, after = results.values()
+    print(f"speedup: {after / before:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
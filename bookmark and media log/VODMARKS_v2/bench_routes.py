@@ -0,0 +1,451 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import app as vodmarks
+import benchdata
+from benchdata import MEDIA_STATUSES
+
+# Latency / throughput benchmark for every route in app.py.
+#
+# Builds a synthetic library in a throwaway directory (see benchdata.py), with
+# yt-dlp and thumbnail downloads stubbed out, then drives each route either
+# in-process through the Flask test client or over real HTTP against a
+# threaded server with concurrent clients. Reports p50/p95/p99 latency,
+# throughput and peak RSS per route and can write the results as JSON so two
+# commits can be compared:
+#
+#   python bench_routes.py --preset small --out before.json
+#   python bench_routes.py --preset small --mode http --concurrency 16 --out after.json --compare before.json
+
+PRESETS = {
+    #          folders  shape    bookmarks  media   srt MB
+    "small":  (500,     "wide",  20_000,    5_000,  1),
+    "medium": (2_000,   "wide",  200_000,   20_000, 4),
+    "large":  (10_000,  "wide",  1_000_000, 100_000, 8),
+    "deep":   (10_000,  "deep",  200_000,   20_000, 4),
+}
+
+
+# ── Synthetic data ──
+
+def write_srt(path, megabytes):
+    """Write a subtitle file of roughly `megabytes` MB with one cue every 2s."""
+    target = megabytes * 1024 * 1024
+    with open(path, "w", encoding="utf-8") as f:
+        for i in itertools.count(1):
+            s = i * 2
+            f.write(f"{i}\n{s // 3600:02d}:{s % 3600 // 60:02d}:{s % 60:02d},000 --> "
+                    f"{s // 3600:02d}:{s % 3600 // 60:02d}:{s % 60:02d},900\n"
+                    f"Line {i} about palworld speedruns and chat reading\n\n")
+            if f.tell() >= target:
+                return
+
+
+def seed(n_folders, shape, n_bookmarks, n_media, srt_mb, scratch):
+    """Bulk-load the library, then add the disposable rows and subtitles the scenarios use."""
+    root, ids = benchdata.seed_library(n_folders, n_bookmarks, n_media, shape)
+    now = datetime.now(timezone.utc).isoformat()
+
+    # Disposable rows for the routes that delete or move things
+    client = vodmarks.app.test_client()
+    conn = vodmarks.db()
+    scratch_parent = client.post("/api/folder", json={"name": "Scratch", "parent_id": root}).get_json()["id"]
+    with conn:
+        conn.executemany("INSERT INTO folders (name, parent_id, created_at, path, name_key) VALUES (?,?,?,?,?)",
+                         ((f"Scratch {i}", scratch_parent, now, None, f"scratch {i}") for i in range(scratch)))
+        conn.executemany("""INSERT INTO bookmarks (folder_id, url, title, entry_type, created_at)
+            VALUES (?,?,?,?,?)""", ((scratch_parent, None, f"Scratch {i}", "media", now) for i in range(200 + scratch * 7)))
+        anime = conn.execute("SELECT id FROM media_categories WHERE name='Anime'").fetchone()["id"]
+        conn.executemany("INSERT INTO media_log (category_id, title, progress, status, created_at) VALUES (?,?,?,?,?)",
+                         ((anime, f"Scratch {i}", "", "plan_to_watch", now) for i in range(scratch)))
+        conn.executemany("INSERT INTO media_categories (name, sort_order) VALUES (?,?)",
+                         ((f"Scratch {i}", 100 + i) for i in range(scratch)))
+        vodmarks.rebuild_folder_closure(conn)
+    conn.close()
+
+    srt_path = os.path.join(vodmarks.APP_DIR, "bench.srt")
+    write_srt(srt_path, srt_mb)
+    conn = vodmarks.db()
+    sub_ids = [r["id"] for r in conn.execute("SELECT id FROM bookmarks WHERE entry_type='youtube' LIMIT 20")]
+    conn.execute("BEGIN IMMEDIATE")
+    with open(srt_path, "rb") as f:
+        rel = vodmarks.store_srt(conn, f)
+    for n, bid in enumerate(sub_ids):
+        conn.execute("UPDATE bookmarks SET srt_file_path=? WHERE id=?", (rel, bid))
+        if n < 2:  # enough cues for /api/search; the srt routes read the file itself
+            vodmarks.index_srt_cues(conn, bid, vodmarks.srt_abspath(rel))
+    conn.commit()
+    ctx = {
+        "root": root,
+        "leaf": ids[-1],
+        "folders": ids,
+        "sub_ids": sub_ids,
+        "srt_bytes": open(srt_path, "rb").read(),
+        "scratch_parent": scratch_parent,
+        "scratch_folders": [r["id"] for r in conn.execute(
+            "SELECT id FROM folders WHERE parent_id=? ORDER BY id", (scratch_parent,))],
+        "scratch_bookmarks": [r["id"] for r in conn.execute(
+            "SELECT id FROM bookmarks WHERE folder_id=? ORDER BY id", (scratch_parent,))],
+        "scratch_media": [r["id"] for r in conn.execute(
+            "SELECT id FROM media_log WHERE title LIKE 'Scratch %' ORDER BY id")],
+        "scratch_cats": [r["id"] for r in conn.execute(
+            "SELECT id FROM media_categories WHERE name LIKE 'Scratch %' ORDER BY id")],
+        "merged_key": conn.execute("SELECT name_key FROM folders WHERE parent_id IS NOT NULL "
+                                   "GROUP BY name_key HAVING COUNT(*) > 1 LIMIT 1").fetchone()[0],
+    }
+    conn.close()
+    return ctx
+
+
+# ── Scenarios ──
+
+def multipart(field, filename, data):
+    boundary = "benchboundary7MA4YWxkTrZu0gW"
+    body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"{field}\"; filename=\"{filename}\"\r\n"
+            f"Content-Type: application/octet-stream\r\n\r\n").encode() + data + f"\r\n--{boundary}--\r\n".encode()
+    return body, {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+
+
+def jbody(obj):
+    return json.dumps(obj).encode(), {"Content-Type": "application/json"}
+
+
+def scenarios(ctx):
+    """name -> fn(i) returning (method, path, body, headers) for the i-th request."""
+    root, leaf, folders = ctx["root"], ctx["leaf"], ctx["folders"]
+    sub = ctx["sub_ids"]
+    # Bookmarks 0-199 are moved around by bulk_move/batch; the rest are used up
+    # one per request (PATCH, upload, srt delete), five per bulk_delete, or from the end.
+    sb = ctx["scratch_bookmarks"]
+    one = sb[200:]
+    bulk = sb[200 + len(ctx["scratch_media"]):]
+    mid = folders[len(folders) // 2]
+
+    def get(path):
+        return lambda i: ("GET", path(i) if callable(path) else path, None, {})
+
+    def send(method, path, obj=None):
+        def build(i):
+            body, headers = jbody(obj(i)) if obj else (None, {})
+            return method, path(i) if callable(path) else path, body, headers
+        return build
+
+    def upload(i):
+        body, headers = multipart("srt_file", "bench.srt", ctx["srt_bytes"])
+        return "POST", f"/api/bookmark/{one[i]}/upload_srt", body, headers
+
+    return {
+        "GET /": get("/"),
+        "GET /api/tree": get("/api/tree"),
+        "GET /api/merged": get("/api/merged"),
+        "GET /api/events (connect)": get("/api/events"),
+        "GET /api/cache_stats": get("/api/cache_stats"),
+        "GET /thumb/<id>": get(lambda i: f"/thumb/{sub[i % len(sub)]}?w=320"),
+        "GET /api/merged_bookmarks": get(f"/api/merged_bookmarks?key={urllib.parse.quote(ctx['merged_key'])}&limit=100"),
+        "GET /api/bookmarks (root page)": get(lambda i: f"/api/bookmarks?folder_id={root}&limit=100&sort=title_asc"),
+        "GET /api/bookmarks (subtree)": get(lambda i: f"/api/bookmarks?folder_id={mid}&limit=100"),
+        "GET /api/bookmarks (filtered)": get(lambda i: f"/api/bookmarks?folder_id={root}&limit=100&q=part+{i % 97}"),
+        "GET /api/bookmarks (unpaged leaf)": get(f"/api/bookmarks?folder_id={leaf}"),
+        "GET /api/bookmark/<id>/meta_status": get(lambda i: f"/api/bookmark/{sub[i % len(sub)]}/meta_status"),
+        "GET /api/meta_queue": get("/api/meta_queue"),
+        "GET /api/folders_flat": get("/api/folders_flat"),
+        "GET /api/bookmark/<id>/srt": get(lambda i: f"/api/bookmark/{sub[i % len(sub)]}/srt"),
+        "GET /api/bookmark/<id>/srt/cues": get(lambda i: f"/api/bookmark/{sub[i % len(sub)]}/srt/cues"
+                                                         f"?from={i * 60}&to={i * 60 + 300}"),
+        "GET /api/search": get(lambda i: f"/api/search?q=palworld+{i % 97}&limit=20"),
+        "GET /api/media_log (all)": get("/api/media_log?category=__all__"),
+        "GET /api/media_log (category)": get("/api/media_log?category=Anime"),
+        "GET /api/media_log (page)": get(lambda i: f"/api/media_log?category=__all__&limit=100"
+                                                   f"&sort={('title_asc', 'title_desc')[i % 2]}"),
+        "GET /api/media_log (search)": get(lambda i: f"/api/media_log?category=__all__&limit=100&q=title+{i % 97}"),
+        "GET /api/media_categories": get("/api/media_categories"),
+        "GET /api/stats": get(lambda i: f"/api/stats?folder_id={(root, mid)[i % 2]}"),
+        "POST /api/folder": send("POST", "/api/folder",
+                                 lambda i: {"name": f"Bench {i}", "parent_id": ctx["scratch_parent"]}),
+        "PATCH /api/folder/<id>": send("PATCH", lambda i: f"/api/folder/{ctx['scratch_folders'][0]}",
+                                       lambda i: {"name": f"Renamed {i}"}),
+        "DELETE /api/folder/<id>": send("DELETE", lambda i: f"/api/folder/{ctx['scratch_folders'][i + 1]}"),
+        "POST /api/bookmark (media)": send("POST", "/api/bookmark", lambda i: {
+            "folder_id": ctx["scratch_parent"], "entry_type": "media", "title": f"Bench {i}", "date": "2024"}),
+        "POST /api/bookmark (youtube)": send("POST", "/api/bookmark", lambda i: {
+            "folder_id": ctx["scratch_parent"], "url": f"https://youtu.be/bn{i:09d}"}),
+        "PATCH /api/bookmark/<id>": send("PATCH", lambda i: f"/api/bookmark/{one[i]}",
+                                         lambda i: {"folder_id": folders[i % len(folders)]}),
+        "POST /api/bookmarks/bulk_move": send("POST", "/api/bookmarks/bulk_move", lambda i: {
+            "ids": sb[:100], "folder_id": folders[i % len(folders)]}),
+        "POST /api/bookmarks/bulk_import": send("POST", "/api/bookmarks/bulk_import", lambda i: {
+            "folder_id": ctx["scratch_parent"], "urls": [f"https://youtu.be/bi{i:05d}{j:04d}" for j in range(5)]}),
+        "POST /api/bookmark/<id>/upload_srt": upload,
+        "DELETE /api/bookmark/<id>/srt": send("DELETE", lambda i: f"/api/bookmark/{one[i]}/srt"),
+        "POST /api/bookmarks/bulk_delete": send("POST", "/api/bookmarks/bulk_delete", lambda i: {
+            "ids": bulk[i * 5: i * 5 + 5]}),
+        "DELETE /api/bookmark/<id>": send("DELETE", lambda i: f"/api/bookmark/{sb[-1 - i]}"),
+        "POST /api/media_log": send("POST", "/api/media_log", lambda i: {
+            "category": "Anime", "title": f"Bench {i}", "status": "currently"}),
+        "PATCH /api/media_log/<id>": send("PATCH", lambda i: f"/api/media_log/{ctx['scratch_media'][0]}",
+                                          lambda i: {"status": MEDIA_STATUSES[i % 3]}),
+        "DELETE /api/media_log/<id>": send("DELETE", lambda i: f"/api/media_log/{ctx['scratch_media'][i + 1]}"),
+        "POST /api/media_categories": send("POST", "/api/media_categories", lambda i: {"name": f"Bench {i}"}),
+        "PATCH /api/media_categories/<id>": send("PATCH", lambda i: f"/api/media_categories/{ctx['scratch_cats'][0]}",
+                                                 lambda i: {"name": f"Scratch renamed {i}"}),
+        "POST /api/media_categories/<id>/reorder": send(
+            "POST", lambda i: f"/api/media_categories/{ctx['scratch_cats'][0]}/reorder",
+            lambda i: {"direction": "up" if i % 2 else "down"}),
+        "DELETE /api/media_categories/<id>": send(
+            "DELETE", lambda i: f"/api/media_categories/{ctx['scratch_cats'][i + 1]}"),
+        "POST /api/batch": send("POST", "/api/batch", lambda i: {"ops": [
+            {"op": "folder.create", "name": f"Batch {i}", "parent_id": ctx["scratch_parent"]},
+            {"op": "bookmark.move", "ids": sb[100:200], "folder_id": "$0.id"},
+            {"op": "media_log.update", "id": ctx["scratch_media"][0], "progress": f"Ep {i}"},
+        ]}),
+    }
+
+
+# ── Measurement ──
+
+class RssSampler:
+    """Peak resident set size while a route runs (sampled from /proc, else ru_maxrss)."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def current():
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, AttributeError):
+            import resource
+            scale = 1 if sys.platform == "darwin" else 1024
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.current())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = self.current()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.current())
+
+
+def percentile(sorted_vals, p):
+    if not sorted_vals:
+        return None
+    k = (len(sorted_vals) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_vals) - 1)
+    return sorted_vals[lo] + (sorted_vals[hi] - sorted_vals[lo]) * (k - lo)
+
+
+def summarize(latencies, errors, wall):
+    lat = sorted(latencies)
+    ms = lambda v: round(v * 1000, 3) if v is not None else None
+    return {
+        "requests": len(lat),
+        "errors": errors,
+        "p50_ms": ms(percentile(lat, 50)),
+        "p95_ms": ms(percentile(lat, 95)),
+        "p99_ms": ms(percentile(lat, 99)),
+        "mean_ms": ms(sum(lat) / len(lat)) if lat else None,
+        "max_ms": ms(lat[-1]) if lat else None,
+        "throughput_rps": round(len(lat) / wall, 2) if wall else None,
+    }
+
+
+def client_request(client, method, path, body, headers):
+    if path == "/api/events":
+        resp = client.get(path, buffered=False)
+        next(iter(resp.response))  # time to the first event frame
+        resp.close()
+        return resp.status_code
+    return client.open(path, method=method, data=body, headers=headers).status_code
+
+
+def http_request(base, method, path, body, headers):
+    req = urllib.request.Request(base + path, data=body, method=method, headers=headers)
+    try:
+        with urllib.request.urlopen(req, timeout=60) as resp:
+            if path == "/api/events":
+                resp.readline()
+            else:
+                resp.read()
+            return resp.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def run_route(build, n, concurrency, send):
+    """Issue n requests (on `concurrency` threads); returns latencies, error count, wall time."""
+    counter = itertools.count()
+    lock = threading.Lock()
+    latencies = []
+    errors = 0
+
+    def worker():
+        nonlocal errors
+        while True:
+            with lock:
+                i = next(counter)
+            if i >= n:
+                return
+            method, path, body, headers = build(i)
+            started = time.perf_counter()
+            try:
+                status = send(method, path, body, headers)
+            except Exception:
+                status = 599
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                if status >= 400:
+                    errors += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(worker)
+    return latencies, errors, time.perf_counter() - started
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(__file__),
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path, threshold):
+    """Print per-route p95 deltas against a previous run; returns the routes that regressed."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nvs {baseline_path} (commit {baseline['meta'].get('commit')}):")
+    for key in ("mode", "concurrency", "dataset"):
+        if baseline["meta"].get(key) != results["meta"].get(key):
+            print(f"  warning: {key} differs ({baseline['meta'].get(key)} vs {results['meta'].get(key)})")
+    regressed = []
+    for name, cur in results["routes"].items():
+        old = baseline["routes"].get(name)
+        if not old or not old.get("p95_ms") or cur.get("p95_ms") is None:
+            continue
+        delta = (cur["p95_ms"] - old["p95_ms"]) / old["p95_ms"]
+        flag = ""
+        if delta > threshold:
+            flag = "  REGRESSION"
+            regressed.append(name)
+        print(f"  {name:42s} p95 {old['p95_ms']:9.2f} -> {cur['p95_ms']:9.2f} ms  {delta:+7.1%}{flag}")
+    return regressed
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark every VODMarks API route on a synthetic library.")
+    ap.add_argument("--preset", choices=sorted(PRESETS), default="small")
+    ap.add_argument("--folders", type=int)
+    ap.add_argument("--shape", choices=("wide", "deep"))
+    ap.add_argument("--bookmarks", type=int)
+    ap.add_argument("--media", type=int)
+    ap.add_argument("--srt-mb", type=int)
+    ap.add_argument("--requests", type=int, default=100, help="requests per route")
+    ap.add_argument("--mode", choices=("client", "http"), default="client")
+    ap.add_argument("--concurrency", type=int, default=1, help="parallel clients (http mode)")
+    ap.add_argument("--routes", help="only run routes whose name contains this text")
+    ap.add_argument("--out", help="write results as JSON")
+    ap.add_argument("--compare", help="previous --out file to compare p95 against")
+    ap.add_argument("--threshold", type=float, default=0.25, help="p95 slowdown that counts as a regression")
+    args = ap.parse_args()
+
+    folders, shape, bookmarks, media, srt_mb = PRESETS[args.preset]
+    folders = args.folders if args.folders is not None else folders
+    shape = args.shape or shape
+    bookmarks = args.bookmarks if args.bookmarks is not None else bookmarks
+    media = args.media if args.media is not None else media
+    srt_mb = args.srt_mb if args.srt_mb is not None else srt_mb
+
+    tmp = benchdata.sandbox("vodmarks-bench-")
+    vodmarks.EVENTS_POLL_SECONDS = 0.05
+
+    print(f"seeding {folders} folders ({shape}), {bookmarks} bookmarks, {media} media rows, {srt_mb}MB SRT in {tmp}")
+    started = time.perf_counter()
+    vodmarks.init_db()
+    ctx = seed(folders, shape, bookmarks, media, srt_mb, scratch=args.requests + 1)
+    print(f"seeded in {time.perf_counter() - started:.1f}s")
+
+    if args.mode == "http":
+        from werkzeug.serving import WSGIRequestHandler, make_server
+
+        class QuietHandler(WSGIRequestHandler):
+            def log_request(self, *a):
+                pass
+
+        server = make_server("127.0.0.1", 0, vodmarks.app, threaded=True, request_handler=QuietHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_port}"
+        send = lambda m, p, b, h: http_request(base, m, p, b, h)
+        concurrency = args.concurrency
+    else:
+        client = vodmarks.app.test_client()
+        send = lambda m, p, b, h: client_request(client, m, p, b, h)
+        concurrency = 1
+
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "mode": args.mode,
+            "concurrency": concurrency,
+            "requests_per_route": args.requests,
+            "dataset": {"folders": folders, "shape": shape, "bookmarks": bookmarks,
+                        "media_log": media, "srt_mb": srt_mb},
+        },
+        "routes": {},
+    }
+    print(f"\n{'route':42s} {'p50':>8s} {'p95':>8s} {'p99':>8s} {'req/s':>8s} {'RSS MB':>7s} err")
+    for name, build in scenarios(ctx).items():
+        if args.routes and args.routes not in name:
+            continue
+        with RssSampler() as rss:
+            latencies, errors, wall = run_route(build, args.requests, concurrency, send)
+        stats = summarize(latencies, errors, wall)
+        stats["peak_rss_mb"] = round(rss.peak / 1024 / 1024, 1)
+        results["routes"][name] = stats
+        print(f"{name:42s} {stats['p50_ms']:8.2f} {stats['p95_ms']:8.2f} {stats['p99_ms']:8.2f} "
+              f"{stats['throughput_rps']:8.1f} {stats['peak_rss_mb']:7.1f} {errors}")
+
+    vodmarks.meta_queue.shutdown()
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nwrote {args.out}")
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
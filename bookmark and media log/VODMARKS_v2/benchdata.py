@@ -0,0 +1,97 @@
+import os
+import tempfile
+from datetime import datetime, timezone
+
+import app as vodmarks
+from thumbs import ThumbCache
+
+# Synthetic libraries and network stubs shared by bench_db.py, bench_routes.py
+# and check_query_plans.py. sandbox() points the app at a throwaway directory
+# (never vodmarks.db or the real subtitle/thumbnail stores) with yt-dlp and
+# thumbnail downloads stubbed out; seed_library() then bulk-loads it.
+
+MEDIA_STATUSES = ("currently", "completed", "plan_to_watch")
+
+
+# ── Stubs ──
+
+def fake_meta(url):
+    vid = vodmarks.youtube_video_id(url) or url[-11:]
+    return {"title": f"Video {vid}", "uploader": "Bench", "upload_date": "2024-01-01",
+            "duration_seconds": 3600, "thumbnail_url": f"https://i.ytimg.com/vi/{vid}/hqdefault.jpg"}
+
+
+def fake_playlist(url):
+    return [f"https://youtu.be/pl{i:09d}" for i in range(5)]
+
+
+def fake_image(url):
+    try:
+        import io
+        from PIL import Image
+        buf = io.BytesIO()
+        Image.new("RGB", (480, 360), (40, 40, 40)).save(buf, "JPEG")
+        return buf.getvalue()
+    except ImportError:
+        return b"\xff\xd8\xff\xe0" + b"\0" * 20000
+
+
+def sandbox(prefix, db_name="bench.db"):
+    """Rebind the app's database, stores and fetchers to a new temp dir; returns the dir."""
+    tmp = tempfile.mkdtemp(prefix=prefix)
+    vodmarks.APP_DIR = tmp
+    vodmarks.DB_PATH = os.path.join(tmp, db_name)
+    vodmarks.srt_store = vodmarks.BlobStore(tmp, "srt_store")
+    vodmarks.thumb_cache = ThumbCache(os.path.join(tmp, "thumb_cache"), fetcher=fake_image)
+    vodmarks.yt_meta = fake_meta
+    vodmarks.yt_playlist_urls = fake_playlist
+    return tmp
+
+
+# ── Synthetic data ──
+
+def folder_parents(n, shape, fanout=20, depth=50):
+    """Parent index (0 = root) for folders 1..n: a wide fanout tree or chains `depth` long."""
+    for i in range(1, n + 1):
+        if shape == "deep":
+            yield 0 if (i - 1) % depth == 0 else i - 1
+        else:
+            yield (i - 1) // fanout
+
+
+def seed_library(n_folders, n_bookmarks, n_media=0, shape="wide"):
+    """Bulk-load folders, bookmarks and media rows with triggers dropped, then restore
+    them and rebuild derived state. Returns (root id, folder ids with the root first)."""
+    conn = vodmarks.db()
+    root = vodmarks.get_root()
+    now = datetime.now(timezone.utc).isoformat()
+    triggers = conn.execute("SELECT name, sql FROM sqlite_master WHERE type='trigger'").fetchall()
+    with conn:
+        for t in triggers:
+            conn.execute(f"DROP TRIGGER {t['name']}")
+        ids = [root]
+        names = max(1, n_folders // 5)  # repeated names give /api/merged something to group
+        for i, p in enumerate(folder_parents(n_folders, shape), 1):
+            name = f"Folder {i % names}"
+            cur = conn.execute("INSERT INTO folders (name, parent_id, created_at, name_key) VALUES (?,?,?,?)",
+                               (name, ids[p], now, vodmarks.folder_name_key(name)))
+            ids.append(cur.lastrowid)
+        conn.executemany("""INSERT INTO bookmarks
+            (folder_id, url, title, uploader, upload_date, duration_seconds, thumbnail_url, entry_type, created_at)
+            VALUES (?,?,?,?,?,?,?,?,?)""",
+            ((ids[i % len(ids)], f"https://youtu.be/{i:011d}", f"Video {i} palworld part {i % 97}",
+              f"Uploader {i % 300}", f"20{10 + i % 15}-{i % 12 + 1:02d}-{i % 28 + 1:02d}", 60 + i % 20000,
+              f"https://i.ytimg.com/vi/{i:011d}/hqdefault.jpg", "media" if i % 10 == 0 else "youtube", now)
+             for i in range(n_bookmarks)))
+        cats = [r["id"] for r in conn.execute("SELECT id FROM media_categories")]
+        conn.executemany("INSERT INTO media_log (category_id, title, progress, status, created_at) VALUES (?,?,?,?,?)",
+            ((cats[i % len(cats)], f"Title {i}", f"Ep {i % 24}", MEDIA_STATUSES[i % 3], now)
+             for i in range(n_media)))
+        for index in ("bookmarks_fts", "bookmarks_trigram", "media_log_fts", "media_log_trigram"):
+            conn.execute(f"INSERT INTO {index}({index}) VALUES ('rebuild')")
+        for t in triggers:
+            conn.execute(t["sql"])
+        vodmarks.rebuild_folder_closure(conn)
+        vodmarks.rebuild_stats(conn)
+    conn.close()
+    return root, ids
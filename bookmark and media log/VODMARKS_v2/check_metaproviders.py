@@ -0,0 +1,104 @@
+import os
+import sys
+
+import app as vodmarks
+from metaproviders import OEmbedProvider, ProviderChain, ProviderError, YouTubePageProvider, YtDlpProvider
+
+# Run the metadata providers against recorded YouTube responses in
+# fixtures/metaproviders/ instead of the network, and compare what they
+# resolve with what the pages say. Exits non-zero on any mismatch, so a change
+# to a parser (or a new recording after YouTube changes its pages) can be
+# checked offline:
+#
+#   python check_metaproviders.py
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "metaproviders")
+
+ZOO = "https://youtu.be/jNQXAC9IVRw"
+ZOO_META = {"title": "Me at the zoo", "uploader": "jawed", "upload_date": "2005-04-23",
+            "duration_seconds": 19, "thumbnail_url": "https://i.ytimg.com/vi/jNQXAC9IVRw/sddefault.jpg"}
+LIVE = "https://www.youtube.com/live/Kp7eSUU9oy8"
+LIVE_META = {"title": "【LIVE】Palworld endgame grind", "uploader": "Kasuga Ch.", "upload_date": "2024-10-17",
+             "duration_seconds": None, "thumbnail_url": "https://i.ytimg.com/vi/Kp7eSUU9oy8/maxresdefault_live.jpg"}
+
+WATCH = "https://www.youtube.com/watch?v="
+OEMBED = "https://www.youtube.com/oembed?format=json&url=https%3A%2F%2Fwww.youtube.com%2Fwatch%3Fv%3D"
+
+
+def recorded(responses, requested=None):
+    """Fetcher serving fixture files by URL prefix; an unrecorded URL fails instead of going out."""
+    def fetch(url, headers):
+        if requested is not None:
+            requested.append(url)
+        for prefix, name in responses.items():
+            if url.startswith(prefix):
+                with open(os.path.join(FIXTURES, name), "rb") as f:
+                    return f.read()
+        raise ProviderError(f"no recording for {url}")
+    return fetch
+
+
+def page(responses):
+    return YouTubePageProvider(vodmarks.youtube_video_id, recorded(responses))
+
+
+def oembed(responses, requested=None):
+    return OEmbedProvider(vodmarks.youtube_video_id, recorded(responses, requested))
+
+
+def outcome(fn):
+    try:
+        return fn()
+    except ProviderError as e:
+        return f"ProviderError: {e}"
+
+
+def cases():
+    """(name, fn, expected result or error) for every recording."""
+    yield ("watch page", lambda: page({WATCH + "jNQXAC9IVRw&hl=en": "watch_ok.html"}).fetch(ZOO), ZOO_META)
+    yield ("live watch page", lambda: page({WATCH + "Kp7eSUU9oy8&hl=en": "watch_live.html"}).fetch(LIVE), LIVE_META)
+    yield ("removed video", lambda: page({WATCH: "watch_unavailable.html"}).fetch(ZOO),
+           "ProviderError: Video unavailable")
+    yield ("consent interstitial", lambda: page({WATCH: "watch_consent.html"}).fetch(ZOO),
+           "ProviderError: no player response in page")
+    yield ("oembed", lambda: oembed({OEMBED + "jNQXAC9IVRw": "oembed.json"}).fetch(ZOO),
+           {k: ZOO_META[k] for k in ("title", "uploader")}
+           | {"thumbnail_url": "https://i.ytimg.com/vi/jNQXAC9IVRw/hqdefault.jpg"})
+    yield ("oembed of a page", lambda: oembed({OEMBED: "watch_consent.html"}).fetch(ZOO),
+           "ProviderError: unreadable oEmbed response")
+
+    # The chain stops at the watch page when it has every field...
+    extracted = []
+    chain = ProviderChain([page({WATCH: "watch_ok.html"}), oembed({OEMBED: "oembed.json"}),
+                           YtDlpProvider(lambda url: extracted.append(url) or {})])
+    yield ("chain, page complete", lambda: (chain.fetch(ZOO), extracted), (ZOO_META, []))
+
+    # ...and otherwise takes oEmbed's fields and leaves only the rest to yt-dlp
+    requested = []
+    chain = ProviderChain([page({WATCH: "watch_consent.html"}), oembed({OEMBED: "oembed.json"}, requested),
+                           YtDlpProvider(lambda url: {"title": "from yt-dlp", "upload_date": "2005-04-24",
+                                                      "duration_seconds": 19})])
+    yield ("chain, page blocked", lambda: (chain.fetch(ZOO), len(requested)),
+           ({"title": "Me at the zoo", "uploader": "jawed", "upload_date": "2005-04-24", "duration_seconds": 19,
+             "thumbnail_url": "https://i.ytimg.com/vi/jNQXAC9IVRw/hqdefault.jpg"}, 1))
+
+
+def main():
+    failures = []
+    total = 0
+    for name, fn, expected in cases():
+        total += 1
+        got = outcome(fn)
+        if got != expected:
+            failures.append((name, expected, got))
+
+    if failures:
+        print(f"{len(failures)} of {total} provider checks failed:\n")
+        for name, expected, got in failures:
+            print(f"  {name}\n    expected {expected!r}\n    got      {got!r}\n")
+        sys.exit(1)
+    print(f"OK: {total} provider checks against recorded responses.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import io
+import re
+import sys
+
+import app as vodmarks
+import benchdata
+
+# Drive every route through the Flask test client against a seeded throwaway
+# app dir (never vodmarks.db or the real stores; yt-dlp and thumbnail downloads
+# are stubbed out), capture the SQL each one runs, and EXPLAIN QUERY PLAN it.
+# Exits non-zero if any statement falls back to a full table scan, so it can
+# gate CI the same way a test would:
+#
+#   python check_query_plans.py
+
+# Statements that legitimately read a whole (small) table.
+FULL_READ_OK = (
+    re.compile(r"^SELECT f\.id, f\.name, f\.parent_id, COALESCE\(s\.bookmarks, 0\) AS count FROM folders f "),  # get_tree
+    re.compile(r"^SELECT id, name, path FROM folders$"),           # folders_flat
+    re.compile(r"^SELECT f\.name_key AS key, "),                   # merged view: groups every folder by name
+    re.compile(r"^SELECT [\w*, ]+ FROM media_categories ORDER BY "),
+    # /api/stats: one index entry per distinct uploader
+    re.compile(r"^SELECT COUNT\(\*\) FROM uploader_stats$"),
+    # api_stats and the media log page totals: a few rows per category
+    re.compile(r"^SELECT [\w(),. ]+ FROM media_stats m "),
+    # /api/export copies the whole library
+    re.compile(r"^SELECT f\.id, f\.name, f\.parent_id, f\.created_at FROM folders f JOIN folder_closure c "),
+    re.compile(r"^SELECT digest, size FROM srt_blobs WHERE refs > 0 ORDER BY digest$"),
+    re.compile(r"^SELECT b\.id, .* FROM bookmarks b LEFT JOIN srt_blobs s ON s\.path = b\.srt_file_path ORDER BY b\.id$"),
+    re.compile(r"^SELECT c\.name AS category, .* FROM media_log m JOIN media_categories c .* ORDER BY m\.id$"),
+    # FTS5 loading its config the first time a pooled connection touches the index
+    re.compile(r"^SELECT k, v FROM 'main'\.'\w+_fts_config'$"),
+)
+
+SKIP_PREFIXES = ("--", "PRAGMA", "BEGIN", "COMMIT", "ROLLBACK", "CREATE", "ANALYZE", "SAVEPOINT", "RELEASE")
+
+
+def seed(n_folders=300, n_bookmarks=6000, n_media=3000):
+    root, ids = benchdata.seed_library(n_folders, n_bookmarks, n_media)
+    conn = vodmarks.db()
+    conn.execute("ANALYZE")
+    conn.close()
+    return root, ids
+
+
+def exercise(client, root, ids):
+    """Hit every route at least once. Keep in sync with app.py's route list."""
+    leaf, other = ids[-1], ids[-2]
+    client.get("/api/tree")
+    client.get("/api/merged")
+    client.get("/api/merged_bookmarks?key=folder%201")
+    client.get(f"/api/bookmarks?folder_id={root}")
+    client.get(f"/api/bookmarks?folder_id={leaf}")
+    for sort in ("default", "title_asc", "date_desc", "duration_asc"):
+        page = client.get(f"/api/bookmarks?folder_id={root}&sort={sort}&limit=50").json
+        client.get(f"/api/bookmarks?folder_id={root}&sort={sort}&limit=50&cursor={page['next_cursor']}")
+    client.get(f"/api/bookmarks?folder_id={root}&sort=title_asc&limit=50&q=video 12")
+    client.get("/api/merged_bookmarks?key=folder%201&sort=date_asc&limit=20")
+    client.get("/api/folders_flat")
+    client.post("/api/folder", json={"name": "Plan check", "parent_id": leaf})
+    client.patch(f"/api/folder/{other}", json={"name": "Renamed"})
+    client.post("/api/bookmark", json={"folder_id": leaf, "entry_type": "media", "title": "x", "date": "2024"})
+    client.patch("/api/bookmark/1", json={"folder_id": leaf})
+    client.get("/api/bookmark/1/meta_status")
+    client.get("/thumb/1?w=320")
+    client.post("/api/bookmark/1/upload_srt", content_type="multipart/form-data", data={
+        "srt_file": (io.BytesIO(b"1\n00:00:01,000 --> 00:00:02,000\nHello there\n\n"), "one.srt")})
+    client.get("/api/bookmark/1/srt")
+    client.get("/api/bookmark/1/srt/cues?from=0:00:01&to=0:01:00")
+    client.delete("/api/bookmark/1/srt")
+    client.post("/api/bookmarks/bulk_move", json={"ids": [2, 3, 4], "folder_id": leaf})
+    client.post("/api/bookmarks/bulk_delete", json={"ids": [5, 6]})
+    client.delete("/api/bookmark/7")
+    client.delete(f"/api/folder/{other}")
+    for cat in ("__all__", "__currently__", "Anime", ""):
+        client.get(f"/api/media_log?category={cat}")
+        page = client.get(f"/api/media_log?category={cat}&limit=50&sort=title_desc").json
+        client.get(f"/api/media_log?category={cat}&limit=50&sort=title_desc&cursor={page['next_cursor']}")
+        client.get(f"/api/media_log?category={cat}&limit=50&status=completed&q=title 1")
+    client.post("/api/media_log", json={"category": "Anime", "title": "Frieren", "status": "currently"})
+    client.patch("/api/media_log/1", json={"status": "completed"})
+    client.delete("/api/media_log/2")
+    client.get("/api/media_categories")
+    client.post("/api/media_categories", json={"name": "Podcasts"})
+    client.patch("/api/media_categories/1", json={"name": "Animation"})
+    client.post("/api/media_categories/2/reorder", json={"direction": "up"})
+    client.delete("/api/media_categories/3")
+    client.get("/api/search?q=video 1")
+    client.get("/api/stats")
+    client.get(f"/api/stats?folder_id={leaf}&uploaders=5")
+    client.get("/api/meta_recheck")
+    client.patch("/api/meta_recheck", json={"batch_size": 20})
+    client.post("/api/meta_recheck/run", json={"ids": [10, 11]})
+    vodmarks._recheck_scan()   # the scheduler's due-row query, not a route but just as hot
+    client.post("/api/batch", json={"ops": [
+        {"op": "folder.create", "name": "Batch", "parent_id": root},
+        {"op": "bookmark.move", "ids": list(range(10, 1500)), "folder_id": "$0.id"},
+        {"op": "bookmark.delete", "ids": [8, 9]},
+        {"op": "media_log.update", "id": 3, "title": "Renamed"},
+    ]})
+    exported = client.get("/api/export").get_data()
+    client.post(f"/api/import?folder_id={leaf}", data=exported, content_type="application/x-ndjson")
+    client.get("/api/export?format=snapshot").get_data()
+    events = client.get("/api/events?since=0")
+    next(events.response), next(events.response)   # preamble, then one poll of change_log
+    events.close()
+
+
+LIMITED = re.compile(r"\bLIMIT\b", re.IGNORECASE)
+
+
+def bare_scans(conn, sql):
+    """Full scans in sql's plan. Walking an index in order is a full scan too,
+    unless a LIMIT stops it after a page."""
+    out = []
+    for row in conn.execute("EXPLAIN QUERY PLAN " + sql).fetchall():
+        detail = row[3]
+        if not detail.startswith("SCAN ") or "VIRTUAL TABLE" in detail:
+            continue
+        if detail.startswith(("SCAN (", "SCAN CONSTANT ROW")):
+            continue
+        if " USING " in detail and LIMITED.search(sql):
+            continue
+        out.append(detail)
+    return out
+
+
+def main():
+    benchdata.sandbox("vodmarks-plans-", "plans.db")
+    vodmarks.init_db()
+    root, ids = seed()
+
+    statements = []
+    real_db = vodmarks.db
+
+    def traced_db():
+        conn = real_db()
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    vodmarks.db = traced_db
+    try:
+        exercise(vodmarks.app.test_client(), root, ids)
+    finally:
+        vodmarks.db = real_db
+
+    conn = real_db()
+    conn.set_trace_callback(None)
+    failures = {}
+    for sql in dict.fromkeys(" ".join(s.split()) for s in statements):
+        if sql.upper().startswith(SKIP_PREFIXES):
+            continue
+        if any(p.match(sql) for p in FULL_READ_OK):
+            continue
+        scans = bare_scans(conn, sql)
+        if scans:
+            failures[sql] = scans
+    conn.close()
+
+    if failures:
+        print(f"{len(failures)} route queries fall back to a full table scan:\n")
+        for sql, scans in failures.items():
+            print(f"  {sql}\n    -> {'; '.join(scans)}\n")
+        sys.exit(1)
+    print(f"OK: {len(set(statements))} statements checked, no full table scans.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import os
+import queue
+import sqlite3
+import threading
+
+# Pooled SQLite connections for app.py.
+#
+# Opening a connection costs a file open, schema parse and PRAGMA setup, and
+# the Flask dev server runs every request on a fresh thread, so a plain
+# threading.local would never be reused. Instead idle connections sit in a
+# shared queue (check_same_thread=False) and are handed to one thread at a
+# time; PooledConnection.close() rolls back anything left uncommitted and puts
+# the connection back instead of closing it.
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",        # readers don't block the writer and vice versa
+    "PRAGMA synchronous=NORMAL",      # safe with WAL, skips an fsync per commit
+    "PRAGMA cache_size=-16000",       # ~16MB page cache per connection
+    "PRAGMA mmap_size=134217728",     # 128MB memory-mapped reads
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA foreign_keys=ON",         # off by default, per connection
+)
+
+
+class PooledConnection:
+    """Thin proxy around sqlite3.Connection whose close() returns it to the pool."""
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        conn = self.__dict__.get("_conn")
+        if conn is None:
+            raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+        return getattr(conn, name)
+
+    def __enter__(self):
+        return self._conn.__enter__()
+
+    def __exit__(self, *exc):
+        return self._conn.__exit__(*exc)
+
+    def close(self):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            self._pool.release(conn)
+
+    def __del__(self):
+        # A handler that forgot close() still gives its connection back.
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    def __init__(self, path, max_idle=8, timeout=5.0, cached_statements=256):
+        self.path = path
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self.cached_statements = cached_statements
+        self._idle = queue.LifoQueue()
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self.stats = {"opened": 0, "reused": 0, "discarded": 0}
+
+    def _open(self):
+        conn = sqlite3.connect(self.path, timeout=self.timeout,
+                               cached_statements=self.cached_statements,
+                               check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for p in PRAGMAS:
+            conn.execute(p)
+        with self._lock:
+            self.stats["opened"] += 1
+        return conn
+
+    def _check_fork(self):
+        # Connections must not be shared across fork(); start over in the child.
+        if os.getpid() != self._pid:
+            self._pid = os.getpid()
+            self._idle = queue.LifoQueue()
+
+    def connection(self):
+        self._check_fork()
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._open()
+        else:
+            with self._lock:
+                self.stats["reused"] += 1
+        return PooledConnection(self, conn)
+
+    def release(self, conn):
+        if os.getpid() != self._pid:
+            return
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.close()
+            return
+        if self._idle.qsize() >= self.max_idle:
+            conn.close()
+            with self._lock:
+                self.stats["discarded"] += 1
+            return
+        self._idle.put(conn)
+
+    def close_all(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
@@ -0,0 +1,103 @@
+import json
+import sqlite3
+import tarfile
+import time
+
+# Streaming building blocks for library export/import (the routes and the
+# record format live in app.py).
+#
+# Everything here works on iterators and yields bytes in bounded chunks, so an
+# export of any size is produced, sent and read back with constant memory:
+# NDJSON is one JSON document per line, and the tar writer emits each member's
+# header and data straight from its file instead of going through tarfile's
+# buffering (which copies whole members into the output object).
+
+CHUNK_BYTES = 64 * 1024
+TAR_BLOCK = tarfile.BLOCKSIZE
+
+
+class LibraryFormatError(Exception):
+    """A malformed import stream; `line` is the 1-based NDJSON line number."""
+
+    def __init__(self, line, message):
+        super().__init__(f"line {line}: {message}")
+        self.line = line
+        self.message = message
+
+
+def ndjson_chunks(records, chunk_bytes=CHUNK_BYTES):
+    """Encode dicts as NDJSON, yielding roughly chunk_bytes at a time instead of a write per row."""
+    buf = []
+    size = 0
+    for rec in records:
+        line = json.dumps(rec, ensure_ascii=False, separators=(",", ":")).encode() + b"\n"
+        buf.append(line)
+        size += len(line)
+        if size >= chunk_bytes:
+            yield b"".join(buf)
+            buf = []
+            size = 0
+    if buf:
+        yield b"".join(buf)
+
+
+def ndjson_records(stream):
+    """Yield (line_number, dict) from a binary stream of NDJSON, skipping blank lines."""
+    for n, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            rec = json.loads(line)
+        except ValueError as e:
+            raise LibraryFormatError(n, f"invalid JSON ({e})")
+        if not isinstance(rec, dict) or not isinstance(rec.get("type"), str):
+            raise LibraryFormatError(n, "expected an object with a \"type\"")
+        yield n, rec
+
+
+def tar_stream(members, chunk_bytes=CHUNK_BYTES):
+    """Yield a ustar/pax archive of (name, path) pairs, reading each file as it goes.
+
+    A member whose file has disappeared by the time it is reached is skipped.
+    """
+    for name, path in members:
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            continue
+        with f:
+            size = f.seek(0, 2)
+            f.seek(0)
+            info = tarfile.TarInfo(name)
+            info.size = size
+            info.mtime = int(time.time())
+            info.mode = 0o644
+            yield info.tobuf(tarfile.PAX_FORMAT)
+            remaining = size
+            while remaining > 0:
+                chunk = f.read(min(chunk_bytes, remaining))
+                if not chunk:
+                    raise OSError(f"{path} shrank while it was being archived")
+                remaining -= len(chunk)
+                yield chunk
+        if size % TAR_BLOCK:
+            yield b"\0" * (TAR_BLOCK - size % TAR_BLOCK)
+    yield b"\0" * (2 * TAR_BLOCK)
+
+
+def snapshot_db(src_path, dest_path):
+    """Copy a consistent snapshot of a live database to dest_path with SQLite's backup API.
+
+    The copy is done in a single backup step, which reads from one WAL
+    snapshot: writers carry on meanwhile, and nothing they commit partway
+    through ends up in the copy (or forces the backup to restart, as it would
+    with a stepwise backup).
+    """
+    src = sqlite3.connect(src_path)
+    dest = sqlite3.connect(dest_path)
+    try:
+        src.backup(dest)
+    finally:
+        dest.close()
+        src.close()
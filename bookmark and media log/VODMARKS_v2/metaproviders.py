@@ -0,0 +1,275 @@
+import abc
+import gzip
+import http.client
+import json
+import threading
+import time
+from contextlib import nullcontext
+from urllib.parse import quote, urljoin, urlsplit
+
+# Video metadata providers for yt_meta().
+#
+# A full yt-dlp extract_info resolves every format and runs the whole
+# extractor pipeline just to get five fields. Cheaper sources are tried
+# first: the watch page's embedded player JSON has all five, oEmbed has title,
+# uploader and thumbnail. yt-dlp runs only when a field is still missing (or
+# for sites the fast paths don't know). Each provider returns just the fields
+# it resolved; a key present with a None value counts as resolved.
+#
+# Providers take their HTTP fetcher as an argument, so they can be driven from
+# recorded responses without network access (check_metaproviders.py does,
+# against fixtures/metaproviders/).
+
+FIELDS = ("title", "uploader", "upload_date", "duration_seconds", "thumbnail_url")
+HTTP_TIMEOUT = 10
+HTTP_MAX_BYTES = 4 * 1024 * 1024
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) VODMarks"
+
+
+class ProviderError(Exception):
+    pass
+
+
+class HttpClient:
+    """Keep-alive HTTP(S) GETs: each thread reuses one connection per host.
+
+    The metadata queue runs fetches on a small thread pool, so this amounts to
+    a connection pool sized to it, skipping a TCP + TLS handshake per video.
+    """
+
+    def __init__(self, timeout=HTTP_TIMEOUT, max_bytes=HTTP_MAX_BYTES, max_redirects=3):
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.max_redirects = max_redirects
+        self._local = threading.local()
+
+    def _connection(self, scheme, host, port, fresh=False):
+        conns = self._local.__dict__.setdefault("conns", {})
+        key = (scheme, host, port)
+        conn = conns.get(key)
+        if conn is not None and fresh:
+            conn.close()
+            conn = None
+        reused = conn is not None
+        if conn is None:
+            cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+            conn = conns[key] = cls(host, port, timeout=self.timeout)
+        return conn, reused
+
+    def _drop(self, scheme, host, port):
+        conn = self._local.__dict__.get("conns", {}).pop((scheme, host, port), None)
+        if conn is not None:
+            conn.close()
+
+    def get(self, url, headers=None):
+        """Response body of a GET, following redirects; raises ProviderError on HTTP errors."""
+        for _ in range(self.max_redirects + 1):
+            parts = urlsplit(url)
+            target = parts.path or "/"
+            if parts.query:
+                target += "?" + parts.query
+            hdrs = {"User-Agent": USER_AGENT, "Accept-Encoding": "gzip", **(headers or {})}
+            key = (parts.scheme, parts.hostname, parts.port)
+            conn, reused = self._connection(*key)
+            try:
+                conn.request("GET", target, headers=hdrs)
+                resp = conn.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                if not reused:
+                    raise
+                # The server closed an idle keep-alive connection; retry once on a new one
+                conn, _ = self._connection(*key, fresh=True)
+                conn.request("GET", target, headers=hdrs)
+                resp = conn.getresponse()
+            except Exception:
+                self._drop(*key)
+                raise
+            body = resp.read(self.max_bytes + 1)
+            if len(body) > self.max_bytes or resp.will_close:
+                self._drop(*key)
+            if len(body) > self.max_bytes:
+                raise ProviderError("response too large")
+            if resp.status in (301, 302, 303, 307, 308) and resp.getheader("Location"):
+                url = urljoin(url, resp.getheader("Location"))
+                continue
+            if resp.status >= 400:
+                raise ProviderError(f"HTTP {resp.status}")
+            if resp.getheader("Content-Encoding") == "gzip":
+                body = gzip.decompress(body)
+            return body
+        raise ProviderError("too many redirects")
+
+
+class Provider(abc.ABC):
+    """Interface: `fields` it can resolve, supports(url), fetch(url) -> {field: value}."""
+
+    name = "provider"
+    fields = FIELDS
+
+    def supports(self, url):
+        return True
+
+    @abc.abstractmethod
+    def fetch(self, url):
+        """The fields resolved for `url`; raises on failure."""
+
+
+class YouTubePageProvider(Provider):
+    """Reads ytInitialPlayerResponse from the watch page: all five fields in one request."""
+
+    name = "youtube_page"
+    MARKER = b"ytInitialPlayerResponse = "
+
+    def __init__(self, video_id, fetch):
+        self.video_id = video_id   # url -> 11-char id or None
+        self.fetch_url = fetch
+
+    def supports(self, url):
+        return self.video_id(url) is not None
+
+    def fetch(self, url):
+        vid = self.video_id(url)
+        # SOCS skips the EU cookie-consent interstitial, which has no player data
+        html = self.fetch_url(f"https://www.youtube.com/watch?v={vid}&hl=en",
+                              {"Cookie": "SOCS=CAI", "Accept-Language": "en"})
+        return self.parse(html)
+
+    @classmethod
+    def parse(cls, html):
+        start = html.find(cls.MARKER)
+        if start < 0:
+            raise ProviderError("no player response in page")
+        text = html[start + len(cls.MARKER):].decode("utf-8", errors="replace")
+        try:
+            player, _ = json.JSONDecoder().raw_decode(text)
+        except ValueError:
+            raise ProviderError("unreadable player response")
+        details = player.get("videoDetails")
+        if not details:
+            status = (player.get("playabilityStatus") or {}).get("reason") or "video unavailable"
+            raise ProviderError(status)
+        out = {"title": details.get("title"), "uploader": details.get("author")}
+        thumbs = (details.get("thumbnail") or {}).get("thumbnails") or []
+        if thumbs:
+            out["thumbnail_url"] = max(thumbs, key=lambda t: t.get("width") or 0).get("url")
+        if "lengthSeconds" in details:
+            # Live streams report 0 until they end; yt-dlp reports no duration
+            seconds = int(details["lengthSeconds"] or 0)
+            out["duration_seconds"] = None if details.get("isLive") or not seconds else seconds
+        micro = (player.get("microformat") or {}).get("playerMicroformatRenderer") or {}
+        date = micro.get("publishDate") or micro.get("uploadDate")
+        if date:
+            out["upload_date"] = date[:10]
+        return out
+
+
+class OEmbedProvider(Provider):
+    """YouTube's oEmbed endpoint: a small JSON document with title, channel and thumbnail."""
+
+    name = "oembed"
+    fields = ("title", "uploader", "thumbnail_url")
+
+    def __init__(self, video_id, fetch):
+        self.video_id = video_id
+        self.fetch_url = fetch
+
+    def supports(self, url):
+        return self.video_id(url) is not None
+
+    def fetch(self, url):
+        watch = f"https://www.youtube.com/watch?v={self.video_id(url)}"
+        return self.parse(self.fetch_url(f"https://www.youtube.com/oembed?format=json&url={quote(watch, safe='')}",
+                                         None))
+
+    @classmethod
+    def parse(cls, body):
+        try:
+            data = json.loads(body)
+        except ValueError:
+            raise ProviderError("unreadable oEmbed response")
+        if not isinstance(data, dict):
+            raise ProviderError("unreadable oEmbed response")
+        return {"title": data.get("title"), "uploader": data.get("author_name"),
+                "thumbnail_url": data.get("thumbnail_url")}
+
+
+class YtDlpProvider(Provider):
+    """Full yt-dlp extraction; slow, but works for every site yt-dlp supports."""
+
+    name = "yt_dlp"
+
+    def __init__(self, extract):
+        self.extract = extract   # url -> dict with all FIELDS
+
+    def fetch(self, url):
+        return self.extract(url)
+
+
+class ProviderChain:
+    """Try providers in order until every field is resolved; keeps per-provider stats.
+
+    A provider that fails `cooldown_after` times in a row is skipped for
+    `cooldown_seconds`, so a blocked fast path doesn't add a failed request to
+    every lookup.
+    """
+
+    def __init__(self, providers, span=None, cooldown_after=5, cooldown_seconds=300):
+        self.providers = list(providers)
+        self.span = span or (lambda name: nullcontext())
+        self.cooldown_after = cooldown_after
+        self.cooldown_seconds = cooldown_seconds
+        self._lock = threading.Lock()
+        self._stats = {p.name: {"calls": 0, "ok": 0, "failed": 0, "skipped": 0, "seconds": 0.0}
+                       for p in self.providers}
+        self._failures = {p.name: 0 for p in self.providers}
+        self._cooling_until = {p.name: 0.0 for p in self.providers}
+
+    def fetch(self, url):
+        meta = {}
+        error = None
+        for p in self.providers:
+            missing = [f for f in FIELDS if f not in meta]
+            if not missing:
+                break
+            if not p.supports(url) or not set(p.fields) & set(missing):
+                continue
+            with self._lock:
+                if time.monotonic() < self._cooling_until[p.name]:
+                    self._stats[p.name]["skipped"] += 1
+                    continue
+            started = time.perf_counter()
+            try:
+                with self.span(f"meta_{p.name}"):
+                    got = p.fetch(url)
+            except Exception as e:
+                self._record(p.name, time.perf_counter() - started, False)
+                error = e
+                continue
+            self._record(p.name, time.perf_counter() - started, True)
+            for f in missing:
+                if f in got:
+                    meta[f] = got[f]
+        if "title" not in meta:
+            raise error or ProviderError("no provider supports this URL")
+        return {f: meta.get(f) for f in FIELDS}
+
+    def _record(self, name, seconds, ok):
+        with self._lock:
+            s = self._stats[name]
+            s["calls"] += 1
+            s["seconds"] += seconds
+            if ok:
+                s["ok"] += 1
+                self._failures[name] = 0
+            else:
+                s["failed"] += 1
+                self._failures[name] += 1
+                if self._failures[name] >= self.cooldown_after:
+                    self._cooling_until[name] = time.monotonic() + self.cooldown_seconds
+                    self._failures[name] = 0
+
+    def stats(self):
+        with self._lock:
+            return {name: dict(s, avg_ms=round(s["seconds"] * 1000 / s["calls"], 1) if s["calls"] else None,
+                               success_rate=round(s["ok"] / s["calls"], 3) if s["calls"] else None)
+                    for name, s in self._stats.items()}
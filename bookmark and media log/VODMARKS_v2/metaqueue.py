@@ -0,0 +1,123 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Background queue for yt-dlp metadata extraction.
+#
+# Bookmarks are inserted right away with meta_status='pending'; the queue runs
+# the (slow, network-bound) extractor on a small worker pool and hands the
+# result back through the on_success / on_failure callbacks. Jobs are keyed by
+# URL, so pasting the same link twice while it is still being fetched only
+# runs the extractor once and fills in every waiting bookmark.
+
+
+class MetaQueue:
+    def __init__(self, extractor, on_success, on_failure,
+                 workers=4, max_attempts=3, backoff=2.0):
+        self.extractor = extractor
+        self.on_success = on_success
+        self.on_failure = on_failure
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self._lock = threading.Lock()
+        self._inflight = {}   # url -> set of bookmark ids waiting on it
+        self._pool = None
+        self._timers = set()
+        self.stats = {"submitted": 0, "deduped": 0, "succeeded": 0,
+                      "failed": 0, "retried": 0, "callback_errors": 0}
+
+    def _executor(self):
+        # Started lazily so importing app.py (or the reloader parent process)
+        # doesn't spin up threads that never get used.
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers,
+                                            thread_name_prefix="meta")
+        return self._pool
+
+    def submit(self, url, bookmark_id):
+        """Queue a metadata fetch. Returns False if the URL was already in flight."""
+        with self._lock:
+            self.stats["submitted"] += 1
+            waiting = self._inflight.get(url)
+            if waiting is not None:
+                waiting.add(bookmark_id)
+                self.stats["deduped"] += 1
+                return False
+            self._inflight[url] = {bookmark_id}
+            self._executor().submit(self._run, url, 1)
+        return True
+
+    def _run(self, url, attempt):
+        try:
+            meta = self.extractor(url)
+        except Exception as e:
+            if attempt < self.max_attempts:
+                delay = self.backoff * (2 ** (attempt - 1))
+                with self._lock:
+                    self.stats["retried"] += 1
+                    t = threading.Timer(delay, self._retry, (url, attempt + 1))
+                    t.daemon = True
+                    self._timers.add(t)
+                t.start()
+                return
+            self._deliver(url, None, str(e) or e.__class__.__name__)
+            return
+        self._deliver(url, meta, None)
+
+    def _deliver(self, url, meta, error):
+        ids = self._finish(url)
+        if meta is not None:
+            try:
+                self.on_success(ids, meta)
+            except Exception as e:
+                # Storing the result failed (say, the database was locked);
+                # record a failure rather than leaving the bookmarks pending
+                error = f"could not save metadata: {str(e) or e.__class__.__name__}"
+            else:
+                with self._lock:
+                    self.stats["succeeded"] += 1
+                return
+        with self._lock:
+            self.stats["failed"] += 1
+        try:
+            self.on_failure(ids, error)
+        except Exception:
+            with self._lock:
+                self.stats["callback_errors"] += 1
+
+    def _retry(self, url, attempt):
+        with self._lock:
+            self._timers.discard(threading.current_thread())
+            if self._pool is None:
+                return
+            self._pool.submit(self._run, url, attempt)
+
+    def _finish(self, url):
+        with self._lock:
+            return sorted(self._inflight.pop(url, ()))
+
+    def pending(self):
+        with self._lock:
+            return {url: sorted(ids) for url, ids in self._inflight.items()}
+
+    def wait(self, timeout=None):
+        """Block until no jobs are in flight. Mostly useful for tests and scripts."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                if not self._inflight:
+                    return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+
+    def shutdown(self, wait=True, cancel_pending=False):
+        """Stop the workers; cancel_pending drops jobs that haven't started yet."""
+        with self._lock:
+            for t in self._timers:
+                t.cancel()
+            self._timers.clear()
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=cancel_pending)
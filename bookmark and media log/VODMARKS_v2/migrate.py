@@ -1,33 +1,36 @@
-import sqlite3
-import os
-
-# Update your existing database to support both YouTube and media entries
-DB_PATH = os.path.join(os.path.dirname(__file__), "vodmarks.db")
-
-def migrate():
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    
-    # Check if entry_type column exists
-    cur.execute("PRAGMA table_info(bookmarks)")
-    columns = [row[1] for row in cur.fetchall()]
-    
-    if 'entry_type' not in columns:
-        print("Adding entry_type column...")
-        cur.execute("ALTER TABLE bookmarks ADD COLUMN entry_type TEXT DEFAULT 'youtube'")
-        conn.commit()
-        print("✓ Added entry_type column")
+import argparse
+
+import app as vodmarks
+
+# Bring vodmarks.db up to the current schema. The app (and serve.py) do this
+# on startup too; run it by hand to see what is pending or to migrate a large
+# database ahead of time. Steps are defined in app.py, the engine is
+# migrations.py.
+#
+#   python migrate.py            # apply pending migrations
+#   python migrate.py --status   # list applied / pending steps
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Apply pending VODMarks schema migrations.")
+    ap.add_argument("--status", action="store_true", help="show the schema version and pending steps")
+    args = ap.parse_args()
+
+    if args.status:
+        conn = vodmarks.db()
+        current = vodmarks.schema.version(conn)
+        conn.close()
+        print(f"{vodmarks.DB_PATH}: schema version {current} of {vodmarks.schema.latest}")
+        for version, description, _ in vodmarks.schema.steps:
+            print(f"  {'applied' if version <= current else 'pending'}  {version:3d}  {description}")
+        return
+
+    applied = vodmarks.prepare_db()
+    if applied:
+        print(f"Migrated to schema version {applied[-1]}.")
     else:
-        print("✓ entry_type column already exists")
-    
-    # Make url column nullable if needed (SQLite doesn't support ALTER COLUMN, so we'll just note it)
-    print("\nNote: URL column constraint remains. New media entries will have NULL urls.")
-    print("Migration complete! You can now add both YouTube VODs and simple media entries.")
-    
-    conn.close()
+        print(f"Already at schema version {vodmarks.schema.latest}; nothing to do.")
+
 
 if __name__ == "__main__":
-    if not os.path.exists(DB_PATH):
-        print("No database found. Run app.py first to create a new database.")
-    else:
-        migrate()
+    main()
@@ -0,0 +1,138 @@
+import time
+
+# Versioned schema migrations.
+#
+# The database records how far it has been migrated in PRAGMA user_version.
+# Steps are registered in order with @migrations.step(n, "description"); run()
+# applies every step above the stored version, each in its own BEGIN IMMEDIATE
+# transaction that also bumps user_version, so a step either lands completely
+# or not at all and never runs twice. On an up-to-date database run() only
+# reads the version and writes nothing.
+#
+# Steps receive (conn, after): `after` collects callables to run once the
+# step's transaction has committed (e.g. deleting files the new rows replace).
+#
+# Steps run with foreign key enforcement off, as SQLite's table-rebuild
+# procedure requires (dropping a parent table would otherwise cascade into its
+# children), and PRAGMA foreign_key_check must come back clean before a step
+# commits.
+
+REBUILD_BATCH_ROWS = 50_000
+PROGRESS_EVERY_SECONDS = 2.0
+
+
+class MigrationError(Exception):
+    pass
+
+
+class Migrations:
+    def __init__(self, log=print, batch_rows=REBUILD_BATCH_ROWS):
+        self.log = log
+        self.batch_rows = batch_rows
+        self.steps = []   # (version, description, fn), versions 1..n in order
+
+    def step(self, version, description):
+        def register(fn):
+            if version != len(self.steps) + 1:
+                raise MigrationError(f"migration {version} registered out of order")
+            self.steps.append((version, description, fn))
+            return fn
+        return register
+
+    @property
+    def latest(self):
+        return len(self.steps)
+
+    def version(self, conn):
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+
+    def pending(self, conn):
+        current = self.version(conn)
+        return [s for s in self.steps if s[0] > current]
+
+    def run(self, conn, target=None):
+        """Apply pending steps up to `target` (default: all). Returns the versions applied."""
+        target = self.latest if target is None else target
+        current = self.version(conn)
+        if current > self.latest:
+            raise MigrationError(f"database is at schema version {current}, newer than this code ({self.latest})")
+        applied = []
+        if current >= target:
+            return applied
+        # Can't be changed inside a transaction, so it is switched off around all the steps
+        enforced = conn.execute("PRAGMA foreign_keys").fetchone()[0]
+        conn.execute("PRAGMA foreign_keys=OFF")
+        try:
+            for version, description, fn in self.steps:
+                if version <= current or version > target:
+                    continue
+                conn.execute("BEGIN IMMEDIATE")
+                # Another process may have got here first while we waited for the lock
+                if self.version(conn) >= version:
+                    conn.rollback()
+                    continue
+                self.log(f"Migrating database to version {version}: {description}...")
+                started = time.perf_counter()
+                after = []
+                try:
+                    fn(conn, after)
+                    violations = conn.execute("PRAGMA foreign_key_check").fetchall()
+                    if violations:
+                        table, rowid, parent = violations[0][:3]
+                        raise MigrationError(f"migration {version} left {len(violations)} rows with dangling "
+                                             f"foreign keys (first: {table} rowid {rowid} -> {parent})")
+                    conn.execute(f"PRAGMA user_version = {int(version)}")
+                    conn.commit()
+                except BaseException:
+                    conn.rollback()
+                    raise
+                for f in after:
+                    f()
+                self.log(f"  done in {time.perf_counter() - started:.2f}s")
+                applied.append(version)
+        finally:
+            if enforced:
+                conn.execute("PRAGMA foreign_keys=ON")
+        return applied
+
+    def rebuild_table(self, conn, table, create_sql, columns):
+        """Recreate `table` from create_sql (which must create `{table}_new`), copying `columns` over.
+
+        SQLite can't alter a column's type or constraints in place. A column
+        is a name copied as is, or a (name, expression) pair computed from the
+        old row. Rows are copied in rowid batches inside the caller's
+        transaction so progress can be reported on large tables; indexes and
+        triggers on the old table are dropped with it and must be recreated by
+        later steps. An AUTOINCREMENT counter carries over, so ids of deleted
+        rows aren't handed out again.
+        """
+        conn.execute(f"DROP TABLE IF EXISTS {table}_new")
+        conn.execute(create_sql)
+        names = ", ".join(c if isinstance(c, str) else c[0] for c in columns)
+        exprs = ", ".join(c if isinstance(c, str) else c[1] for c in columns)
+        has_seq = conn.execute("SELECT 1 FROM sqlite_master WHERE name='sqlite_sequence'").fetchone()
+        seq = has_seq and conn.execute("SELECT seq FROM sqlite_sequence WHERE name=?", (table,)).fetchone()
+        total = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        copied = 0
+        last = -(1 << 63)
+        started = reported = time.perf_counter()
+        while True:
+            upto = conn.execute(f"SELECT MAX(rowid) FROM (SELECT rowid FROM {table} WHERE rowid > ? "
+                                f"ORDER BY rowid LIMIT ?)", (last, self.batch_rows)).fetchone()[0]
+            if upto is None:
+                break
+            cur = conn.execute(f"INSERT INTO {table}_new ({names}) SELECT {exprs} FROM {table} "
+                               f"WHERE rowid > ? AND rowid <= ?", (last, upto))
+            copied += cur.rowcount
+            last = upto
+            now = time.perf_counter()
+            if now - reported >= PROGRESS_EVERY_SECONDS:
+                self.log(f"  {table}: {copied}/{total} rows ({copied * 100 // max(total, 1)}%), "
+                         f"{now - started:.1f}s")
+                reported = now
+        conn.execute(f"DROP TABLE {table}")
+        conn.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+        if seq:
+            conn.execute("UPDATE sqlite_sequence SET seq = max(seq, ?) WHERE name=?", (seq[0], table))
+        self.log(f"  {table}: rebuilt {copied} rows in {time.perf_counter() - started:.1f}s")
+        return copied
@@ -0,0 +1,383 @@
+import cProfile
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, request
+from flask.json.provider import DefaultJSONProvider
+
+# Opt-in request instrumentation for app.py.
+#
+# When enabled, every request records its wall time, response size and the
+# time spent in named spans (SQL, JSON encoding, tree building, yt-dlp). The
+# totals go out as a Server-Timing header on the response and accumulate in
+# process-wide histograms that /metrics renders in Prometheus text format.
+# SQL is measured by wrapping the connections db() hands out; fetch time and
+# row counts are attributed to the statement that produced the cursor.
+# Requests can also be sampled under cProfile, and the profile is kept on disk
+# when the request turns out to be slower than a threshold.
+#
+# Disabled (the default), wrap() returns connections untouched, span() is a
+# no-op and no request hooks are installed.
+
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_LABEL_MAX = 160
+PROFILE_KEEP = 50   # newest cProfile dumps kept in profile_dir
+
+_PLACEHOLDERS_RE = re.compile(r"\?(?:\s*,\s*\?)+")
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+def query_label(sql):
+    """Whitespace-collapsed statement text, with IN (?,?,...) lists folded, for a metric label."""
+    sql = _PLACEHOLDERS_RE.sub("?,...", " ".join(sql.split()))
+    return sql if len(sql) <= QUERY_LABEL_MAX else sql[:QUERY_LABEL_MAX - 3] + "..."
+
+
+def _verb(sql):
+    return sql.lstrip().split(None, 1)[0].upper() if sql.strip() else ""
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.labels = name, help, labels
+        self.values = {}
+
+    def inc(self, key, amount=1):
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for key, v in sorted(self.values.items()):
+            yield f"{self.name}{_labels(self.labels, key)} {v:g}"
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=SECONDS_BUCKETS):
+        self.name, self.help, self.labels, self.buckets = name, help, labels, buckets
+        self.values = {}   # key -> [bucket counts..., sum, count]
+
+    def observe(self, key, value):
+        v = self.values.get(key)
+        if v is None:
+            v = self.values[key] = [0] * (len(self.buckets) + 2)
+        for i, le in enumerate(self.buckets):
+            if value <= le:
+                v[i] += 1
+        v[-2] += value
+        v[-1] += 1
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        names = self.labels + ("le",)
+        for key, v in sorted(self.values.items()):
+            for le, n in zip(self.buckets, v):
+                yield f"{self.name}_bucket{_labels(names, key + (f'{le:g}',))} {n}"
+            yield f"{self.name}_bucket{_labels(names, key + ('+Inf',))} {v[-1]}"
+            yield f"{self.name}_sum{_labels(self.labels, key)} {v[-2]:.6f}"
+            yield f"{self.name}_count{_labels(self.labels, key)} {v[-1]}"
+
+
+class RequestStats:
+    """Span totals for the request running on this thread."""
+
+    def __init__(self, route):
+        self.route = route
+        self.spans = {}   # name -> [seconds, count]
+        self.queries = 0
+        self.rows = 0
+
+    def add(self, name, seconds, count=1):
+        s = self.spans.setdefault(name, [0.0, 0])
+        s[0] += seconds
+        s[1] += count
+
+    def server_timing(self, total):
+        parts = [f"app;dur={total * 1000:.1f}"]
+        for name, (secs, count) in self.spans.items():
+            desc = f"{self.queries} queries, {self.rows} rows" if name == "db" else f"{count}x"
+            parts.append(f'{name};dur={secs * 1000:.1f};desc="{desc}"')
+        return ", ".join(parts)
+
+
+class TimedCursor:
+    """Cursor proxy that charges fetch time and fetched rows to its statement."""
+
+    def __init__(self, profiler, cur, query, verb):
+        self._profiler = profiler
+        self._cur = cur
+        self._query = query
+        self._verb = verb
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+    def _fetched(self, seconds, rows):
+        self._profiler.record_sql(self._query, self._verb, seconds, rows, executed=False)
+
+    def fetchone(self):
+        t = time.perf_counter()
+        row = self._cur.fetchone()
+        self._fetched(time.perf_counter() - t, row is not None)
+        return row
+
+    def fetchmany(self, size=None):
+        t = time.perf_counter()
+        rows = self._cur.fetchmany(size) if size is not None else self._cur.fetchmany()
+        self._fetched(time.perf_counter() - t, len(rows))
+        return rows
+
+    def fetchall(self):
+        t = time.perf_counter()
+        rows = self._cur.fetchall()
+        self._fetched(time.perf_counter() - t, len(rows))
+        return rows
+
+    def __iter__(self):
+        # Accumulate locally and report once; timing per row adds up on big scans
+        seconds, rows = 0.0, 0
+        it = iter(self._cur)
+        try:
+            while True:
+                t = time.perf_counter()
+                try:
+                    row = next(it)
+                except StopIteration:
+                    seconds += time.perf_counter() - t
+                    return
+                seconds += time.perf_counter() - t
+                rows += 1
+                yield row
+        finally:
+            self._fetched(seconds, rows)
+
+
+class TimedConnection:
+    """Proxy for a pooled connection that times every statement it runs."""
+
+    def __init__(self, profiler, conn):
+        self._profiler = profiler
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        t = time.perf_counter()
+        try:
+            return self._conn.__exit__(*exc)
+        finally:
+            self._profiler.record_sql("COMMIT" if exc[0] is None else "ROLLBACK", "COMMIT",
+                                      time.perf_counter() - t, 0)
+
+    def _run(self, method, sql, *args):
+        t = time.perf_counter()
+        cur = getattr(self._conn, method)(sql, *args)
+        elapsed = time.perf_counter() - t
+        verb = _verb(sql)
+        query = query_label(sql)
+        writes = verb in ("INSERT", "UPDATE", "DELETE", "REPLACE")
+        self._profiler.record_sql(query, verb, elapsed, max(cur.rowcount, 0) if writes else 0)
+        return TimedCursor(self._profiler, cur, query, verb)
+
+    def execute(self, sql, *args):
+        return self._run("execute", sql, *args)
+
+    def executemany(self, sql, *args):
+        return self._run("executemany", sql, *args)
+
+    def executescript(self, sql):
+        return self._run("executescript", sql)
+
+    def commit(self):
+        t = time.perf_counter()
+        self._conn.commit()
+        self._profiler.record_sql("COMMIT", "COMMIT", time.perf_counter() - t, 0)
+
+    def rollback(self):
+        t = time.perf_counter()
+        self._conn.rollback()
+        self._profiler.record_sql("ROLLBACK", "ROLLBACK", time.perf_counter() - t, 0)
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """jsonify() with its encoding time recorded as the 'json' span."""
+
+    profiler = None
+
+    def dumps(self, obj, **kwargs):
+        with self.profiler.span("json"):
+            return super().dumps(obj, **kwargs)
+
+
+class Profiler:
+    def __init__(self, enabled=False, profile_dir=None, slow_ms=0, sample_rate=0.1):
+        self.enabled = enabled
+        self.profile_dir = profile_dir
+        # cProfile dumps: off unless both a directory and a threshold are set
+        self.slow_ms = slow_ms
+        self.sample_rate = sample_rate
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.requests = Histogram("vodmarks_request_seconds", "Request wall time by route.",
+                                  ("method", "route", "status"))
+        self.response_bytes = Histogram("vodmarks_response_bytes", "Response body size by route.",
+                                        ("route",), BYTES_BUCKETS)
+        self.spans = Histogram("vodmarks_span_seconds",
+                               "Time in named sections (json, tree, yt_meta, ...), in and out of requests.",
+                               ("span",))
+        self.sql = Histogram("vodmarks_sql_query_seconds", "Statement execute time.", ("verb", "query"))
+        self.sql_fetch = Counter("vodmarks_sql_fetch_seconds_total", "Time spent fetching rows.",
+                                 ("verb", "query"))
+        self.sql_rows = Counter("vodmarks_sql_rows_total", "Rows fetched or written.", ("verb", "query"))
+        self.route_sql = Counter("vodmarks_route_sql_seconds_total", "SQL execute and fetch time by route.",
+                                 ("route",))
+        self.route_queries = Counter("vodmarks_route_sql_queries_total", "Statements run by route.", ("route",))
+        self.profiles_written = 0
+
+    # ── request hooks ──
+
+    def install(self, app):
+        if not self.enabled:
+            return
+        TimedJSONProvider.profiler = self
+        app.json = TimedJSONProvider(app)
+        app.before_request(self._before)
+        app.after_request(self._after)
+        app.teardown_request(self._teardown)
+
+    def _before(self):
+        rule = request.url_rule
+        stats = RequestStats(rule.rule if rule is not None else "<unmatched>")
+        self._local.stats = stats
+        g._profiling = {"stats": stats, "started": time.perf_counter(), "profile": None, "done": False}
+        if self.slow_ms and self.profile_dir and random.random() < self.sample_rate:
+            prof = cProfile.Profile()
+            try:
+                prof.enable()
+            except ValueError:  # another profiler already owns this thread
+                return
+            g._profiling["profile"] = prof
+
+    def _after(self, response):
+        state = g.get("_profiling")
+        if state is not None:
+            size = response.content_length
+            if size is None and not response.is_streamed:
+                size = response.calculate_content_length()
+            total = self._finish(state, response.status_code, size)
+            response.headers["Server-Timing"] = state["stats"].server_timing(total)
+        return response
+
+    def _teardown(self, exc):
+        state = g.get("_profiling")
+        if state is not None and not state["done"]:
+            self._finish(state, 500, None)
+        self._local.stats = None
+
+    def _finish(self, state, status, size):
+        total = time.perf_counter() - state["started"]
+        state["done"] = True
+        stats = state["stats"]
+        prof = state["profile"]
+        if prof is not None:
+            prof.disable()
+            if total * 1000 >= self.slow_ms:
+                self._dump(prof, stats.route, total)
+        with self._lock:
+            self.requests.observe((request.method, stats.route, str(status)), total)
+            if size is not None:
+                self.response_bytes.observe((stats.route,), size)
+        return total
+
+    def _dump(self, prof, route, total):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{slug}-{total * 1000:.0f}ms-{threading.get_ident()}.prof"
+        prof.dump_stats(os.path.join(self.profile_dir, name))
+        with self._lock:
+            self.profiles_written += 1
+        dumps = sorted(os.path.join(self.profile_dir, n) for n in os.listdir(self.profile_dir)
+                       if n.endswith(".prof"))
+        for old in dumps[:-PROFILE_KEEP]:
+            try:
+                os.remove(old)
+            except FileNotFoundError:
+                pass
+
+    # ── recording ──
+
+    def current(self):
+        return getattr(self._local, "stats", None)
+
+    @contextmanager
+    def span(self, name):
+        if not self.enabled:
+            yield
+            return
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - t
+            stats = self.current()
+            if stats is not None:
+                stats.add(name, elapsed)
+            with self._lock:
+                self.spans.observe((name,), elapsed)
+
+    def record_sql(self, query, verb, seconds, rows, executed=True):
+        stats = self.current()
+        route = stats.route if stats is not None else "<background>"
+        if stats is not None:
+            stats.add("db", seconds, 1 if executed else 0)
+            stats.queries += executed
+            stats.rows += rows
+        key = (verb, query)
+        with self._lock:
+            if executed:
+                self.sql.observe(key, seconds)
+                self.route_queries.inc((route,))
+            else:
+                self.sql_fetch.inc(key, seconds)
+            if rows:
+                self.sql_rows.inc(key, rows)
+            self.route_sql.inc((route,), seconds)
+
+    def wrap(self, conn):
+        return TimedConnection(self, conn) if self.enabled else conn
+
+    def render(self, gauges=()):
+        """Prometheus text exposition; gauges are extra (name, help, value) triples."""
+        lines = []
+        with self._lock:
+            for metric in (self.requests, self.response_bytes, self.spans, self.sql,
+                           self.sql_fetch, self.sql_rows, self.route_sql, self.route_queries):
+                lines.extend(metric.render())
+            lines.append("# HELP vodmarks_profiles_written_total cProfile dumps kept for slow requests.")
+            lines.append("# TYPE vodmarks_profiles_written_total counter")
+            lines.append(f"vodmarks_profiles_written_total {self.profiles_written}")
+        for name, help, value in gauges:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value:g}")
+        return "\n".join(lines) + "\n"
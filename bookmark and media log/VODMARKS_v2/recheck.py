@@ -0,0 +1,104 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# Background re-checking of bookmark metadata.
+#
+# A daemon thread wakes every `poll` seconds (or on wake()) and asks scan()
+# for work. scan() belongs to app.py and owns the policy: which rows are due,
+# the admin settings, and a database lease so that only one process across all
+# server workers scans at a time. It returns (jobs, rate_per_second, more):
+# jobs run on a small worker pool, started no faster than the rate, and the
+# next scan waits for the batch to finish so work never piles up. `more` means
+# the batch was full and the next scan should follow right away.
+#
+# Nothing here runs on a request thread; routes only change settings and call
+# wake().
+
+
+class RecheckScheduler:
+    def __init__(self, scan, check, workers=2, poll=30.0):
+        self.scan = scan
+        self.check = check      # job -> truthy on success
+        self.workers = workers
+        self.poll = poll
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pool = None
+        self.stats = {"scans": 0, "checked": 0, "failed": 0, "scan_errors": 0,
+                      "last_scan_at": None, "last_error": None}
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        with self._lock:
+            if self.running:
+                return False
+            self._stopping.clear()
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="meta-recheck")
+            self._thread = threading.Thread(target=self._loop, name="meta-recheck-scheduler", daemon=True)
+            self._thread.start()
+        return True
+
+    def wake(self):
+        """Scan now instead of at the next poll."""
+        self._wake.set()
+
+    def stop(self, timeout=10):
+        """Stop scanning; jobs not yet started are dropped, running ones get `timeout` seconds."""
+        with self._lock:
+            thread, pool = self._thread, self._pool
+            self._thread = self._pool = None
+        self._stopping.set()
+        self._wake.set()
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        if thread is not None:
+            thread.join(timeout)
+
+    def _loop(self):
+        while not self._stopping.is_set():
+            more = False
+            try:
+                jobs, rate, more = self.scan()
+            except Exception as e:
+                jobs = []
+                with self._lock:
+                    self.stats["scan_errors"] += 1
+                    self.stats["last_error"] = str(e) or e.__class__.__name__
+            if jobs:
+                with self._lock:
+                    self.stats["scans"] += 1
+                    self.stats["last_scan_at"] = time.time()
+                self._run(jobs, rate)
+            if not (jobs and more):
+                self._wake.wait(self.poll)
+            self._wake.clear()
+
+    def _run(self, jobs, rate):
+        gap = 1.0 / rate if rate else 0.0
+        futures = []
+        for i, job in enumerate(jobs):
+            if self._stopping.is_set():
+                break
+            if i and gap and self._stopping.wait(gap):
+                break
+            try:
+                futures.append(self._pool.submit(self._check, job))
+            except (RuntimeError, AttributeError):  # pool shut down by stop()
+                break
+        wait(futures)
+
+    def _check(self, job):
+        try:
+            ok = self.check(job)
+        except Exception as e:
+            ok = False
+            with self._lock:
+                self.stats["last_error"] = str(e) or e.__class__.__name__
+        with self._lock:
+            self.stats["checked" if ok else "failed"] += 1
@@ -0,0 +1,129 @@
+import argparse
+import os
+import signal
+import sys
+
+import app as vodmarks
+
+# Production entry point.
+#
+#   python serve.py --workers 4 --threads 8 --port 5177
+#
+# On Linux/macOS this runs gunicorn with threaded (gthread) workers: the
+# master process sets up the schema once, under prepare_db()'s file lock,
+# before forking any worker; the first worker requeues metadata fetches a
+# previous run left pending; every worker runs the metadata re-check scheduler,
+# of which one at a time scans; SIGTERM lets in-flight requests finish (event
+# streams are ended so clients reconnect elsewhere) before background work is
+# stopped. On Windows, where gunicorn doesn't run, it falls back to waitress:
+# one process, --threads request threads.
+#
+# Every option can also be set through the environment (VODMARKS_HOST,
+# VODMARKS_PORT, VODMARKS_WORKERS, VODMARKS_THREADS, VODMARKS_GRACEFUL_TIMEOUT).
+# Each /api/events stream holds a thread for as long as the page is open, so
+# leave threads well above the number of open tabs.
+
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+
+def env(name, default, type=str):
+    return type(os.environ.get(name, default))
+
+
+def on_starting(server):
+    vodmarks.prepare_db()
+
+
+def post_worker_init(worker):
+    # gunicorn's own SIGTERM handler only stops the accept loop; also start
+    # draining so /readyz fails and long-lived event streams return.
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def on_term(signum, frame):
+        vodmarks.begin_shutdown()
+        if callable(previous):
+            previous(signum, frame)
+
+    signal.signal(signal.SIGTERM, on_term)
+    # Ages count up from 1 as the master spawns workers; only the first one
+    # requeues, so pending bookmarks aren't fetched once per worker.
+    if worker.age == 1:
+        vodmarks.requeue_pending_meta()
+    # Every worker runs the re-check scheduler; a lease in the database keeps
+    # one of them scanning, and another takes over if that worker goes away.
+    vodmarks.start_meta_recheck()
+
+
+def worker_exit(server, worker):
+    vodmarks.shutdown()
+
+
+def run_gunicorn(args):
+    from gunicorn.app.base import BaseApplication
+
+    class VODMarksApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"{args.host}:{args.port}")
+            self.cfg.set("workers", args.workers)
+            self.cfg.set("threads", args.threads)
+            self.cfg.set("worker_class", "gthread")
+            self.cfg.set("graceful_timeout", args.graceful_timeout)
+            self.cfg.set("timeout", args.timeout)
+            self.cfg.set("accesslog", "-" if args.access_log else None)
+            self.cfg.set("on_starting", on_starting)
+            self.cfg.set("post_worker_init", post_worker_init)
+            self.cfg.set("worker_exit", worker_exit)
+
+        def load(self):
+            return vodmarks.app
+
+    VODMarksApplication().run()
+
+
+def run_waitress(args):
+    from waitress import create_server
+
+    if args.workers > 1:
+        print("waitress runs a single process; ignoring --workers, use --threads instead.")
+    vodmarks.prepare_db()
+    vodmarks.requeue_pending_meta()
+    vodmarks.start_meta_recheck()
+    server = create_server(vodmarks.app, host=args.host, port=args.port, threads=args.threads)
+
+    def on_term(signum, frame):
+        vodmarks.begin_shutdown()
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, on_term)
+    print(f"Serving on http://{args.host}:{args.port} ({args.threads} threads)")
+    try:
+        server.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        vodmarks.begin_shutdown()
+        server.close()
+        vodmarks.shutdown()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Run VODMarks under a production WSGI server.")
+    ap.add_argument("--host", default=env("VODMARKS_HOST", "127.0.0.1"))
+    ap.add_argument("--port", type=int, default=env("VODMARKS_PORT", 5177, int))
+    ap.add_argument("--workers", type=int, default=env("VODMARKS_WORKERS", DEFAULT_WORKERS, int))
+    ap.add_argument("--threads", type=int, default=env("VODMARKS_THREADS", 8, int))
+    ap.add_argument("--graceful-timeout", type=int, default=env("VODMARKS_GRACEFUL_TIMEOUT", 30, int),
+                    help="seconds in-flight requests get to finish on shutdown")
+    ap.add_argument("--timeout", type=int, default=120, help="restart a worker stuck this long (gunicorn)")
+    ap.add_argument("--access-log", action="store_true")
+    ap.add_argument("--server", choices=("gunicorn", "waitress"),
+                    default="waitress" if sys.platform == "win32" else "gunicorn")
+    args = ap.parse_args()
+    if args.server == "gunicorn":
+        run_gunicorn(args)
+    else:
+        run_waitress(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import gzip
+import math
+import os
+import re
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, namedtuple
+
+# Streaming SRT reader.
+#
+# Works line by line on a binary file object so memory stays flat however long
+# the transcript is. Tolerates a UTF-8 BOM, CRLF line endings, missing or
+# garbage cue numbers, missing blank lines between cues and stray text outside
+# any cue -- all of which show up in yt-dlp / auto-generated subtitles.
+
+# offset is the byte position of the cue's timing line, so a reader can seek
+# straight back to it.
+Cue = namedtuple("Cue", "start_ms end_ms text offset")
+
+_TIME = r"(?:(\d+):)?(\d{1,2}):(\d{1,2})[,.](\d{1,3})"
+_TIMING_RE = re.compile(_TIME + r"\s*-->\s*" + _TIME)
+_TAG_RE = re.compile(r"<[^>]*>|\{\\[^}]*\}")
+
+
+def _ms(h, m, s, frac):
+    return ((int(h or 0) * 60 + int(m)) * 60 + int(s)) * 1000 + int(frac.ljust(3, "0")[:3])
+
+
+def parse_timing(line):
+    """(start_ms, end_ms) for a '00:03:37,120 --> 00:03:40,840' line, or None."""
+    m = _TIMING_RE.search(line)
+    if not m:
+        return None
+    g = m.groups()
+    return _ms(*g[:4]), _ms(*g[4:])
+
+
+def clean_text(text):
+    """Drop <i>/<font> and {\\an8}-style styling tags."""
+    return _TAG_RE.sub("", text).strip()
+
+
+def open_srt(path):
+    """Binary stream for a stored subtitle; blobs in the content store are gzipped."""
+    return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+
+
+def iter_cues(fileobj, offset=0):
+    """Yield Cue tuples from a binary SRT stream positioned at byte `offset`."""
+    start = end = cue_offset = None
+    lines = []
+    pos = offset
+    first = offset == 0
+    for raw in fileobj:
+        line_pos = pos
+        pos += len(raw)
+        line = raw.decode("utf-8", errors="replace")
+        if first:
+            line = line.lstrip("\ufeff")
+            first = False
+        line = line.rstrip("\r\n")
+        timing = parse_timing(line)
+        if timing:
+            if start is not None:
+                # No blank line before this cue; a trailing bare number is its index
+                if lines and lines[-1].strip().isdigit():
+                    lines.pop()
+                yield Cue(start, end, "\n".join(lines).strip(), cue_offset)
+            start, end = timing
+            cue_offset = line_pos
+            lines = []
+        elif not line.strip():
+            if start is not None:
+                yield Cue(start, end, "\n".join(lines).strip(), cue_offset)
+                start = None
+                lines = []
+        elif start is not None:
+            lines.append(line)
+    if start is not None:
+        yield Cue(start, end, "\n".join(lines).strip(), cue_offset)
+
+
+class CueIndex:
+    """Compact per-file index: parallel arrays of start/end times and byte offsets.
+
+    Built in one streaming pass (text is not kept), sorted by start time. Range
+    queries bisect the arrays and then seek into the file for just the cues
+    they need, so neither building nor querying reads the file into memory.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        st = os.stat(path)
+        self.key = (st.st_mtime_ns, st.st_size)
+        entries = []
+        with open_srt(path) as f:
+            for c in iter_cues(f):
+                entries.append((c.start_ms, c.end_ms, c.offset))
+        # Files are nearly always in time order already; remember whether they
+        # are so reads can stream sequentially instead of seeking per cue.
+        self.in_file_order = all(entries[i][0] <= entries[i + 1][0] for i in range(len(entries) - 1))
+        if not self.in_file_order:
+            entries.sort()
+        self.starts = array("q", (e[0] for e in entries))
+        self.ends = array("q", (e[1] for e in entries))
+        self.offsets = array("q", (e[2] for e in entries))
+        # Running max of end times: monotonic, so it can be bisected to find the
+        # first cue that could still be showing at a given time.
+        self.max_ends = array("q")
+        m = -1
+        for e in self.ends:
+            m = max(m, e)
+            self.max_ends.append(m)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def range(self, from_ms, to_ms):
+        """Index positions [lo, hi) of cues that may overlap [from_ms, to_ms)."""
+        lo = bisect_right(self.max_ends, from_ms)
+        hi = bisect_left(self.starts, to_ms)
+        return lo, max(lo, hi)
+
+    def read(self, from_ms, to_ms, limit=None):
+        """Yield (index, Cue) for cues overlapping [from_ms, to_ms), in start order."""
+        lo, hi = self.range(from_ms, to_ms)
+        if lo >= hi:
+            return
+        found = 0
+        # Gzipped blobs seek by decompressing forward, so the sequential
+        # in-file-order path matters even more for them.
+        with open_srt(self.path) as f:
+            if self.in_file_order:
+                f.seek(self.offsets[lo])
+                cues = iter_cues(f, self.offsets[lo])
+                pairs = zip(range(lo, hi), cues)
+            else:
+                pairs = ((i, self._read_one(f, i)) for i in range(lo, hi))
+            for i, cue in pairs:
+                if cue is None or cue.end_ms <= from_ms:
+                    continue
+                yield i, cue
+                found += 1
+                if limit is not None and found >= limit:
+                    return
+
+    def _read_one(self, f, i):
+        f.seek(self.offsets[i])
+        return next(iter_cues(f, self.offsets[i]), None)
+
+
+_index_cache = OrderedDict()
+_index_lock = threading.Lock()
+INDEX_CACHE_SIZE = 32
+
+
+def cue_index(path):
+    """CueIndex for a file, cached by path and rebuilt when the file changes."""
+    st = os.stat(path)
+    key = (st.st_mtime_ns, st.st_size)
+    with _index_lock:
+        idx = _index_cache.get(path)
+        if idx is not None and idx.key == key:
+            _index_cache.move_to_end(path)
+            return idx
+    idx = CueIndex(path)
+    with _index_lock:
+        _index_cache[path] = idx
+        _index_cache.move_to_end(path)
+        while len(_index_cache) > INDEX_CACHE_SIZE:
+            _index_cache.popitem(last=False)
+    return idx
+
+
+def parse_time_arg(value):
+    """Milliseconds from a query-string time: seconds ('227', '227.5') or 'HH:MM:SS[,mmm]'."""
+    if value is None or value == "":
+        return None
+    value = value.strip()
+    parts = value.replace(",", ".").split(":") if ":" in value else [value]
+    secs = 0.0
+    for p in parts:
+        secs = secs * 60 + float(p)
+    # float() also takes 'inf' and 'nan', and 1e308 seconds overflows as ms
+    if not math.isfinite(secs * 1000):
+        raise ValueError(f"time out of range: {value!r}")
+    return int(secs * 1000)
+
+
+def format_timestamp(ms):
+    """00:03:47 style timestamp for display and jump links."""
+    s = int(ms) // 1000
+    return f"{s // 3600:02d}:{s % 3600 // 60:02d}:{s % 60:02d}"
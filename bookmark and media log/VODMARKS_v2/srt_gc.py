@@ -0,0 +1,31 @@
+import argparse
+
+import app as vodmarks
+
+# Delete subtitle blobs in srt_store/ that no bookmark points at any more,
+# plus stray blob files with no database row and half-written .tmp files left
+# by a crash mid-upload. The app sweeps unreferenced blobs (and stale .tmp
+# files) itself after bookmarks or folders are deleted; this catches what a
+# sweep missed (say, the server stopped first) and the stray files.
+#
+#   python srt_gc.py            # collect
+#   python srt_gc.py --dry-run  # only report what would go
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Garbage-collect unreferenced subtitle blobs.")
+    ap.add_argument("--dry-run", action="store_true", help="report without deleting anything")
+    args = ap.parse_args()
+
+    vodmarks.prepare_db()
+    conn = vodmarks.db()
+    conn.execute("BEGIN IMMEDIATE")
+    count, freed = vodmarks.gc_srt_blobs(conn, dry_run=args.dry_run)
+    conn.commit()
+    conn.close()
+    verb = "would remove" if args.dry_run else "removed"
+    print(f"{verb} {count} blobs ({freed / 1024:.1f} KiB)")
+
+
+if __name__ == "__main__":
+    main()
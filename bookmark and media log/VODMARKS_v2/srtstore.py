@@ -0,0 +1,107 @@
+import gzip
+import hashlib
+import os
+import tempfile
+
+# Content-addressed subtitle storage.
+#
+# Every uploaded .srt is stored once, gzip-compressed, under the SHA-256 of its
+# uncompressed bytes: <base>/<subdir>/ab/abcdef....srt.gz. Bookmarks point at
+# the blob through their srt_file_path (the relative path returned by put()),
+# so the same subtitle attached to several bookmarks takes up space once.
+# Reference counts and garbage collection live with the database in app.py.
+
+CHUNK = 64 * 1024
+
+
+class BlobStore:
+    def __init__(self, base_dir, subdir="srt_store", level=9):
+        self.base_dir = base_dir
+        self.subdir = subdir
+        self.level = level
+        os.makedirs(os.path.join(base_dir, subdir), exist_ok=True)
+
+    def relpath(self, digest):
+        # Always forward slashes: the path is stored in the database
+        return f"{self.subdir}/{digest[:2]}/{digest}.srt.gz"
+
+    def abspath(self, digest):
+        return os.path.join(self.base_dir, self.subdir, digest[:2], f"{digest}.srt.gz")
+
+    def is_blob(self, relative_path):
+        return (relative_path or "").replace("\\", "/").startswith(self.subdir + "/")
+
+    def stage(self, fileobj):
+        """Compress and hash a binary stream into a temp file; returns (digest, size, tmp_path).
+
+        This is the slow part of storing a blob, and it touches nothing other
+        writers can see: place() then moves the file into the store, discard()
+        throws it away.
+        """
+        h = hashlib.sha256()
+        size = 0
+        fd, tmp = tempfile.mkstemp(dir=os.path.join(self.base_dir, self.subdir), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb",
+                                                            compresslevel=self.level, mtime=0) as gz:
+                while True:
+                    chunk = fileobj.read(CHUNK)
+                    if not chunk:
+                        break
+                    h.update(chunk)
+                    size += len(chunk)
+                    gz.write(chunk)
+        except BaseException:
+            self.discard(tmp)
+            raise
+        return h.hexdigest(), size, tmp
+
+    def place(self, digest, tmp):
+        """Move a staged blob into place, or drop it if an identical blob is stored; returns (stored_size, relpath)."""
+        dest = self.abspath(digest)
+        if os.path.exists(dest):
+            self.discard(tmp)
+        else:
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            os.replace(tmp, dest)
+        return os.path.getsize(dest), self.relpath(digest)
+
+    def discard(self, tmp):
+        try:
+            os.remove(tmp)
+        except FileNotFoundError:
+            pass
+
+    def put(self, fileobj):
+        """Store a binary stream; returns (digest, size, stored_size, relpath)."""
+        digest, size, tmp = self.stage(fileobj)
+        try:
+            stored_size, rel = self.place(digest, tmp)
+        except BaseException:
+            self.discard(tmp)
+            raise
+        return digest, size, stored_size, rel
+
+    def remove(self, digest):
+        try:
+            os.remove(self.abspath(digest))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def digests_on_disk(self):
+        """Yield (digest, mtime) for every blob file, for orphan sweeps."""
+        root = os.path.join(self.base_dir, self.subdir)
+        for dirpath, _, names in os.walk(root):
+            for n in names:
+                if n.endswith(".srt.gz"):
+                    yield n[:-len(".srt.gz")], os.path.getmtime(os.path.join(dirpath, n))
+
+    def stale_temp_files(self, cutoff):
+        """Yield (path, size) for staged files not modified since `cutoff` (left by a crash between stage() and place())."""
+        with os.scandir(os.path.join(self.base_dir, self.subdir)) as entries:
+            for e in entries:
+                if e.name.endswith(".tmp") and e.is_file():
+                    st = e.stat()
+                    if st.st_mtime < cutoff:
+                        yield e.path, st.st_size
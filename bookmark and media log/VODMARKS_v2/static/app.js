@@ -13,6 +13,7 @@ let currentCards = [];        // raw data for current view
 let selectedIds = new Set();  // bulk selection
 let viewMode = "card";        // "card" | "list"
 let sidebarOpen = false;
+let liveConnected = false;    // /api/events stream is open; it patches the UI in place
 
 const COLLAPSE_KEY = "vodmarks.collapsedFolderIds.v2";
 const THEME_KEY = "vodmarks.theme";
@@ -23,6 +24,7 @@ const collapsed = loadCollapsedSet();
 initTheme();
 initViewMode();
 loadAll();
+connectEvents();
 
 // ══════════════════════════════════════════════════════
 //  Theme Toggle (#14)
@@ -73,6 +75,7 @@ function setViewMode(mode) {
   const cards = document.getElementById("cards");
   if (cards) {
     cards.classList.toggle("listMode", mode === "list");
+    remeasureCards();
   }
 }
 
@@ -149,6 +152,7 @@ async function showMoveModal(title) {
     let selectedFolderId = null;
     const extra = document.getElementById("modalExtra");
     let html = '<div class="folderPicker">';
+    html += '<div class="folderPickerItem" data-fid="new">+ New folder\u2026</div>';
     for (const f of folders) {
       html += `<div class="folderPickerItem" data-fid="${f.id}">${escapeHtml(f.breadcrumb)}</div>`;
     }
@@ -159,7 +163,8 @@ async function showMoveModal(title) {
       item.onclick = () => {
         extra.querySelectorAll(".folderPickerItem").forEach(i => i.classList.remove("fpSelected"));
         item.classList.add("fpSelected");
-        selectedFolderId = parseInt(item.getAttribute("data-fid"));
+        const fid = item.getAttribute("data-fid");
+        selectedFolderId = fid === "new" ? "new" : parseInt(fid);
       };
     });
 
@@ -247,12 +252,13 @@ function setCollapsed(id, value) {
 // ══════════════════════════════════════════════════════
 
 async function loadAll() {
-  const r = await fetch("/api/tree");
+  // Both endpoints send ETags, so unchanged payloads come back as 304s
+  const [r, m] = await Promise.all([fetch("/api/tree"), fetch("/api/merged")]);
   const data = await r.json();
   ROOT = data.root;
   TREE = data.tree || [];
+  indexTree();
 
-  const m = await fetch("/api/merged");
   const md = await m.json().catch(() => ({}));
   MERGED = md.groups || [];
 
@@ -322,14 +328,10 @@ function renderFolderNodes(nodes, el) {
       name.classList.remove("dragOver");
       const bid = e.dataTransfer.getData("text/plain");
       if (!bid) return;
-      await fetch(`/api/bookmark/${bid}`, {
-        method: "PATCH",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ folder_id: n.id })
-      });
+      const j = await apiBatch([{ op: "bookmark.move", id: parseInt(bid), folder_id: n.id }]);
+      if (!j.ok) return showToast(j.error || "Move failed", "error");
       showToast(`Moved to ${n.name}`, "success");
-      await refreshCurrentView();
-      await loadAll();
+      await syncAfterMutation();
     });
 
     // Actions container (#4 visible rename + delete)
@@ -354,7 +356,7 @@ function renderFolderNodes(nodes, el) {
         const j = await res.json().catch(() => ({}));
         if (!res.ok) return showToast(j.error || "Rename failed", "error");
         showToast(`Renamed to "${next}"`, "success");
-        await loadAll();
+        await syncAfterMutation(false);
       };
       actions.appendChild(renameBtn);
     }
@@ -385,10 +387,10 @@ function renderFolderNodes(nodes, el) {
         currentMode = "folder";
         currentMergedKey = null;
         document.getElementById("title").textContent = "Select folder";
-        document.getElementById("cards").innerHTML = "";
+        clearCards(document.getElementById("cards"));
       }
       showToast(`Deleted "${n.name}"`, "success");
-      await loadAll();
+      await syncAfterMutation(false);
     };
     actions.appendChild(del);
 
@@ -437,11 +439,7 @@ async function selectFolder(id, nameText) {
   document.getElementById("title").textContent = nameText;
   clearSelection();
   renderSidebar(); // update active state
-
-  const r = await fetch(`/api/bookmarks?folder_id=${id}`);
-  const data = await r.json();
-  currentCards = data;
-  applySearchAndSort();
+  await loadFirstPage();
 }
 
 async function selectMerged(key, displayName) {
@@ -451,80 +449,222 @@ async function selectMerged(key, displayName) {
   document.getElementById("title").textContent = `${displayName} (merged)`;
   clearSelection();
   renderSidebar();
-
-  const r = await fetch(`/api/merged_bookmarks?key=${encodeURIComponent(key)}`);
-  const data = await r.json();
-  currentCards = data;
-  applySearchAndSort();
+  await loadFirstPage();
 }
 
 async function refreshCurrentView() {
-  if (currentMode === "folder" && current) {
-    const r = await fetch(`/api/bookmarks?folder_id=${current}`);
-    currentCards = await r.json();
-  } else if (currentMode === "merged" && currentMergedKey) {
-    const r = await fetch(`/api/merged_bookmarks?key=${encodeURIComponent(currentMergedKey)}`);
-    currentCards = await r.json();
-  }
-  applySearchAndSort();
+  // Reload as many rows as are already on screen so the list doesn't shrink
+  await loadFirstPage(Math.max(PAGE_SIZE, currentCards.length));
 }
 
 // ══════════════════════════════════════════════════════
-//  Search & Sort (#2, #13)
+//  Paginated Loading, Search & Sort (#2, #13)
 // ══════════════════════════════════════════════════════
 
-function applySearchAndSort() {
-  let list = [...currentCards];
-
-  // Search filter
-  const query = (document.getElementById("searchInput").value || "").trim().toLowerCase();
-  if (query) {
-    list = list.filter(b => {
-      const title = (b.title || "").toLowerCase();
-      const uploader = (b.uploader || "").toLowerCase();
-      const url = (b.url || "").toLowerCase();
-      return title.includes(query) || uploader.includes(query) || url.includes(query);
-    });
-  }
+const PAGE_SIZE = 100;
+let pageCursor = null;   // next_cursor from the last page, null when done
+let pageLoading = false;
+let pageSeq = 0;         // bumps on every reset so stale responses are dropped
 
-  // Sort
+function pageUrl(limit, cursor) {
+  const params = new URLSearchParams();
+  if (currentMode === "folder") params.set("folder_id", current);
+  else params.set("key", currentMergedKey);
   const sortVal = document.getElementById("sortSelect").value;
-  list = sortList(list, sortVal);
+  if (sortVal && sortVal !== "default") params.set("sort", sortVal);
+  const query = (document.getElementById("searchInput").value || "").trim();
+  if (query) params.set("q", query);
+  params.set("limit", limit);
+  if (cursor) params.set("cursor", cursor);
+  const base = currentMode === "folder" ? "/api/bookmarks" : "/api/merged_bookmarks";
+  return `${base}?${params}`;
+}
 
-  renderCards(list);
+function hasView() {
+  return (currentMode === "folder" && current) || (currentMode === "merged" && currentMergedKey);
 }
 
+async function loadFirstPage(limit = PAGE_SIZE) {
+  const seq = ++pageSeq;
+  pageCursor = null;
+  if (!hasView()) {
+    currentCards = [];
+    renderCards([]);
+    return;
+  }
+  pageLoading = true;
+  const r = await fetch(pageUrl(limit, null));
+  const data = await r.json();
+  if (seq !== pageSeq) return;
+  pageLoading = false;
+  currentCards = data.items || [];
+  pageCursor = data.next_cursor;
+  renderCards(currentCards);
+}
+
+async function loadNextPage() {
+  if (pageLoading || !pageCursor || !hasView()) return;
+  const seq = pageSeq;
+  pageLoading = true;
+  const r = await fetch(pageUrl(PAGE_SIZE, pageCursor));
+  const data = await r.json();
+  if (seq !== pageSeq) return;
+  pageLoading = false;
+  const items = data.items || [];
+  pageCursor = data.next_cursor;
+  currentCards = currentCards.concat(items);
+  renderCards(items, true);
+}
+
+function applySearchAndSort() { loadFirstPage(); }
+
 function applySort() { applySearchAndSort(); }
 window.applySort = applySort;
 
-function sortList(list, sortVal) {
-  const sorted = [...list];
-  switch (sortVal) {
-    case "title_asc": sorted.sort((a, b) => (a.title || "").localeCompare(b.title || "")); break;
-    case "title_desc": sorted.sort((a, b) => (b.title || "").localeCompare(a.title || "")); break;
-    case "date_asc": sorted.sort((a, b) => (a.upload_date || "").localeCompare(b.upload_date || "")); break;
-    case "date_desc": sorted.sort((a, b) => (b.upload_date || "").localeCompare(a.upload_date || "")); break;
-    case "duration_asc": sorted.sort((a, b) => (a.duration_seconds || 0) - (b.duration_seconds || 0)); break;
-    case "duration_desc": sorted.sort((a, b) => (b.duration_seconds || 0) - (a.duration_seconds || 0)); break;
+// Search input handler (debounced; filtering happens server-side)
+let searchTimer = null;
+document.getElementById("searchInput").addEventListener("input", () => {
+  clearTimeout(searchTimer);
+  searchTimer = setTimeout(applySearchAndSort, 250);
+});
+
+// Enter searches the whole library (titles, media log, subtitle text)
+document.getElementById("searchInput").addEventListener("keydown", (e) => {
+  if (e.key !== "Enter") return;
+  e.preventDefault();
+  clearTimeout(searchTimer);
+  const q = (e.target.value || "").trim();
+  if (q) searchLibrary(q);
+});
+
+// ══════════════════════════════════════════════════════
+//  Library Search
+// ══════════════════════════════════════════════════════
+
+const HIT_LABELS = { bookmark: "VOD", media: "Media", cue: "Subtitle" };
+
+async function searchLibrary(q) {
+  currentMode = "search";
+  current = null;
+  currentMergedKey = null;
+  ++pageSeq;
+  pageCursor = null;
+  document.getElementById("title").textContent = `Search: "${q}"`;
+  clearSelection();
+  renderSidebar();
+  const r = await fetch(`/api/search?q=${encodeURIComponent(q)}&limit=50`);
+  const data = await r.json().catch(() => ({}));
+  renderSearchHits(data.hits || []);
+}
+
+// Snippets come back with \x02/\x03 around matched terms
+function snippetHtml(s) {
+  return escapeHtml(s).replace(/\x02/g, "<mark>").replace(/\x03/g, "</mark>");
+}
+
+function renderSearchHits(hits) {
+  const el = document.getElementById("cards");
+  clearCards(el);
+  currentCards = [];
+  if (hits.length === 0) {
+    el.innerHTML = `<div class="emptyState">
+      <div class="emptyIcon">\uD83D\uDD0D</div>
+      <div class="emptyTitle">No results found</div>
+      <div class="emptyHint">Nothing in the library matches that search.</div>
+    </div>`;
+    return;
   }
-  return sorted;
+  hits.forEach((h, i) => {
+    const row = document.createElement("div");
+    row.className = "searchHit cardAnimateIn";
+    row.style.animationDelay = `${Math.min(i, 20) * 0.04}s`;
+    row.setAttribute("role", "listitem");
+    let extra = "";
+    if (h.kind === "cue") {
+      extra = h.jump_url
+        ? `<a href="${escapeHtml(h.jump_url)}" target="_blank" rel="noreferrer">Jump to ${escapeHtml(h.timestamp)}</a>`
+        : escapeHtml(h.timestamp);
+    } else if (h.kind === "bookmark") {
+      extra = escapeHtml(h.folder_breadcrumb || "");
+    } else {
+      extra = `${escapeHtml(h.category)} \u2022 ${escapeHtml(STATUS_SHORT[h.status] || h.status)}`;
+    }
+    row.innerHTML = `
+      <span class="searchHitKind">${HIT_LABELS[h.kind] || h.kind}</span>
+      <div class="searchHitBody">
+        <div class="cardTitle">${escapeHtml(h.title || h.url || "")}</div>
+        <div class="searchHitSnippet">${snippetHtml(h.snippet || "")}</div>
+        <div class="cardMeta">${extra}</div>
+      </div>`;
+    row.querySelector(".cardTitle").onclick = () => openSearchHit(h);
+    el.appendChild(row);
+  });
 }
 
-// Search input handler
-document.getElementById("searchInput").addEventListener("input", () => {
-  applySearchAndSort();
-});
+function openSearchHit(h) {
+  if (h.kind === "media") {
+    switchTab("medialog");
+    selectCategory(h.category);
+    return;
+  }
+  const crumb = h.folder_breadcrumb || "";
+  selectFolder(h.folder_id, crumb.split(" > ").pop() || "Folder");
+}
 
 // ══════════════════════════════════════════════════════
 //  Card Rendering (#5 empty states, #7 alt text, #10 breadcrumbs, #12 checkboxes, #3 drag)
 // ══════════════════════════════════════════════════════
 
-function renderCards(list) {
-  const el = document.getElementById("cards");
+// Only the cards in and near the viewport are in the DOM, however many pages
+// are loaded; two spacers stand in for the rest. Cards vary in height (VOD vs
+// media, breadcrumbs, wrapped titles), so each card's height is measured
+// while it is rendered and reused once it scrolls out; cards never rendered
+// are assumed to be as tall as the last one of their kind. The next page is
+// fetched when the window reaches the end of what is loaded.
+
+const CARD_OVERSCAN = 800;     // px of cards kept rendered above and below the viewport
+let cardHeights = new Map();   // bookmark id -> measured height, margin included
+let cardEstimate = {};         // "card" / "mediaCard" -> last measured height
+let cardRendered = new Map();  // bookmark id -> {el, item} currently in the DOM
+let cardAnimate = false;       // animate the first window of a freshly loaded view
+let cardFrame = 0;
+
+const cardResizeObserver = new ResizeObserver((entries) => {
+  for (const e of entries) {
+    const c = e.target;
+    if (!c.isConnected) continue;
+    const h = c.offsetHeight + (parseFloat(getComputedStyle(c).marginBottom) || 0);
+    cardHeights.set(Number(c.dataset.cardId), h);
+    cardEstimate[c.className.split(" ")[0]] = h;
+  }
+  scheduleCardWindow();
+});
+
+function clearCards(el) {
+  for (const node of cardRendered.values()) cardResizeObserver.unobserve(node.el);
+  cardRendered.clear();
+  el.classList.remove("cardWindow");
   el.innerHTML = "";
+}
+
+// Heights change with the view mode and the layout breakpoints
+function remeasureCards() {
+  cardHeights.clear();
+  cardEstimate = {};
+  // Observing again reports every rendered card's current size
+  for (const node of cardRendered.values()) {
+    cardResizeObserver.unobserve(node.el);
+    cardResizeObserver.observe(node.el);
+  }
+  scheduleCardWindow();
+}
+
+function renderCards(list, append = false) {
+  const el = document.getElementById("cards");
   el.classList.toggle("listMode", viewMode === "list");
 
-  if (!Array.isArray(list) || list.length === 0) {
+  if (!append && (!Array.isArray(list) || list.length === 0)) {
+    clearCards(el);
     const q = (document.getElementById("searchInput").value || "").trim();
     if (q) {
       el.innerHTML = `<div class="emptyState">
@@ -548,69 +688,150 @@ function renderCards(list) {
     return;
   }
 
-  for (let i = 0; i < list.length; i++) {
-    const b = list[i];
-    const c = document.createElement("div");
-    c.setAttribute("role", "listitem");
-
-    if (b.entry_type === "media") {
-      c.className = "mediaCard" + (selectedIds.has(b.id) ? " selected" : "");
-      const breadcrumbHtml = b.folder_breadcrumb ? `<div class="cardBreadcrumb">${escapeHtml(b.folder_breadcrumb)}</div>` : "";
-      c.innerHTML = `
-        <input type="checkbox" class="cardCheckbox" data-id="${b.id}" ${selectedIds.has(b.id) ? "checked" : ""} aria-label="Select ${escapeHtml(b.title)}">
-        <div class="mediaCardContent">
-          <span class="mediaTitle">${escapeHtml(b.title)} - ${escapeHtml(b.upload_date)}</span>
-          ${breadcrumbHtml}
-          <button class="miniBtn" data-id="${b.id}" aria-label="Delete ${escapeHtml(b.title)}">Delete</button>
-        </div>`;
+  if (!el.classList.contains("cardWindow")) {
+    clearCards(el);
+    el.classList.add("cardWindow");
+    const top = document.createElement("div"), bottom = document.createElement("div");
+    top.className = bottom.className = "cardSpacer";
+    el.append(top, bottom);
+  }
+  if (!append) cardAnimate = true;
+  renderCardWindow();
+}
+
+function cardHeight(b) {
+  const kind = b.entry_type === "media" ? "mediaCard" : "card";
+  return cardHeights.get(b.id) ?? cardEstimate[kind] ?? (viewMode === "list" ? 64 : 128);
+}
+
+function renderCardWindow() {
+  const el = document.getElementById("cards");
+  if (!el.classList.contains("cardWindow")) return;
+  const main = el.closest(".main");
+  const offset = main.getBoundingClientRect().top - el.getBoundingClientRect().top;
+  const from = offset - CARD_OVERSCAN;
+  const to = offset + main.clientHeight + CARD_OVERSCAN;
+
+  let start = 0, y = 0;
+  while (start < currentCards.length && y + cardHeight(currentCards[start]) <= from) {
+    y += cardHeight(currentCards[start++]);
+  }
+  const above = y;
+  let end = start;
+  while (end < currentCards.length && y < to) y += cardHeight(currentCards[end++]);
+  let below = 0;
+  for (let i = end; i < currentCards.length; i++) below += cardHeight(currentCards[i]);
+
+  // Keep cards that are still in the window (and unchanged); create the rest.
+  // Scroll anchoring keeps the viewport steady when cards above it are swapped.
+  const top = el.firstElementChild, bottom = el.lastElementChild;
+  const visible = new Map();
+  let prev = top, animIdx = 0;
+  for (let i = start; i < end; i++) {
+    const b = currentCards[i];
+    let node = cardRendered.get(b.id);
+    if (node && node.item !== b) {
+      cardResizeObserver.unobserve(node.el);
+      node.el.remove();
+      node = null;
+    }
+    if (!node) {
+      const c = createCard(b, cardAnimate ? animIdx++ : null);
+      attachCardHandlers(c);
+      cardResizeObserver.observe(c);
+      node = { el: c, item: b };
+    }
+    if (prev.nextSibling !== node.el) prev.after(node.el);
+    prev = node.el;
+    visible.set(b.id, node);
+    cardRendered.delete(b.id);
+  }
+  for (const node of cardRendered.values()) {
+    cardResizeObserver.unobserve(node.el);
+    node.el.remove();
+  }
+  cardRendered = visible;
+  cardAnimate = false;
+  top.style.height = `${above}px`;
+  bottom.style.height = `${below}px`;
+
+  if (pageCursor && end === currentCards.length && y < to) loadNextPage();
+}
+
+function scheduleCardWindow() {
+  if (!cardFrame) cardFrame = requestAnimationFrame(() => { cardFrame = 0; renderCardWindow(); });
+}
+
+document.querySelector(".main").addEventListener("scroll", scheduleCardWindow, { passive: true });
+window.addEventListener("resize", () => later("cardresize", remeasureCards));
+
+function createCard(b, animIdx = null) {
+  const c = document.createElement("div");
+  c.setAttribute("role", "listitem");
+  c.dataset.cardId = b.id;
+
+  if (b.entry_type === "media") {
+    c.className = "mediaCard" + (selectedIds.has(b.id) ? " selected" : "");
+    const breadcrumbHtml = b.folder_breadcrumb ? `<div class="cardBreadcrumb">${escapeHtml(b.folder_breadcrumb)}</div>` : "";
+    c.innerHTML = `
+      <input type="checkbox" class="cardCheckbox" data-id="${b.id}" ${selectedIds.has(b.id) ? "checked" : ""} aria-label="Select ${escapeHtml(b.title)}">
+      <div class="mediaCardContent">
+        <span class="mediaTitle">${escapeHtml(b.title)} - ${escapeHtml(b.upload_date)}</span>
+        ${breadcrumbHtml}
+        <button class="miniBtn" data-id="${b.id}" aria-label="Delete ${escapeHtml(b.title)}">Delete</button>
+      </div>`;
+  } else {
+    c.className = "card" + (selectedIds.has(b.id) ? " selected" : "");
+    const dur = fmt(b.duration_seconds || 0);
+    const hasSrt = !!b.srt_file_path;
+    const altText = escapeHtml(b.title || "Video thumbnail");
+
+    let srtButtons = "";
+    if (hasSrt) {
+      srtButtons = `
+        <button class="srtViewBtn" data-id="${b.id}">View SRT</button>
+        <button class="srtDelBtn" data-id="${b.id}">Delete SRT</button>`;
     } else {
-      c.className = "card" + (selectedIds.has(b.id) ? " selected" : "");
-      const dur = fmt(b.duration_seconds || 0);
-      const hasSrt = !!b.srt_file_path;
-      const altText = escapeHtml(b.title || "Video thumbnail");
-
-      let srtButtons = "";
-      if (hasSrt) {
-        srtButtons = `
-          <button class="srtViewBtn" data-id="${b.id}">View SRT</button>
-          <button class="srtDelBtn" data-id="${b.id}">Delete SRT</button>`;
-      } else {
-        srtButtons = `<button class="srtBtn" data-id="${b.id}">Upload SRT</button>`;
-      }
+      srtButtons = `<button class="srtBtn" data-id="${b.id}">Upload SRT</button>`;
+    }
 
-      const breadcrumbHtml = b.folder_breadcrumb ? `<div class="cardBreadcrumb">${escapeHtml(b.folder_breadcrumb)}</div>` : "";
-
-      c.innerHTML = `
-        <input type="checkbox" class="cardCheckbox" data-id="${b.id}" ${selectedIds.has(b.id) ? "checked" : ""} aria-label="Select ${altText}">
-        <img src="${b.thumbnail_url || ""}" alt="${altText}" loading="lazy">
-        <div class="cardBody">
-          <div class="cardTitle">${escapeHtml(b.title || b.url)}</div>
-          <div class="cardMeta">${escapeHtml(b.uploader || "")}</div>
-          <div class="cardMeta">${escapeHtml(b.upload_date || "")} \u2022 ${dur}</div>
-          ${breadcrumbHtml}
-          <div class="cardLinks">
-            <a href="${b.url}" target="_blank" rel="noreferrer">Open</a>
-            ${srtButtons}
-            <button class="miniBtn" data-id="${b.id}" aria-label="Delete entry">Delete</button>
-          </div>
+    const breadcrumbHtml = b.folder_breadcrumb ? `<div class="cardBreadcrumb">${escapeHtml(b.folder_breadcrumb)}</div>` : "";
+
+    c.innerHTML = `
+      <input type="checkbox" class="cardCheckbox" data-id="${b.id}" ${selectedIds.has(b.id) ? "checked" : ""} aria-label="Select ${altText}">
+      <img src="${b.thumbnail_url ? `/thumb/${b.id}?w=320` : ""}" alt="${altText}" loading="lazy">
+      <div class="cardBody">
+        <div class="cardTitle">${escapeHtml(b.title || b.url)}</div>
+        ${b.meta_status === "pending" ? `<div class="cardMeta">Fetching metadata\u2026</div>` : ""}
+        ${b.meta_status === "failed" ? `<div class="cardMeta" title="${escapeHtml(b.meta_error || "")}">Metadata unavailable</div>` : ""}
+        <div class="cardMeta">${escapeHtml(b.uploader || "")}</div>
+        <div class="cardMeta">${escapeHtml(b.upload_date || "")} \u2022 ${dur}</div>
+        ${breadcrumbHtml}
+        <div class="cardLinks">
+          <a href="${b.url}" target="_blank" rel="noreferrer">Open</a>
+          ${srtButtons}
+          <button class="miniBtn" data-id="${b.id}" aria-label="Delete entry">Delete</button>
         </div>
-        <input type="file" accept=".srt" class="srtFileInput" data-id="${b.id}" style="display: none;">`;
-    }
+      </div>
+      <input type="file" accept=".srt" class="srtFileInput" data-id="${b.id}" style="display: none;">`;
+  }
 
-    // Drag-and-drop (#3)
-    c.setAttribute("draggable", "true");
-    c.addEventListener("dragstart", (e) => {
-      e.dataTransfer.setData("text/plain", String(b.id));
-      c.classList.add("dragging");
-    });
-    c.addEventListener("dragend", () => c.classList.remove("dragging"));
+  // Drag-and-drop (#3)
+  c.setAttribute("draggable", "true");
+  c.addEventListener("dragstart", (e) => {
+    e.dataTransfer.setData("text/plain", String(b.id));
+    c.classList.add("dragging");
+  });
+  c.addEventListener("dragend", () => c.classList.remove("dragging"));
 
+  if (animIdx !== null) {
     c.classList.add("cardAnimateIn");
-    c.style.animationDelay = `${i * 0.04}s`;
-    el.appendChild(c);
+    c.style.animationDelay = `${Math.min(animIdx, 20) * 0.04}s`;
   }
+  return c;
+}
 
-  // ── Event handlers ──
+function attachCardHandlers(el) {
 
   // Checkbox selection (#12)
   el.querySelectorAll(".cardCheckbox").forEach(cb => {
@@ -625,8 +846,7 @@ function renderCards(list) {
   // SRT buttons
   el.querySelectorAll(".srtBtn").forEach(btn => {
     btn.onclick = () => {
-      const id = btn.getAttribute("data-id");
-      el.querySelector(`.srtFileInput[data-id="${id}"]`).click();
+      btn.closest(".card").querySelector(".srtFileInput").click();
     };
   });
 
@@ -641,7 +861,7 @@ function renderCards(list) {
       if (!ok) return;
       await fetch(`/api/bookmark/${id}/srt`, { method: "DELETE" });
       showToast("SRT file deleted", "success");
-      await refreshCurrentView();
+      await syncAfterMutation();
     };
   });
 
@@ -658,7 +878,7 @@ function renderCards(list) {
         const j = await res.json().catch(() => ({}));
         if (!res.ok) return showToast(j.error || "Upload failed.", "error");
         showToast("SRT uploaded successfully", "success");
-        await refreshCurrentView();
+        await syncAfterMutation();
       } catch (err) {
         showToast("Upload failed: " + err.message, "error");
       }
@@ -673,8 +893,7 @@ function renderCards(list) {
       if (!ok) return;
       await fetch(`/api/bookmark/${id}`, { method: "DELETE" });
       showToast("Entry deleted", "success");
-      await refreshCurrentView();
-      await loadAll();
+      await syncAfterMutation();
     };
   });
 }
@@ -712,16 +931,12 @@ async function bulkDelete() {
   if (!ok) return;
 
   showToast("Deleting...", "info");
-  await fetch("/api/bookmarks/bulk_delete", {
-    method: "POST",
-    headers: { "Content-Type": "application/json" },
-    body: JSON.stringify({ ids: Array.from(selectedIds) })
-  });
+  const j = await apiBatch([{ op: "bookmark.delete", ids: Array.from(selectedIds) }]);
+  if (!j.ok) return showToast(j.error || "Delete failed", "error");
   showToast(`Deleted ${selectedIds.size} entries`, "success");
   selectedIds.clear();
   updateBulkBar();
-  await refreshCurrentView();
-  await loadAll();
+  await syncAfterMutation();
 }
 
 async function bulkMove() {
@@ -729,17 +944,33 @@ async function bulkMove() {
   const folderId = await showMoveModal(`Move ${selectedIds.size} entries`);
   if (!folderId) return;
 
+  const ops = [];
+  if (folderId === "new") {
+    // Create the folder and move into it in one transaction
+    const name = prompt("New folder name");
+    if (!name) return;
+    const parent = currentMode === "folder" ? (current || ROOT) : ROOT;
+    ops.push({ op: "folder.create", name, parent_id: parent });
+  }
+  ops.push({ op: "bookmark.move", ids: Array.from(selectedIds), folder_id: folderId === "new" ? "$0.id" : folderId });
+
   showToast("Moving...", "info");
-  await fetch("/api/bookmarks/bulk_move", {
-    method: "POST",
-    headers: { "Content-Type": "application/json" },
-    body: JSON.stringify({ ids: Array.from(selectedIds), folder_id: folderId })
-  });
+  const j = await apiBatch(ops);
+  if (!j.ok) return showToast(j.error || "Move failed", "error");
   showToast(`Moved ${selectedIds.size} entries`, "success");
   selectedIds.clear();
   updateBulkBar();
-  await refreshCurrentView();
-  await loadAll();
+  await syncAfterMutation();
+}
+
+// Run mutations through /api/batch: one request, one transaction, all-or-nothing
+async function apiBatch(ops) {
+  const res = await fetch("/api/batch", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ ops })
+  });
+  return res.json().catch(() => ({ ok: false, error: `Request failed (${res.status})` }));
 }
 
 window.bulkDelete = bulkDelete;
@@ -787,7 +1018,7 @@ async function newFolder() {
     body: JSON.stringify({ name, parent_id: currentMode === "folder" ? (current || ROOT) : ROOT })
   });
   showToast(`Folder "${name}" created`, "success");
-  await loadAll();
+  await syncAfterMutation(false);
 }
 
 async function addVod() {
@@ -797,7 +1028,6 @@ async function addVod() {
   const url = document.getElementById("url").value.trim();
   if (!url) return;
 
-  showToast("Fetching metadata...", "info");
   const res = await fetch("/api/bookmark", {
     method: "POST",
     headers: { "Content-Type": "application/json" },
@@ -808,15 +1038,193 @@ async function addVod() {
     showToast(j.error || "Failed to add VOD.", "error");
     return;
   }
-  showToast("VOD added successfully!", "success");
+  showToast("VOD added, fetching metadata...", "info");
   document.getElementById("url").value = "";
+  await syncAfterMutation();
+  if (j.id && j.meta_status === "pending") {
+    if (liveConnected) addedHere.add(j.id);
+    else pollMetaStatus(j.id);
+  }
+}
+
+// Poll the metadata queue until the bookmark's fetch finishes, then refresh
+async function pollMetaStatus(id, delay = 1000) {
+  await new Promise(r => setTimeout(r, delay));
+  const res = await fetch(`/api/bookmark/${id}/meta_status`);
+  if (!res.ok) return;
+  const j = await res.json().catch(() => ({}));
+  if (j.meta_status === "pending") return pollMetaStatus(id, Math.min(delay * 1.5, 5000));
+  if (j.meta_status === "failed") {
+    showToast(`Couldn't fetch metadata: ${j.meta_error || "unknown error"}`, "error");
+  } else {
+    showToast("VOD metadata loaded", "success");
+  }
   await refreshCurrentView();
-  await loadAll();
 }
 
 window.newFolder = newFolder;
 window.addVod = addVod;
 
+// ══════════════════════════════════════════════════════
+//  Live Updates (Server-Sent Events)
+// ══════════════════════════════════════════════════════
+
+// /api/events streams one event per row change. Cards, sidebar counts and the
+// media log are patched from the event payloads; only changes that can move
+// rows across a sorted/filtered page refetch the current view.
+
+let folderIndex = new Map();   // folder id -> tree node
+const addedHere = new Set();   // bookmarks added from this tab; toast when their metadata lands
+const liveTimers = {};
+
+function connectEvents() {
+  if (!window.EventSource) return;
+  const es = new EventSource("/api/events");
+  es.onopen = () => { liveConnected = true; };
+  // EventSource reconnects by itself and resumes from Last-Event-ID
+  es.onerror = () => { liveConnected = false; };
+  const on = (kind, fn) => es.addEventListener(kind, (e) => fn(JSON.parse(e.data)));
+  on("bookmark.added", onBookmarkAdded);
+  on("bookmark.moved", onBookmarkMoved);
+  on("bookmark.updated", patchCard);
+  on("bookmark.meta", onBookmarkMeta);
+  on("bookmark.deleted", onBookmarkDeleted);
+  on("folder.added", () => later("tree", loadAll));
+  on("folder.renamed", () => later("tree", loadAll));
+  on("folder.deleted", onFolderDeleted);
+  on("media_log.added", patchMediaLog);
+  on("media_log.updated", patchMediaLog);
+  on("media_log.deleted", (d) => patchMediaLog(d, true));
+  // Entries show their category's name, which a rename changes without touching them
+  on("media_category.changed", () => {
+    if (activeTab !== "medialog") return;
+    later("mlcats", loadMlCategories);
+    later("medialog", refreshMediaLog);
+  });
+  // The server no longer has the events we missed: fall back to a full reload
+  on("reset", () => {
+    loadAll();
+    refreshCurrentView();
+    if (activeTab === "medialog") { loadMlCategories(); loadMediaLog(); }
+  });
+}
+
+// Coalesce bursts (bulk moves, imports) into one call per kind
+function later(name, fn, delay = 150) {
+  clearTimeout(liveTimers[name]);
+  liveTimers[name] = setTimeout(fn, delay);
+}
+
+// Without a live feed, refetch what the mutation touched
+async function syncAfterMutation(view = true) {
+  if (liveConnected) return;
+  if (view) await refreshCurrentView();
+  await loadAll();
+}
+
+function indexTree() {
+  folderIndex = new Map();
+  const walk = (nodes) => { for (const n of nodes) { folderIndex.set(n.id, n); walk(n.children || []); } };
+  walk(TREE);
+}
+
+function adjustCounts(folderId, delta) {
+  for (let n = folderIndex.get(folderId); n; n = folderIndex.get(n.parent_id)) n.count = (n.count ?? 0) + delta;
+  const g = MERGED.find(g => (g.folder_ids || []).includes(folderId));
+  if (g) g.total_bookmarks = (g.total_bookmarks ?? 0) + delta;
+  later("sidebar", renderSidebar, 50);
+}
+
+function inView(folderId) {
+  if (currentMode === "merged") {
+    const g = MERGED.find(g => g.key === currentMergedKey);
+    return !!g && (g.folder_ids || []).includes(folderId);
+  }
+  for (let n = folderIndex.get(folderId); n; n = folderIndex.get(n.parent_id)) {
+    if (n.id === current) return true;
+  }
+  return false;
+}
+
+function onBookmarkAdded(b) {
+  adjustCounts(b.folder_id, 1);
+  if (inView(b.folder_id)) later("view", refreshCurrentView);
+}
+
+function onBookmarkMoved(b) {
+  adjustCounts(b.from_folder_id, -1);
+  adjustCounts(b.folder_id, 1);
+  if (inView(b.folder_id)) later("view", refreshCurrentView);  // new position / breadcrumb
+  else removeCard(b.id);
+}
+
+function onBookmarkMeta(b) {
+  patchCard(b);
+  if (!addedHere.delete(b.id)) return;
+  if (b.meta_status === "failed") showToast(`Couldn't fetch metadata: ${b.meta_error || "unknown error"}`, "error");
+  else showToast("VOD metadata loaded", "success");
+}
+
+function onBookmarkDeleted(d) {
+  adjustCounts(d.folder_id, -1);
+  removeCard(d.id);
+}
+
+function onFolderDeleted(d) {
+  if (currentMode === "folder" && current === d.id) {
+    current = null;
+    document.getElementById("title").textContent = "Select folder";
+    loadFirstPage();
+  }
+  later("tree", loadAll);
+}
+
+// The window re-creates a rendered card whose item changed, and drops one whose item is gone
+function patchCard(b) {
+  const i = currentCards.findIndex(x => x.id === b.id);
+  if (i < 0) return;
+  currentCards[i] = { ...currentCards[i], ...b };  // keeps folder_breadcrumb
+  renderCardWindow();
+}
+
+function removeCard(id) {
+  const i = currentCards.findIndex(x => x.id === id);
+  if (i >= 0) currentCards.splice(i, 1);
+  cardHeights.delete(id);
+  if (selectedIds.delete(id)) updateBulkBar();
+  if (hasView() && currentCards.length === 0 && !pageCursor) renderCards([]);
+  else renderCardWindow();
+}
+
+function mlMatches(item) {
+  const status = document.getElementById("mlStatusFilter").value;
+  if (status && item.status !== status) return false;
+  if (mlCurrentCategory === "__all__") return true;
+  if (mlCurrentCategory === "__currently__") return item.status === "currently";
+  return item.category === mlCurrentCategory;
+}
+
+function patchMediaLog(item, deleted = false) {
+  if (activeTab !== "medialog") return;  // switchTab reloads it anyway
+  const i = mlItems.findIndex(x => x.id === item.id);
+  if (deleted || !mlMatches(item)) {
+    if (i < 0) return;
+    mlItems.splice(i, 1);
+    renderMediaLogCards();
+    return;
+  }
+  // Edits that keep the entry in its place are patched in; anything that can
+  // move it between groups, pages or search results refetches the loaded rows
+  const old = mlItems[i];
+  if (old && old.title === item.title && old.status === item.status && old.category === item.category
+      && (!mlQuery() || old.progress === item.progress)) {
+    mlItems[i] = item;
+    renderMediaLogCards();
+    return;
+  }
+  later("medialog", refreshMediaLog);
+}
+
 // ══════════════════════════════════════════════════════
 //  Tab Switching
 // ══════════════════════════════════════════════════════
@@ -842,7 +1250,7 @@ function switchTab(tab) {
 
   if (tab === "medialog") {
     loadMlCategories();
-    loadMediaLog(mlCurrentCategory);
+    loadMediaLog();
     // Hide add section for special views
     const addSection = document.querySelector("#tab-medialog .addSection");
     if (addSection) {
@@ -889,7 +1297,6 @@ window.toggleSidebar = toggleSidebar;
 // ══════════════════════════════════════════════════════
 
 let mlCurrentCategory = "__all__";
-let mlCurrentCards = [];
 let mlCategories = [];
 
 const STATUS_SHORT = {
@@ -1011,7 +1418,7 @@ function renderMlSidebar() {
         document.getElementById("mlTitle").textContent = "All Media";
       }
       await loadMlCategories();
-      loadMediaLog(mlCurrentCategory);
+      loadMediaLog();
     };
     actions.appendChild(delBtn);
 
@@ -1059,52 +1466,93 @@ function selectCategory(cat) {
     addSection.style.display = (cat === "__all__" || cat === "__currently__") ? "none" : "";
   }
 
-  loadMediaLog(cat);
+  loadMediaLog();
   closeSidebar();
 }
 window.selectCategory = selectCategory;
 
 // ── Data loading ──
+// /api/media_log filters, sorts and pages on the server; the next page is
+// fetched when the window below reaches the end of what is loaded.
 
-async function loadMediaLog(category) {
-  const r = await fetch(`/api/media_log?category=${encodeURIComponent(category)}`);
-  const data = await r.json();
-  mlCurrentCards = data;
-  applyMlSearchAndSort();
+const ML_PAGE_SIZE = 100;
+let mlItems = [];        // loaded entries, in display order
+let mlCursor = null;     // next_cursor from the last page, null when done
+let mlLoading = false;
+let mlSeq = 0;           // bumps on every reset so stale responses are dropped
+
+function mlQuery() {
+  return (document.getElementById("mlSearchInput").value || "").trim();
 }
 
-function applyMlSearchAndSort() {
-  let list = [...mlCurrentCards];
+function mlUrl(limit, cursor) {
+  const params = new URLSearchParams({ category: mlCurrentCategory, limit });
+  const sortVal = document.getElementById("mlSortSelect").value;
+  if (sortVal && sortVal !== "default") params.set("sort", sortVal);
+  const status = document.getElementById("mlStatusFilter").value;
+  if (status) params.set("status", status);
+  const query = mlQuery();
+  if (query) params.set("q", query);
+  if (cursor) params.set("cursor", cursor);
+  return `/api/media_log?${params}`;
+}
 
-  const query = (document.getElementById("mlSearchInput").value || "").trim().toLowerCase();
-  if (query) {
-    list = list.filter(item => {
-      const title = (item.title || "").toLowerCase();
-      const progress = (item.progress || "").toLowerCase();
-      return title.includes(query) || progress.includes(query);
-    });
+async function loadMediaLog(limit = ML_PAGE_SIZE, keepScroll = false) {
+  const seq = ++mlSeq;
+  mlCursor = null;
+  mlLoading = true;
+  const r = await fetch(mlUrl(limit, null));
+  const data = await r.json();
+  if (seq !== mlSeq) return;
+  mlLoading = false;
+  mlItems = data.items || [];
+  mlCursor = data.next_cursor;
+  if (!keepScroll) {
+    document.querySelector("#tab-medialog .mlMain").scrollTop = 0;
+    mlAnimate = true;
   }
+  renderMediaLogCards();
+}
 
-  const sortVal = document.getElementById("mlSortSelect").value;
-  if (sortVal === "title_asc") list.sort((a, b) => (a.title || "").localeCompare(b.title || ""));
-  else if (sortVal === "title_desc") list.sort((a, b) => (b.title || "").localeCompare(a.title || ""));
+async function loadNextMlPage() {
+  if (mlLoading || !mlCursor) return;
+  const seq = mlSeq;
+  mlLoading = true;
+  const r = await fetch(mlUrl(ML_PAGE_SIZE, mlCursor));
+  const data = await r.json();
+  if (seq !== mlSeq) return;
+  mlLoading = false;
+  mlItems = mlItems.concat(data.items || []);
+  mlCursor = data.next_cursor;
+  renderMediaLogCards();
+}
 
-  renderMediaLogCards(list);
+// Reload as many rows as are already loaded so the list doesn't jump
+function refreshMediaLog() {
+  return loadMediaLog(Math.max(ML_PAGE_SIZE, mlItems.length), true);
 }
 
+function applyMlSearchAndSort() { loadMediaLog(); }
+
 function applyMlSort() { applyMlSearchAndSort(); }
 window.applyMlSort = applyMlSort;
 
+// Debounced; filtering happens server-side
+let mlSearchTimer = null;
 document.getElementById("mlSearchInput").addEventListener("input", () => {
-  applyMlSearchAndSort();
+  clearTimeout(mlSearchTimer);
+  mlSearchTimer = setTimeout(applyMlSearchAndSort, 250);
 });
 
 // ── Card rendering ──
 
 function createMlEntryCard(item, animIdx, showCategory) {
   const card = document.createElement("div");
-  card.className = "mlEntryCard cardAnimateIn";
-  card.style.animationDelay = `${animIdx * 0.04}s`;
+  card.className = "mlEntryCard";
+  if (animIdx !== null) {
+    card.classList.add("cardAnimateIn");
+    card.style.animationDelay = `${animIdx * 0.04}s`;
+  }
   card.setAttribute("role", "listitem");
 
   const categoryBadge = showCategory ? `<span class="mlEntryCat">${escapeHtml(item.category)}</span>` : "";
@@ -1132,14 +1580,11 @@ function createMlEntryCard(item, animIdx, showCategory) {
 function attachMlCardHandlers(el) {
   el.querySelectorAll(".mlStatusSelect").forEach(sel => {
     sel.onchange = async () => {
-      const id = sel.getAttribute("data-id");
-      await fetch(`/api/media_log/${id}`, {
-        method: "PATCH",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ status: sel.value })
-      });
+      const id = parseInt(sel.getAttribute("data-id"));
+      const j = await apiBatch([{ op: "media_log.update", id, status: sel.value }]);
+      if (!j.ok) return showToast(j.error || "Update failed", "error");
       showToast("Status updated", "success");
-      loadMediaLog(mlCurrentCategory);
+      if (!liveConnected) refreshMediaLog();
     };
   });
 
@@ -1150,13 +1595,10 @@ function attachMlCardHandlers(el) {
       const oldProgress = btn.getAttribute("data-progress");
       const result = await showEditModal(oldTitle, oldProgress);
       if (!result || !result.title) return;
-      await fetch(`/api/media_log/${id}`, {
-        method: "PATCH",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ title: result.title, progress: result.progress })
-      });
+      const j = await apiBatch([{ op: "media_log.update", id: parseInt(id), title: result.title, progress: result.progress }]);
+      if (!j.ok) return showToast(j.error || "Update failed", "error");
       showToast("Entry updated", "success");
-      loadMediaLog(mlCurrentCategory);
+      if (!liveConnected) refreshMediaLog();
     };
   });
 
@@ -1167,22 +1609,79 @@ function attachMlCardHandlers(el) {
       if (!ok) return;
       await fetch(`/api/media_log/${id}`, { method: "DELETE" });
       showToast("Entry deleted", "success");
-      loadMediaLog(mlCurrentCategory);
+      if (!liveConnected) refreshMediaLog();
     };
   });
 }
 
-function renderMediaLogCards(list) {
-  const el = document.getElementById("mlCards");
-  el.innerHTML = "";
+// ── Windowed rendering ──
+// Only the rows in and near the visible part of .mlMain are in the DOM.
+// Entries and the group headers between them are absolutely positioned from
+// per-kind heights measured once, so scrolling through thousands of entries
+// touches a screenful of elements at a time.
+
+const ML_OVERSCAN = 600;     // px of rows kept rendered above and below the viewport
+let mlRows = [];             // {key, item} entries and {key, header} group headers, in display order
+let mlTops = [];             // top of each row, then the total height
+let mlRowSize = null;        // measured heights, see measureMlRows
+let mlRendered = new Map();  // row key -> {el, item} currently in the DOM
+let mlAnimate = false;       // animate the first window of a freshly loaded view
+let mlFrame = 0;
+
+function measureMlRows(el) {
+  // Off-screen copies of a card and a header, laid out by the normal (non-window) rules
+  const probe = document.createElement("div");
+  probe.style.visibility = "hidden";
+  const card = createMlEntryCard(mlItems[0], null, mlCurrentCategory === "__all__");
+  const header = document.createElement("div");
+  header.className = "mlGroupHeader";
+  header.textContent = "M";
+  probe.append(card, header);
+  el.after(probe);
+  const cs = getComputedStyle(card), hs = getComputedStyle(header);
+  const px = (v) => parseFloat(v) || 0;
+  const size = {
+    entry: card.offsetHeight + px(cs.marginBottom),
+    header: header.offsetHeight + px(hs.marginBottom),
+    // The header's top margin collapses into the bottom margin of the card above it
+    headerGap: Math.max(0, px(hs.marginTop) - px(cs.marginBottom)),
+  };
+  probe.remove();
+  return size.entry > 0 ? size : null;  // nothing to measure while the tab is hidden
+}
 
-  if (!Array.isArray(list) || list.length === 0) {
-    const q = (document.getElementById("mlSearchInput").value || "").trim();
-    if (q) {
+function buildMlRows() {
+  const byCategory = mlCurrentCategory === "__currently__";
+  mlRows = [];
+  mlTops = [];
+  let group = null, y = 0;
+  for (const item of mlItems) {
+    const key = byCategory ? (item.category || "Unknown") : (item.status || "plan_to_watch");
+    if (key !== group) {
+      if (mlRows.length) y += mlRowSize.headerGap;
+      mlRows.push({ key: "h:" + key, header: byCategory ? key : (STATUS_SHORT[key] || key) });
+      mlTops.push(y);
+      y += mlRowSize.header;
+      group = key;
+    }
+    mlRows.push({ key: "e:" + item.id, item });
+    mlTops.push(y);
+    y += mlRowSize.entry;
+  }
+  mlTops.push(y);
+}
+
+function renderMediaLogCards() {
+  const el = document.getElementById("mlCards");
+  if (mlItems.length === 0) {
+    mlRendered.clear();
+    el.classList.remove("mlWindow");
+    el.style.height = "";
+    if (mlQuery() || document.getElementById("mlStatusFilter").value) {
       el.innerHTML = `<div class="emptyState">
         <div class="emptyIcon">\uD83D\uDD0D</div>
         <div class="emptyTitle">No results found</div>
-        <div class="emptyHint">Try a different search term.</div>
+        <div class="emptyHint">Try a different search term or status.</div>
       </div>`;
     } else {
       const label = mlCurrentCategory === "__all__" ? "media"
@@ -1197,49 +1696,82 @@ function renderMediaLogCards(list) {
     return;
   }
 
-  let animIdx = 0;
+  if (!el.classList.contains("mlWindow")) {
+    el.innerHTML = "";
+    el.classList.add("mlWindow");
+  }
+  mlRowSize = mlRowSize || measureMlRows(el);
+  if (!mlRowSize) return;
+  buildMlRows();
+  el.style.height = `${mlTops[mlTops.length - 1]}px`;
+  renderMlWindow();
+}
 
-  if (mlCurrentCategory === "__currently__") {
-    // Group by category
-    const byCategory = {};
-    for (const item of list) {
-      const cat = item.category || "Unknown";
-      if (!byCategory[cat]) byCategory[cat] = [];
-      byCategory[cat].push(item);
-    }
-    for (const [catName, items] of Object.entries(byCategory)) {
-      const header = document.createElement("div");
-      header.className = "mlGroupHeader";
-      header.textContent = catName;
-      el.appendChild(header);
-      for (const item of items) {
-        el.appendChild(createMlEntryCard(item, animIdx++, false));
-      }
-    }
-  } else {
-    // __all__ or specific category: group by status
-    const showCat = mlCurrentCategory === "__all__";
-    const groups = { currently: [], completed: [], plan_to_watch: [] };
-    for (const item of list) {
-      const s = item.status || "plan_to_watch";
-      if (groups[s]) groups[s].push(item);
-      else groups.plan_to_watch.push(item);
+// First row whose bottom is below y
+function mlRowAt(y) {
+  let lo = 0, hi = mlRows.length;
+  while (lo < hi) {
+    const mid = (lo + hi) >> 1;
+    if (mlTops[mid + 1] <= y) lo = mid + 1;
+    else hi = mid;
+  }
+  return lo;
+}
+
+function renderMlWindow() {
+  const el = document.getElementById("mlCards");
+  if (!mlRows.length || !el.classList.contains("mlWindow")) return;
+  const main = el.closest(".mlMain");
+  const offset = main.getBoundingClientRect().top - el.getBoundingClientRect().top;
+  const from = offset - ML_OVERSCAN;
+  const to = offset + main.clientHeight + ML_OVERSCAN;
+  const showCat = mlCurrentCategory === "__all__";
+
+  const visible = new Map();
+  const frag = document.createDocumentFragment();
+  let animIdx = 0;
+  for (let i = mlRowAt(from); i < mlRows.length && mlTops[i] < to; i++) {
+    const row = mlRows[i];
+    let node = mlRendered.get(row.key);
+    if (node && node.item !== row.item) {
+      node.el.remove();
+      node = null;
     }
-    for (const [statusKey, items] of Object.entries(groups)) {
-      if (items.length === 0) continue;
-      const header = document.createElement("div");
-      header.className = "mlGroupHeader";
-      header.textContent = STATUS_SHORT[statusKey] || statusKey;
-      el.appendChild(header);
-      for (const item of items) {
-        el.appendChild(createMlEntryCard(item, animIdx++, showCat));
+    if (!node) {
+      let rowEl;
+      if (row.header) {
+        rowEl = document.createElement("div");
+        rowEl.className = "mlGroupHeader";
+        rowEl.textContent = row.header;
+      } else {
+        rowEl = createMlEntryCard(row.item, mlAnimate ? animIdx++ : null, showCat);
       }
+      node = { el: rowEl, item: row.item };
+      frag.appendChild(rowEl);
     }
+    node.el.style.top = `${mlTops[i]}px`;
+    visible.set(row.key, node);
+    mlRendered.delete(row.key);
   }
+  for (const node of mlRendered.values()) node.el.remove();
+  mlRendered = visible;
+  mlAnimate = false;
+  attachMlCardHandlers(frag);
+  el.appendChild(frag);
 
-  attachMlCardHandlers(el);
+  if (mlCursor && to >= mlTops[mlTops.length - 1]) loadNextMlPage();
 }
 
+document.querySelector("#tab-medialog .mlMain").addEventListener("scroll", () => {
+  if (!mlFrame) mlFrame = requestAnimationFrame(() => { mlFrame = 0; renderMlWindow(); });
+}, { passive: true });
+
+// Card and header heights change with the layout breakpoints
+window.addEventListener("resize", () => {
+  mlRowSize = null;
+  if (activeTab === "medialog") later("mlresize", renderMediaLogCards);
+});
+
 // ── Add entry ──
 
 async function addMediaLogEntry() {
@@ -1278,7 +1810,7 @@ async function addMediaLogEntry() {
   titleInput.value = "";
   progressInput.value = "";
   statusSelect.value = "currently";
-  loadMediaLog(mlCurrentCategory);
+  if (!liveConnected) refreshMediaLog();
 }
 window.addMediaLogEntry = addMediaLogEntry;
 
@@ -0,0 +1,287 @@
+import hashlib
+import io
+import os
+import threading
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PIL import Image
+except ImportError:  # resizing is skipped; originals are still cached and served
+    Image = None
+
+# On-disk thumbnail cache behind /thumb/<bookmark_id>.
+#
+# Each remote thumbnail is downloaded once and stored under the SHA-256 of its
+# bytes, so bookmarks sharing a thumbnail share the files. A small pointer file
+# per source URL records which blob it resolved to. Resized variants are
+# derived from the original on first request and named after it, so their
+# names double as ETags. The whole directory is kept under max_bytes by
+# evicting the least recently served files (mtime is bumped on every hit);
+# pointers whose original was evicted are dropped along with it.
+
+WIDTHS = (160, 320, 480, 640)   # requested widths snap up to one of these
+FETCH_TIMEOUT = 10
+FETCH_MAX_BYTES = 5 * 1024 * 1024
+FETCH_LOCK_STRIPES = 64          # downloads of URLs hashing to the same stripe wait for each other
+# Hosts (and their subdomains) the default fetcher will download from. Imports
+# can set thumbnail_url to anything, so the server must not fetch arbitrary
+# or internal addresses on a client's behalf.
+THUMB_HOSTS = ("ytimg.com", "ggpht.com", "img.youtube.com")
+
+_MAGIC = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF8", "image/gif"),
+)
+
+
+def sniff_mimetype(data):
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    for magic, mimetype in _MAGIC:
+        if data.startswith(magic):
+            return mimetype
+    return None
+
+
+def allowed_url(url):
+    """True for http(s) URLs on one of THUMB_HOSTS."""
+    try:
+        parts = urllib.parse.urlsplit(url)
+        host = (parts.hostname or "").lower()
+    except ValueError:
+        return False
+    return parts.scheme in ("http", "https") and any(
+        host == h or host.endswith("." + h) for h in THUMB_HOSTS)
+
+
+class _AllowedRedirects(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        if not allowed_url(newurl):
+            raise ValueError("thumbnail redirected off the allowed hosts")
+        return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+
+_opener = urllib.request.build_opener(_AllowedRedirects)
+
+
+def http_fetch(url):
+    """Default fetcher: GET the image from an allowed host, refusing non-images and oversized bodies."""
+    if not allowed_url(url):
+        raise ValueError("thumbnail host not allowed")
+    req = urllib.request.Request(url, headers={"User-Agent": "VODMarks thumbnail cache"})
+    with _opener.open(req, timeout=FETCH_TIMEOUT) as resp:
+        data = resp.read(FETCH_MAX_BYTES + 1)
+    if len(data) > FETCH_MAX_BYTES:
+        raise ValueError("thumbnail too large")
+    return data
+
+
+def snap_width(width):
+    """Round a requested width up to a cached size; None means the original."""
+    if not width:
+        return None
+    for w in WIDTHS:
+        if width <= w:
+            return w
+    return None
+
+
+class ThumbCache:
+    def __init__(self, root, max_bytes=200 * 1024 * 1024, fetcher=http_fetch, prefetch_workers=2):
+        self.root = root
+        self.max_bytes = max_bytes
+        # Swappable so the cache can be exercised offline against local fixtures
+        self.fetcher = fetcher
+        self.prefetch_workers = prefetch_workers
+        self._lock = threading.Lock()
+        self._fetch_locks = [threading.Lock() for _ in range(FETCH_LOCK_STRIPES)]
+        self._pool = None
+        self._size = None
+        self.stats = {"hits": 0, "fetched": 0, "resized": 0, "evicted": 0, "errors": 0}
+        os.makedirs(os.path.join(root, "blobs"), exist_ok=True)
+        os.makedirs(os.path.join(root, "urls"), exist_ok=True)
+
+    # ── paths ──
+
+    def _blob_path(self, name):
+        return os.path.join(self.root, "blobs", name[:2], name)
+
+    def _pointer_path(self, url):
+        return os.path.join(self.root, "urls", hashlib.sha256(url.encode("utf-8")).hexdigest())
+
+    def _replace(self, path, data):
+        """Write a file atomically, so readers in any worker see the old or the new contents."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _write(self, path, data):
+        self._replace(path, data)
+        self._grow(len(data))
+
+    # ── lookup ──
+
+    def _cached_original(self, pointer):
+        try:
+            with open(pointer) as f:
+                digest = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return digest if digest and os.path.exists(self._blob_path(digest)) else None
+
+    def _original(self, url):
+        """Digest of the cached original for `url`, downloading it if needed."""
+        pointer = self._pointer_path(url)
+        digest = self._cached_original(pointer)
+        if digest:
+            return digest
+        # Concurrent misses on one URL download it once; the locks are a fixed
+        # set of stripes so they don't grow with the number of URLs served
+        with self._fetch_locks[int(os.path.basename(pointer)[:8], 16) % FETCH_LOCK_STRIPES]:
+            digest = self._cached_original(pointer)
+            if digest:
+                return digest
+            data = self.fetcher(url)
+            if not sniff_mimetype(data):
+                raise ValueError("not an image")
+            digest = hashlib.sha256(data).hexdigest()
+            if not os.path.exists(self._blob_path(digest)):
+                self._write(self._blob_path(digest), data)
+            self._replace(pointer, digest.encode())
+            with self._lock:
+                self.stats["fetched"] += 1
+            return digest
+
+    def get(self, url, width=None, webp=False):
+        """(path, mimetype, etag) for `url` at roughly `width` pixels wide."""
+        digest = self._original(url)
+        width = snap_width(width)
+        if width is None or Image is None:
+            path = self._blob_path(digest)
+            with open(path, "rb") as f:
+                mimetype = sniff_mimetype(f.read(16)) or "application/octet-stream"
+            self._touch(path)
+            return path, mimetype, digest
+        fmt = "webp" if webp else "jpeg"
+        name = f"{digest}-w{width}.{fmt}"
+        path = self._blob_path(name)
+        if os.path.exists(path):
+            with self._lock:
+                self.stats["hits"] += 1
+            self._touch(path)
+        else:
+            self._write(path, self._resize(self._blob_path(digest), width, fmt))
+            with self._lock:
+                self.stats["resized"] += 1
+        return path, f"image/{fmt}", name
+
+    def _resize(self, src, width, fmt):
+        with Image.open(src) as im:
+            im = im.convert("RGB")
+            if im.width > width:
+                im = im.resize((width, max(1, round(im.height * width / im.width))), Image.LANCZOS)
+            out = io.BytesIO()
+            im.save(out, "WEBP" if fmt == "webp" else "JPEG", quality=80)
+        return out.getvalue()
+
+    def _touch(self, path):
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+
+    # ── prefetch ──
+
+    def prefetch(self, url, widths=(320,)):
+        """Warm the cache for `url` in the background; errors are only counted."""
+        if not url:
+            return
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.prefetch_workers,
+                                                thread_name_prefix="thumbs")
+            pool = self._pool
+        pool.submit(self._prefetch, url, widths)
+
+    def _prefetch(self, url, widths):
+        try:
+            self._original(url)
+            for w in widths:
+                self.get(url, w, webp=True)
+        except Exception:
+            with self._lock:
+                self.stats["errors"] += 1
+
+    # ── size bound ──
+
+    def _files(self):
+        for dirpath, _, names in os.walk(os.path.join(self.root, "blobs")):
+            for n in names:
+                if not n.endswith(".tmp"):
+                    yield os.path.join(dirpath, n)
+
+    def _grow(self, nbytes):
+        with self._lock:
+            if self._size is None:
+                self._size = sum(os.path.getsize(p) for p in self._files())
+            else:
+                self._size += nbytes
+            over = self._size > self.max_bytes
+        if over:
+            self.evict()
+
+    def _drop_dangling_pointers(self):
+        """Remove pointer files whose original blob is gone, so urls/ stays bounded by blobs/."""
+        urls = os.path.join(self.root, "urls")
+        for n in os.listdir(urls):
+            if n.endswith(".tmp"):
+                continue
+            pointer = os.path.join(urls, n)
+            if self._cached_original(pointer) is None:
+                try:
+                    os.remove(pointer)
+                except FileNotFoundError:
+                    pass
+
+    def evict(self, target=0.9):
+        """Drop least recently used blobs until the cache is under target * max_bytes."""
+        entries = []
+        for p in self._files():
+            try:
+                st = os.stat(p)
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        entries.sort()
+        total = sum(e[1] for e in entries)
+        evicted = 0
+        for _, size, p in entries:
+            if total <= self.max_bytes * target:
+                break
+            try:
+                os.remove(p)
+            except FileNotFoundError:
+                continue
+            total -= size
+            evicted += 1
+        if evicted:
+            self._drop_dangling_pointers()
+        with self._lock:
+            self._size = total
+            self.stats["evicted"] += evicted
+        return evicted
+
+    def size(self):
+        with self._lock:
+            if self._size is None:
+                self._size = sum(os.path.getsize(p) for p in self._files())
+            return self._size
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)